@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Prompt tokens sent by the intent router over a scripted session.
+
+Replays the same scripted conversation (chat questions mixed with tool
+commands) against a stub LLM client, so no network or API key is needed:
+
+    legacy     ROUTER_PROMPT + input sent through chat(), i.e. appended to the
+               history and re-sent on every later turn (unbounded history)
+    budgeted   the same, with the token-budgeted history
+    stateless  router_messages(): fixed router prefix + the budgeted history +
+               the bare input; only the utterance and reply are kept
+
+    python benchmarks/router_context_benchmark.py --turns 50
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from configs.config import Configs
+from core.chat_openrouter import OpenRouterChat
+from router import ROUTER_PROMPT, decide_action
+
+SCRIPT = [
+    ("What's the weather usually like in Delhi in December?", None),
+    ("Open chrome", ("open_app", {"app_name": "chrome"})),
+    ("Tell me a fun fact about tea", None),
+    ("Set the volume to 40", ("set_volume", {"level": 40})),
+    ("Who wrote the Ramayana?", None),
+    ("Create a folder called projects", ("create_folder", {"folder_name": "projects"})),
+    ("Give me a quick tip to focus better", None),
+    ("Lock the computer", ("lock_computer", {})),
+    ("What should I cook for dinner tonight?", None),
+    ("Open vscode", ("open_app", {"app_name": "vscode"})),
+]
+
+
+class StubClient:
+    """Answers like the router would; summaries are a fixed short text"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.turn = 0
+
+    def create(self, model, messages, temperature=0.7, max_tokens=1000, stream=False):
+        if messages[-1]["content"].startswith("Update the summary"):
+            content = "The user asked about Delhi weather, tea and cooking and had apps opened."
+        else:
+            _, tool = SCRIPT[self.turn % len(SCRIPT)]
+            self.turn += 1
+            if tool:
+                content = json.dumps({"action": "tool", "tool": tool[0], "arguments": tool[1]})
+            else:
+                content = json.dumps({"action": "chat", "response":
+                                      "Arre boss, here's the short answer. Hope that helps, yaar!"})
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def run(mode, turns):
+    chat = OpenRouterChat(client=StubClient())
+    if mode == "legacy":
+        chat.context.budget = 10 ** 9
+    for turn in range(turns):
+        user_input, _ = SCRIPT[turn % len(SCRIPT)]
+        if mode == "stateless":
+            decision = decide_action(chat, user_input)
+            reply = decision.get("response") or f"Done: {decision.get('tool')}"
+            chat.record_turn(user_input, reply)
+        else:
+            chat.chat(f"{ROUTER_PROMPT}\nUser Input: {user_input}")
+        chat.context.wait_for_summary()
+    return chat.tokens_sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # one log line per request otherwise
+
+    results = {mode: run(mode, args.turns) for mode in ("legacy", "budgeted", "stateless")}
+    checkpoints = [t for t in (1, 10, 25, 50, 100) if t <= args.turns]
+    print(f"Prompt tokens per routing request ({args.turns} turns, "
+          f"budget {Configs.CONTEXT_TOKEN_BUDGET} tokens)")
+    print(f"{'mode':<10}" + "".join(f"{'turn ' + str(t):>10}" for t in checkpoints) + f"{'total':>10}{'mean':>8}")
+    for mode, tokens in results.items():
+        row = "".join(f"{tokens[t - 1]:>10}" for t in checkpoints)
+        print(f"{mode:<10}{row}{sum(tokens):>10}{sum(tokens) / len(tokens):>8.0f}")
+    legacy, stateless = sum(results["legacy"]), sum(results["stateless"])
+    print(f"stateless vs legacy: {100 * (1 - stateless / legacy):.1f}% fewer prompt tokens")
+
+
+if __name__ == "__main__":
+    main()
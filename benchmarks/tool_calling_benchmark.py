@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+JSON-in-prompt routing vs native tool calling.
+
+Runs the same scripted utterances through decide_action() in both modes and
+reports prompt tokens per request (tool schemas counted as their JSON) and,
+with --live, the parse-failure rate: decisions that fell back to chat because
+the model's reply couldn't be read, or named a tool/arguments that don't exist.
+
+Without --live a stub client answers, so only the token side is measured and
+no API key is needed.
+
+    python benchmarks/tool_calling_benchmark.py
+    python benchmarks/tool_calling_benchmark.py --live --repeat 3
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.chat_openrouter import OpenRouterChat
+from router import PARSE_FAILURE_RESPONSE, decide_action
+from tools.system_tools import SystemToolManager
+
+UTTERANCES = [
+    ("open chrome", "open_app"),
+    ("bhai volume 30 kar do", "set_volume"),
+    ("make a folder called invoices on my desktop", "create_folder"),
+    ("shut down the pc in 5 minutes", "shutdown_computer"),
+    ("actually cancel the shutdown", "cancel_shutdown"),
+    ("lock my computer please", "lock_computer"),
+    ("can you open notepad and calculator", "open_app"),
+    ("restart in 2 minutes", "restart_computer"),
+    ("put the laptop to sleep", "sleep_computer"),
+    ("what's a good name for a cat?", None),
+    ("tell me a joke about chai", None),
+    ("who won the 2011 cricket world cup?", None),
+]
+
+
+class StubClient:
+    """Answers every request with a short chat reply (token measurement only)"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        text = '{"action": "chat", "response": "Sure."}' if "tools" not in kwargs else "Sure."
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text, tool_calls=None))])
+        delta = SimpleNamespace(content=text, tool_calls=None)
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=delta)])])
+
+
+def is_failure(decision, manager):
+    if decision.get("response") == PARSE_FAILURE_RESPONSE:
+        return True
+    if decision.get("action") != "tool":
+        return False
+    method = manager.tools.get(decision.get("tool"))
+    if method is None:
+        return True
+    try:
+        inspect.signature(method).bind(**(decision.get("arguments") or {}))
+    except TypeError:
+        return True
+    return False
+
+
+def run(mode, live, repeat):
+    manager = SystemToolManager()
+    tools = manager.tool_schemas() if mode == "native" else None
+    chat = OpenRouterChat() if live else OpenRouterChat(client=StubClient())
+    failures = misrouted = 0
+    for _ in range(repeat):
+        for utterance, expected in UTTERANCES:
+            decision = decide_action(chat, utterance, tools)
+            if is_failure(decision, manager):
+                failures += 1
+            elif (decision.get("tool") if decision.get("action") == "tool" else None) != expected:
+                misrouted += 1
+    requests = len(chat.tokens_sent)
+    return {
+        "requests": requests,
+        "tokens_mean": sum(chat.tokens_sent) / requests,
+        "parse_failures": failures / requests,
+        "misrouted": misrouted / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="call the real model (needs OPENROUTER_API_KEY)")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {mode: run(mode, args.live, args.repeat) for mode in ("json", "native")}
+    print(f"{'mode':<8}{'requests':>10}{'prompt tokens':>15}" +
+          (f"{'parse failures':>16}{'misrouted':>11}" if args.live else ""))
+    for mode, result in results.items():
+        row = f"{mode:<8}{result['requests']:>10}{result['tokens_mean']:>15.0f}"
+        if args.live:
+            row += f"{result['parse_failures']:>15.1%}{result['misrouted']:>11.1%}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
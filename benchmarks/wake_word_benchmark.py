@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Wake-word spotter benchmark.
+
+Expects a fixture folder laid out as:
+
+    fixtures/
+        positive/<alias>/*.wav   # recordings that contain the alias
+        negative/*.wav           # speech/noise that must not trigger
+
+Reports false-reject rate on positives, false-accept rate (share of clips and
+per hour) on negatives, detection latency measured from the end of speech in each
+positive clip, and CPU time per second of audio.
+
+    python benchmarks/wake_word_benchmark.py fixtures/ --sensitivity 0.5
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from configs.config import Configs
+from core.audio_pipeline import WavFrameSource, iter_speech_segments
+from core.wake_word import KeywordSpotter
+
+
+def _wav_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(".wav")
+    )
+
+
+def _speech_end(path):
+    with WavFrameSource(path) as source:
+        segments = list(iter_speech_segments(source))
+    return segments[-1].end_time if segments else None
+
+
+def run_clip(spotter, path):
+    """Run one clip through a fresh spotter state; returns (detections, audio_seconds, cpu_seconds)"""
+    spotter.reset()
+    detections = []
+    with WavFrameSource(path, frame_ms=spotter.frame_ms) as source:
+        for frame in source:
+            detection = spotter.process_frame(frame)
+            if detection:
+                detections.append(detection)
+        # Flush a little silence so a keyword at the very end can still fire
+        silence = b"\x00" * source.frame_bytes
+        for _ in range(500 // spotter.frame_ms):
+            detection = spotter.process_frame(silence)
+            if detection:
+                detections.append(detection)
+    return detections, spotter.audio_time, spotter.compute_time
+
+
+def benchmark(fixtures, templates_dir, sensitivity):
+    spotter = KeywordSpotter.from_directory(templates_dir, sensitivity=sensitivity)
+    total_audio = 0.0
+    total_cpu = 0.0
+
+    positives = 0
+    rejected = 0
+    latencies = []
+    positive_root = os.path.join(fixtures, "positive")
+    aliases = sorted(os.listdir(positive_root)) if os.path.isdir(positive_root) else []
+    for alias in aliases:
+        for path in _wav_files(os.path.join(positive_root, alias)):
+            positives += 1
+            detections, audio, cpu = run_clip(spotter, path)
+            total_audio += audio
+            total_cpu += cpu
+            hits = [d for d in detections if d.alias == alias.lower()]
+            if not hits:
+                rejected += 1
+                continue
+            end = _speech_end(path)
+            if end is not None:
+                latencies.append(max(0.0, hits[0].timestamp - end))
+
+    negatives = 0
+    accepted = 0  # negative clips with at least one detection
+    false_accepts = 0  # detections across all negative clips
+    negative_audio = 0.0
+    for path in _wav_files(os.path.join(fixtures, "negative")):
+        negatives += 1
+        detections, audio, cpu = run_clip(spotter, path)
+        total_audio += audio
+        negative_audio += audio
+        total_cpu += cpu
+        accepted += bool(detections)
+        false_accepts += len(detections)
+
+    print(f"Sensitivity:          {sensitivity:.2f} (threshold {spotter.threshold:.3f})")
+    if positives:
+        print(f"False-reject rate:    {rejected / positives:.1%} ({rejected}/{positives} clips)")
+    if latencies:
+        print(f"Detection latency:    mean {np.mean(latencies) * 1000:.0f} ms, "
+              f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms")
+    if negatives:
+        per_hour = false_accepts / negative_audio * 3600 if negative_audio else 0.0
+        print(f"False-accept rate:    {accepted / negatives:.1%} of clips ({accepted}/{negatives}), "
+              f"{per_hour:.1f} per hour")
+    if total_audio:
+        print(f"CPU per audio second: {total_cpu / total_audio * 1000:.1f} ms "
+              f"({total_cpu / total_audio:.1%} of one core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", help="folder with positive/<alias>/ and negative/ WAV files")
+    parser.add_argument("--templates", default=Configs.WAKE_WORD_TEMPLATE_DIR)
+    parser.add_argument("--sensitivity", type=float, nargs="+", default=[Configs.WAKE_WORD_SENSITIVITY])
+    args = parser.parse_args()
+
+    for sensitivity in args.sensitivity:
+        benchmark(args.fixtures, args.templates, sensitivity)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,5 @@
 import os 
-from do    @classmethod
-    def get_system_prompt(cls):
-        return f"""
-    You are {cls.ASSISTANT_NAME}, a friendly Indian AI voice assistant.
-- Speak in a natural, conversational desi style — polite, warm, and approachable.
-- Keep answers short and clear (1–3 sentences), like you're talking to a friend.
-- Use simple words and avoid over-technical explanations unless the user asks.
-- Add a touch of Indian flavor where it feels natural (e.g., "Arre", "Boss", "Yaar", "Namaste") but don't overdo it.
-- When sharing facts, explain them simply, as if you're helping someone over chai.
-- If you don't know something, admit it honestly, and suggest a next step ("Maybe check once online?").
-- Always sound supportive, practical, and down-to-earth.
-        """t load_dotenv
+from dotenv import load_dotenv
 from .constant import Constants
 
 load_dotenv()
@@ -21,13 +10,127 @@ class Configs:
 
     ASSISTANT_NAME = "Jarvis"
     ASSISTANT_MODEL = "openai/gpt-5"
+    ASSISTANT_FALLBACK_MODELS = ["openai/gpt-4o-mini", "google/gemini-2.0-flash-001"]  # tried in order
+    LLM_HEDGE_DELAY = 2.5  # seconds without a first token before the next model is started too
+    LLM_TURN_BUDGET = 15  # seconds to get a first token from any model
+    LLM_RETRY_BACKOFF = 0.5  # seconds; doubled per retry, with jitter
     OPENROUTER_API_URL = "https://openrouter.ai/api/v1"
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+    OPENROUTER_ASYNC = False  # AsyncOpenAI on a background event loop instead of the sync client
+    OPENROUTER_MAX_CONNECTIONS = 4  # pooled keep-alive connections
+    OPENROUTER_KEEPALIVE_EXPIRY = 120  # seconds an idle pooled connection is kept open
+    OPENROUTER_KEEPALIVE_INTERVAL = 45  # seconds between pings while idle (0 = no pings)
+    OPENROUTER_PING_PATH = "/key"  # cheap authenticated endpoint used to warm the connection
+    OPENROUTER_TIMEOUT = 60  # seconds
+    OPENROUTER_CONNECT_TIMEOUT = 5  # seconds
     ASSISTANT_COOLDOWN_TIME = 5  # seconds
     MAX_RETRY_ATTEMPTS = 2
     RETRY_DELAY = 2  # seconds
     SHUTDOWN_TIMER = Constants.DEFAULT_SHUTDOWN_DELAY  # seconds
     VOLUME_STEP = Constants.DEFAULT_VOLUME_STEP  # percentage
+
+    # Audio capture settings
+    STREAMING_CAPTURE = True  # frame-by-frame VAD capture instead of recognizer.listen()
+    SHARED_CAPTURE = True  # one capture thread feeding a ring buffer for all consumers
+    RING_BUFFER_SECONDS = 30  # must exceed PHRASE_TIME_LIMIT
+    CAPTURE_PROCESS = False  # run shared capture in a worker process (shared-memory ring)
+    CAPTURE_HEARTBEAT_TIMEOUT = 2.0  # seconds without frames before the worker is restarted
+    CAPTURE_MAX_RESTARTS = 5
+    VAD_PRE_ROLL_MS = 300  # audio kept before detected speech onset
+    VAD_HANGOVER_MS = 600  # trailing silence that ends an utterance
+    VAD_START_FRAMES = 3  # consecutive speech frames needed to open a segment
+    VAD_THRESHOLD_DB = 9.0  # frame energy above the noise floor counted as speech
+    AUDIO_FRONTEND = True  # resample + noise suppression + AGC on the capture stream
+    FRONTEND_NOISE_SUPPRESSION = True
+    FRONTEND_OVER_SUBTRACTION = 2.0
+    FRONTEND_AGC = True
+    FRONTEND_AGC_TARGET_DB = -20.0  # dBFS
+    FRONTEND_STAGE_BUDGET_MS = {"resample": 0.3, "noise_suppression": 1.0, "agc": 0.2}  # CPU per frame
+    LISTEN_TIMEOUT = None  # seconds to wait for speech to start (None = forever)
+    PHRASE_TIME_LIMIT = 15  # seconds
+    WAKE_WORD_TIMEOUT = 5  # seconds
+
+    # Low-power idle listening
+    IDLE_MODE = True  # duty-cycled energy gate before wake-word detection
+    IDLE_POLL_INTERVAL = 0.25  # seconds between energy checks while idle
+    IDLE_FRAME_STRIDE = 2  # check every Nth frame while idle
+    IDLE_TRIGGER_DB = 10.0  # level above the noise floor that wakes the detector
+    IDLE_INACTIVITY_TIMEOUT = 20  # seconds without activity before dropping back to idle
+
+    # Conversation mode: follow-ups without repeating the wake word
+    CONVERSATION_MODE = True
+    FOLLOW_UP_WINDOW = 8  # seconds of silence before going back to wake-word mode
+    FOLLOW_UP_EXIT_PHRASES = ["that's all", "thats all", "that is all", "nothing else", "bas itna hi", "bas itna", "goodbye"]
+
+    # Barge-in settings
+    BARGE_IN = True  # keep listening while speaking and stop when the user talks
+    BARGE_IN_MARGIN_DB = 8.0  # user speech must be this much louder than the echo
+    BARGE_IN_MIN_SPEECH_MS = 150  # sustained speech needed to interrupt
+    BARGE_IN_STOP_TIMEOUT = 1.0  # seconds to wait for playback to stop
+    STOP_PHRASES = ["stop", "cancel", "never mind", "nevermind", "be quiet", "enough", "ruko", "bas", "chup"]  # interruptions that only cancel the turn
+
+    # Text-to-speech cache (rendered audio on disk)
+    TTS_CACHE = True
+    TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "tts")
+    TTS_CACHE_MAX_MB = 50
+    TTS_PRERENDER_ENGINES = ["pyttsx3"]  # add "gtts" to fetch the message phrases from Google at startup
+    TTS_PRERENDER_LANG = "hi"  # gTTS language used for pre-rendering
+    GTTS_SYNTHESIS_WORKERS = 2  # gTTS requests in flight while a segment is playing
+
+    # Text-to-speech engine selection (pyttsx3 / gTTS)
+    TTS_ROUTER = True  # pick the engine per utterance from measured latency, with fallback
+    TTS_DEFAULT_LANG = "en"  # language of replies unless the caller says otherwise
+    TTS_LANGUAGE_ID = True  # detect the language of each reply segment and pick the voice to match
+    TTS_FIRST_AUDIO_TIMEOUT = 3.0  # seconds before a silent engine is abandoned for the next one
+    TTS_MAX_CONSECUTIVE_FAILURES = 3  # failures before an engine is benched
+    TTS_ENGINE_COOLDOWN = 60  # seconds a benched engine is skipped
+    TTS_RACE_MODE = False  # synthesize the first sentence on two engines and play the first ready
+
+    # Streaming replies: speak sentence by sentence while the LLM is generating
+    STREAM_REPLIES = True
+    STREAM_FIRST_CLAUSE_MIN_CHARS = 20  # first segment may end at a comma this early
+    STREAM_CLAUSE_MIN_CHARS = 60  # later segments end at a comma only past this length
+    STREAM_MAX_SEGMENT_CHARS = 220  # hard split at a space beyond this
+
+    # Latency masking: a short filler phrase when the reply is slow to start
+    FILLER_AUDIO = True
+    FILLER_BUDGET = 1.5  # seconds after the user stops speaking before a filler plays
+
+    # Speech recognition settings
+    ASR_BACKEND = "google"  # "google" or "faster_whisper"
+    ASR_LANGUAGE = None  # e.g. "en", "hi"; None lets the backend decide
+    ASR_LANGUAGE_HINT = True  # pass the language of recent turns to backends that can use it
+    ASR_LANGUAGE_HINT_TURNS = 2  # consecutive turns in one language before it is hinted
+    ASR_LANGUAGE_HINT_CONFIDENCE = 0.7
+    HINGLISH_WORD_SHARE = 0.25  # share of romanised Hindi words that makes Latin text Hindi
+    HINGLISH_MIN_WORDS = 2  # ...and at least this many of them (or half of a short utterance)
+    ASR_PARTIAL_INTERVAL = 0.8  # seconds of new speech between partial transcripts
+    SPECULATIVE_ROUTING = True  # route a partial that stopped changing; dropped if the final differs
+    WHISPER_MODEL_SIZE = "small"
+    WHISPER_DEVICE = "auto"  # "cpu", "cuda" or "auto"
+    WHISPER_COMPUTE_TYPE = "int8"
+    WHISPER_BEAM_SIZE = 5
+    WHISPER_DOWNLOAD_ROOT = "./models"
+
+    # Wake word settings
+    WAKE_WORD_ENGINE = "local"  # "local" keyword spotter or "google"
+    WAKE_WORD_ALIASES = ["jarvis", "eva", "arjun"]
+    WAKE_WORD_SENSITIVITY = 0.5  # 0.0 (strict) - 1.0 (lenient)
+    WAKE_COMMAND_WAIT = 0.6  # seconds to wait for a command after the wake word
+    WAKE_WORD_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "wake_words")
+
+    # Conversation context sent to the LLM
+    CONTEXT_TOKEN_BUDGET = 3000  # history beyond this is folded into a rolling summary
+    CONTEXT_KEEP_MESSAGES = 6  # newest messages always sent verbatim
+    CONTEXT_SUMMARY_MODEL = None  # None: the assistant model
+    CONTEXT_SUMMARY_MAX_TOKENS = 200
+    RESPONSE_CACHE = False  # reuse chat replies for near-duplicate questions (opt-in)
+    RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "responses.json")
+    RESPONSE_CACHE_THRESHOLD = 0.85  # cosine similarity needed for a paraphrase to hit
+    RESPONSE_CACHE_TTL = 7 * 24 * 3600  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = 200
+    ROUTER_NATIVE_TOOLS = False  # provider tool calling with JSON Schemas; costs more prompt tokens, see benchmarks/tool_calling_benchmark.py
+
     SYSTEM_PROMPT="""
     You are Eva, a friendly Indian AI voice assistant.
 - Speak in a natural, conversational desi style — polite, warm, and approachable.
@@ -38,6 +141,16 @@ class Configs:
 - If you don’t know something, admit it honestly, and suggest a next step (“Maybe check once online?”).
 - Always sound supportive, practical, and down-to-earth.
     """
-    
-
 
+    @classmethod
+    def get_system_prompt(cls):
+        return f"""
+    You are {cls.ASSISTANT_NAME}, a friendly Indian AI voice assistant.
+- Speak in a natural, conversational desi style — polite, warm, and approachable.
+- Keep answers short and clear (1–3 sentences), like you're talking to a friend.
+- Use simple words and avoid over-technical explanations unless the user asks.
+- Add a touch of Indian flavor where it feels natural (e.g., "Arre", "Boss", "Yaar", "Namaste") but don't overdo it.
+- When sharing facts, explain them simply, as if you're helping someone over chai.
+- If you don't know something, admit it honestly, and suggest a next step ("Maybe check once online?").
+- Always sound supportive, practical, and down-to-earth.
+        """
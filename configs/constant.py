@@ -20,6 +20,9 @@ class Constants:
     DEFAULT_TTS_RATE = 150
     DEFAULT_TTS_VOLUME = 2.0
     TEMP_AUDIO_FILENAME = "temp_voice.mp3"
+    AUDIO_SAMPLE_RATE = 16000  # Hz, mono
+    AUDIO_SAMPLE_WIDTH = 2  # bytes (16-bit PCM)
+    AUDIO_FRAME_MS = 30
     
     # File Extensions
     AUDIO_FILE_EXTENSION = ".mp3"
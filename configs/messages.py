@@ -25,12 +25,19 @@ class InfoMessages:
     ASSISTANT_STARTING = "{assistant_name} is just a moment..."
     ASSISTANT_READY = "now online and ready to assist you. Just say {assistant_name} to activate me."
     LISTENING = "Yes, I'm listening"
+    FOLLOW_UP_CLOSED = "Okay, just call me if you need anything."
     WAITING_FOR_NETWORK = "Oh no! The Wi-Fi ghost stole our internet. Let's wait a bit..."
     GOODBYE_MESSAGE = "Goodbye! See you later."
     MICROPHONE_LISTENING = "👂 Eva listening..."
     USER_SAID = "🗣️ You said: {text}"
     HEARD_WAKE_WORD = "🗣️ Heard: {text}"
     
+class FillerMessages:
+    ONE_SECOND = "Ek second..."
+    LET_ME_CHECK = "Let me check."
+    HMM = "Hmm, one moment."
+    CHECKING = "Haan, dekhti hoon."
+
 class SuccessMessages:
     DATA_SAVED = "Your data has been saved successfully."
     EMAIL_SENT = "The email has been sent successfully."
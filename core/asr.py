@@ -0,0 +1,268 @@
+# asr.py
+"""
+Pluggable speech-to-text backends used by listen_voice().
+
+    google          - speech_recognition's recognize_google (network)
+    faster_whisper  - local faster-whisper model, loaded once per process
+
+The backend is chosen with Configs.ASR_BACKEND. Every transcription returns an
+ASRResult carrying latency and real-time factor so backends can be compared.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Type
+
+import numpy as np
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.audio_pipeline import SpeechSegment
+
+logger = logging.getLogger(__name__)
+
+
+class ASRRequestError(Exception):
+    """The backend could not be reached (network, quota, ...); worth retrying"""
+
+
+@dataclass
+class ASRResult:
+    text: str
+    backend: str
+    audio_duration: float  # seconds of speech transcribed
+    processing_time: float  # seconds spent in the final decode
+    language: Optional[str] = None
+
+    @property
+    def rtf(self) -> float:
+        """Real-time factor: processing time per second of audio"""
+        return self.processing_time / self.audio_duration if self.audio_duration else 0.0
+
+    @property
+    def latency(self) -> float:
+        """Time from end of speech until the final transcript was available"""
+        return self.processing_time
+
+
+class ASRBackend:
+    """Base class for speech-to-text engines"""
+
+    name = "base"
+    requires_network = False
+    supports_partials = False
+    accepts_language_hint = False  # forcing the language saves a detection pass
+
+    def warm_up(self):
+        """Load models or open connections ahead of the first utterance"""
+        pass
+
+    def transcribe(self, segment: SpeechSegment, language: Optional[str] = None) -> ASRResult:
+        started = time.perf_counter()
+        text, detected_language = self._transcribe(segment, language)
+        result = ASRResult(
+            text=text.strip(),
+            backend=self.name,
+            audio_duration=segment.duration,
+            processing_time=time.perf_counter() - started,
+            language=detected_language,
+        )
+        logger.info(
+            f"ASR [{self.name}] {result.audio_duration:.2f}s audio, "
+            f"latency {result.latency * 1000:.0f} ms, RTF {result.rtf:.2f}"
+        )
+        return result
+
+    def _transcribe(self, segment: SpeechSegment, language: Optional[str]):
+        """Return (text, language); empty text when nothing was understood"""
+        raise NotImplementedError
+
+    def partial(self, pcm: bytes, sample_rate: int, language: Optional[str] = None) -> str:
+        """Fast, lower-quality hypothesis for audio captured so far"""
+        return ""
+
+
+class GoogleASRBackend(ASRBackend):
+    name = "google"
+    requires_network = True
+
+    def __init__(self, recognizer=None):
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def _transcribe(self, segment: SpeechSegment, language: Optional[str]):
+        kwargs = {"language": language} if language else {}
+        try:
+            return self.recognizer.recognize_google(segment.to_audio_data(), **kwargs), language  # type: ignore
+        except self._sr.UnknownValueError:
+            return "", language
+        except self._sr.RequestError as e:
+            raise ASRRequestError(str(e)) from e
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    Local faster-whisper engine.
+
+    The WhisperModel is created on first use and shared by every instance in
+    the process, so the multi-second model load is paid once.
+    """
+
+    name = "faster_whisper"
+    supports_partials = True
+    accepts_language_hint = True
+
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self, model_size: str = Configs.WHISPER_MODEL_SIZE,
+                 device: str = Configs.WHISPER_DEVICE,
+                 compute_type: str = Configs.WHISPER_COMPUTE_TYPE,
+                 beam_size: int = Configs.WHISPER_BEAM_SIZE):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        # Decoding is not re-entrant; partial and final decodes take turns,
+        # and a waiting final decode makes a running partial give up early
+        self._decode_lock = threading.Lock()
+        self._final_pending = threading.Event()
+
+    @property
+    def model(self):
+        with FasterWhisperBackend._model_lock:
+            if FasterWhisperBackend._model is None:
+                from faster_whisper import WhisperModel
+                started = time.perf_counter()
+                FasterWhisperBackend._model = WhisperModel(
+                    self.model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    download_root=Configs.WHISPER_DOWNLOAD_ROOT,
+                )
+                logger.info(f"Loaded faster-whisper '{self.model_size}' in {time.perf_counter() - started:.1f}s")
+            return FasterWhisperBackend._model
+
+    def warm_up(self):
+        """Load the model ahead of the first utterance"""
+        self.model
+
+    @staticmethod
+    def _to_float(pcm: bytes) -> np.ndarray:
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def _decode(self, audio: np.ndarray, language: Optional[str], beam_size: int,
+                partial: bool = False):
+        with self._decode_lock:
+            if partial and self._final_pending.is_set():
+                return "", None
+            segments, info = self.model.transcribe(
+                audio,
+                beam_size=beam_size,
+                language=language,
+                vad_filter=False,  # the capture pipeline already gated the audio
+                without_timestamps=True,
+                condition_on_previous_text=False,
+            )
+            texts = []
+            # Segments are decoded lazily, so a partial can stop between them
+            for segment in segments:
+                if partial and self._final_pending.is_set():
+                    return "", None
+                texts.append(segment.text.strip())
+        return " ".join(texts), info.language
+
+    def _transcribe(self, segment: SpeechSegment, language: Optional[str]):
+        if segment.sample_rate != Constants.AUDIO_SAMPLE_RATE:
+            raise ValueError("faster-whisper expects 16 kHz audio")
+        self._final_pending.set()
+        try:
+            return self._decode(self._to_float(segment.pcm), language, self.beam_size)
+        finally:
+            self._final_pending.clear()
+
+    def partial(self, pcm: bytes, sample_rate: int, language: Optional[str] = None) -> str:
+        if sample_rate != Constants.AUDIO_SAMPLE_RATE:
+            return ""
+        text, _ = self._decode(self._to_float(pcm), language, beam_size=1, partial=True)
+        return text.strip()
+
+
+class PartialTranscriber:
+    """
+    Emits partial hypotheses while the user is still talking.
+
+    Called with the growing list of speech frames; every `interval` seconds of
+    new audio it decodes the utterance so far on a worker thread. If the
+    previous partial is still decoding the update is skipped, so capture is
+    never held up. Once the utterance has ended, stop() drops any further
+    partials so they don't compete with the final decode.
+    """
+
+    def __init__(self, backend: ASRBackend, on_partial: Callable[[str], None],
+                 sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS,
+                 interval: float = Configs.ASR_PARTIAL_INTERVAL,
+                 language: Optional[str] = None):
+        self.backend = backend
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.interval_frames = max(1, int(interval * 1000 / frame_ms))
+        self.language = language
+        self._last_frames = 0
+        self._last_text = ""
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def __call__(self, frames: List[bytes]):
+        if self._stopped.is_set():
+            return
+        if len(frames) - self._last_frames < self.interval_frames:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._last_frames = len(frames)
+        pcm = b"".join(frames)
+        self._worker = threading.Thread(target=self._run, args=(pcm,), daemon=True)
+        self._worker.start()
+
+    def _run(self, pcm: bytes):
+        try:
+            text = self.backend.partial(pcm, self.sample_rate, self.language)
+        except Exception as e:
+            logger.debug(f"Partial decode failed: {e}")
+            return
+        if self._stopped.is_set():
+            return  # the final transcript is on its way
+        if text and text != self._last_text:
+            self._last_text = text
+            self.on_partial(text)
+
+    def stop(self):
+        self._stopped.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+
+BACKENDS: Dict[str, Type[ASRBackend]] = {
+    GoogleASRBackend.name: GoogleASRBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+_backends: Dict[str, ASRBackend] = {}
+
+
+def get_backend(name: Optional[str] = None) -> ASRBackend:
+    """Return the process-wide instance of the named (or configured) backend"""
+    name = name or Configs.ASR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}'. Available: {', '.join(BACKENDS)}")
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
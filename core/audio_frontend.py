@@ -0,0 +1,291 @@
+# audio_frontend.py
+"""
+Vectorised DSP front-end for the capture stream.
+
+    resample -> noise floor estimate -> spectral subtraction -> AGC
+
+Every stage works on whole frames with NumPy, and AudioFrontEnd times each
+stage against a per-frame CPU budget (see benchmarks/frontend_benchmark.py).
+The front-end output is always 16 kHz mono in fixed AUDIO_FRAME_MS frames.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.audio_pipeline import FrameSource
+
+logger = logging.getLogger(__name__)
+
+
+class Resampler:
+    """
+    Streaming resampler to the target rate, with channel downmix.
+
+    Downsampling runs a windowed-sinc low-pass first to avoid aliasing, then
+    linear interpolation; filter and phase state carry across calls so
+    chunk boundaries are seamless.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 channels: int = 1, taps: int = 63):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.channels = channels
+        self.step = input_rate / output_rate
+        self.passthrough = input_rate == output_rate
+
+        if output_rate < input_rate:
+            cutoff = 0.45 * output_rate / input_rate
+            n = np.arange(taps) - (taps - 1) / 2
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+            self.kernel = (kernel / kernel.sum()).astype(np.float32)
+        else:
+            self.kernel = None
+        self._history = np.zeros(taps - 1 if self.kernel is not None else 0, dtype=np.float32)
+        self._position = 0.0  # next output position, relative to the first buffered sample
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if self.passthrough:
+            return samples
+
+        if self.kernel is not None:
+            padded = np.concatenate((self._history, samples))
+            self._history = padded[len(padded) - len(self._history):]
+            samples = np.convolve(padded, self.kernel, mode="valid").astype(np.float32)
+
+        buffer = np.concatenate((self._carry, samples))
+        if len(buffer) < 2:
+            self._carry = buffer
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self._position, len(buffer) - 1, self.step)
+        output = np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+
+        # Keep the last input sample for interpolation across the boundary
+        next_position = positions[-1] + self.step if len(positions) else self._position
+        keep_from = len(buffer) - 1
+        self._carry = buffer[keep_from:]
+        self._position = next_position - keep_from
+        return output
+
+
+class NoiseFloorEstimator:
+    """
+    Continuously updated per-bin noise power spectrum.
+
+    Bins fall towards the current power quickly and rise slowly, a cheap
+    approximation of minimum statistics that tracks changing room noise
+    without absorbing speech.
+    """
+
+    def __init__(self, bins: int, rise: float = 0.002, fall: float = 0.2):
+        self.noise = np.zeros(bins, dtype=np.float32)
+        self.rise = rise
+        self.fall = fall
+        self.initialized = False
+
+    def update(self, power: np.ndarray) -> np.ndarray:
+        if not self.initialized:
+            self.noise[:] = power
+            self.initialized = True
+            return self.noise
+        falling = power < self.noise
+        rate = np.where(falling, self.fall, self.rise)
+        self.noise += rate * (power - self.noise)
+        return self.noise
+
+    @property
+    def level_db(self) -> float:
+        return float(10 * np.log10(max(self.noise.mean(), 1e-12)))
+
+
+class SpectralSubtractor:
+    """
+    Spectral-subtraction noise suppression with 50% overlap-add.
+
+    Output lags the input by one frame (AUDIO_FRAME_MS).
+    """
+
+    def __init__(self, frame_samples: int, over_subtraction: float = Configs.FRONTEND_OVER_SUBTRACTION,
+                 gain_floor: float = 0.08, smoothing: float = 0.6):
+        self.frame_samples = frame_samples
+        self.window = np.sqrt(np.hanning(2 * frame_samples + 1)[:-1]).astype(np.float32)
+        self.over_subtraction = over_subtraction
+        self.gain_floor = gain_floor
+        self.smoothing = smoothing
+        self.noise = NoiseFloorEstimator(frame_samples + 1)
+        self._previous = np.zeros(frame_samples, dtype=np.float32)
+        self._overlap = np.zeros(frame_samples, dtype=np.float32)
+        self._gain = np.ones(frame_samples + 1, dtype=np.float32)
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        block = np.concatenate((self._previous, frame)) * self.window
+        self._previous = frame
+        spectrum = np.fft.rfft(block)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+
+        noise = self.noise.update(power)
+        gain = np.maximum(1.0 - self.over_subtraction * noise / np.maximum(power, 1e-9), self.gain_floor)
+        self._gain = self.smoothing * self._gain + (1 - self.smoothing) * gain
+
+        cleaned = np.fft.irfft(spectrum * self._gain, n=len(block)).astype(np.float32) * self.window
+        output = self._overlap + cleaned[:self.frame_samples]
+        self._overlap = cleaned[self.frame_samples:]
+        return output
+
+
+class AutomaticGainControl:
+    """Drives speech towards a target RMS level; gain is held during silence"""
+
+    def __init__(self, target_db: float = Configs.FRONTEND_AGC_TARGET_DB,
+                 max_gain_db: float = 30.0, gate_db: float = -50.0,
+                 attack: float = 0.3, release: float = 0.05):
+        self.target_db = target_db
+        self.max_gain_db = max_gain_db
+        self.gate_db = gate_db
+        self.attack = attack
+        self.release = release
+        self.gain_db = 0.0
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        rms = float(np.sqrt(np.mean(frame * frame))) if len(frame) else 0.0
+        level_db = 20 * np.log10(max(rms, 1e-3) / 32768.0)
+        if level_db > self.gate_db:
+            desired = min(self.target_db - level_db, self.max_gain_db)
+            # Turn down quickly, turn up slowly
+            rate = self.attack if desired < self.gain_db else self.release
+            self.gain_db += rate * (desired - self.gain_db)
+        return frame * (10 ** (self.gain_db / 20))
+
+
+@dataclass
+class StageStats:
+    budget_ms: float
+    frames: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    over_budget: int = 0
+    samples: List[float] = field(default_factory=list)
+
+    def record(self, elapsed_ms: float, keep_samples: bool):
+        self.frames += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if elapsed_ms > self.budget_ms:
+            self.over_budget += 1
+        if keep_samples:
+            self.samples.append(elapsed_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.frames if self.frames else 0.0
+
+
+class AudioFrontEnd:
+    """
+    Resampling, noise suppression and AGC on the capture stream.
+
+    Accepts chunks of any size at the device rate and returns a list of
+    fixed-size 16 kHz mono int16 frames (possibly empty).
+    """
+
+    def __init__(self, input_rate: int, channels: int = 1,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS,
+                 noise_suppression: bool = Configs.FRONTEND_NOISE_SUPPRESSION,
+                 agc: bool = Configs.FRONTEND_AGC,
+                 keep_timings: bool = False):
+        self.output_rate = Constants.AUDIO_SAMPLE_RATE
+        self.frame_samples = int(self.output_rate * frame_ms / 1000)
+        self.resampler = Resampler(input_rate, self.output_rate, channels)
+        self.suppressor = SpectralSubtractor(self.frame_samples) if noise_suppression else None
+        self.agc = AutomaticGainControl() if agc else None
+        self.keep_timings = keep_timings
+        self.low_power = False  # only resample; set by the idle monitor
+        self.stats: Dict[str, StageStats] = {
+            name: StageStats(budget)
+            for name, budget in Configs.FRONTEND_STAGE_BUDGET_MS.items()
+        }
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def _timed(self, stage: str, func, data):
+        started = time.perf_counter()
+        result = func(data)
+        self.stats[stage].record((time.perf_counter() - started) * 1000, self.keep_timings)
+        return result
+
+    def process(self, chunk) -> List[np.ndarray]:
+        samples = np.frombuffer(chunk, dtype=np.int16) if not isinstance(chunk, np.ndarray) else chunk
+        resampled = self._timed("resample", self.resampler.process, samples)
+        self._pending = np.concatenate((self._pending, resampled))
+
+        frames = []
+        while len(self._pending) >= self.frame_samples:
+            frame = self._pending[:self.frame_samples]
+            self._pending = self._pending[self.frame_samples:]
+            if self.low_power:
+                frames.append(np.clip(frame, -32768, 32767).astype(np.int16))
+                continue
+            if self.suppressor is not None:
+                frame = self._timed("noise_suppression", self.suppressor.process, frame)
+            if self.agc is not None:
+                frame = self._timed("agc", self.agc.process, frame)
+            frames.append(np.clip(frame, -32768, 32767).astype(np.int16))
+        return frames
+
+    @property
+    def noise_floor_db(self) -> Optional[float]:
+        return self.suppressor.noise.level_db if self.suppressor else None
+
+    def report(self) -> str:
+        lines = []
+        for name, stat in self.stats.items():
+            if stat.frames:
+                lines.append(
+                    f"{name:<18} mean {stat.mean_ms:.3f} ms, max {stat.max_ms:.3f} ms, "
+                    f"budget {stat.budget_ms:.2f} ms, over budget {stat.over_budget}/{stat.frames}"
+                )
+        return "\n".join(lines)
+
+
+class FrontEndFrameSource(FrameSource):
+    """Wraps a raw source (any rate) and yields cleaned 16 kHz frames"""
+
+    def __init__(self, source: FrameSource, channels: int = 1, **frontend_kwargs):
+        super().__init__(Constants.AUDIO_SAMPLE_RATE, source.frame_ms)
+        self.source = source
+        self.channels = channels
+        self.frontend_kwargs = frontend_kwargs
+        self.frontend: Optional[AudioFrontEnd] = None
+        self._ready: List[np.ndarray] = []
+
+    def open(self):
+        self.source.open()
+        # Build after opening: the device rate is only known now
+        self.frontend = AudioFrontEnd(self.source.sample_rate, self.channels,
+                                      self.frame_ms, **self.frontend_kwargs)
+
+    def close(self):
+        self.source.close()
+
+    def set_low_power(self, enabled: bool):
+        if self.frontend is not None:
+            self.frontend.low_power = enabled
+
+    def read_frame(self) -> Optional[bytes]:
+        if self.frontend is None:
+            self.open()
+        while not self._ready:
+            chunk = self.source.read_frame()
+            if chunk is None:
+                return None
+            self._ready.extend(self.frontend.process(chunk))
+        return self._ready.pop(0).tobytes()
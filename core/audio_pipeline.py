@@ -0,0 +1,321 @@
+# audio_pipeline.py
+"""
+Streaming, VAD-gated audio capture.
+
+Audio is read in fixed-size frames from a frame source (live microphone or a
+WAV file), every frame is classified by a voice-activity detector, and only
+speech segments (plus a short pre-roll) are passed on to the ASR backend.
+"""
+
+import collections
+import logging
+import time
+import wave
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, List, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from configs.constant import Constants
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeechSegment:
+    """A contiguous chunk of speech as 16-bit mono PCM"""
+    pcm: bytes
+    sample_rate: int
+    sample_width: int
+    start_time: float  # seconds since the source was opened
+    end_time: float
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / float(self.sample_rate * self.sample_width)
+
+    def to_samples(self) -> np.ndarray:
+        return np.frombuffer(self.pcm, dtype=np.int16)
+
+    def to_audio_data(self):
+        """Wrap the segment for speech_recognition's recognizers"""
+        import speech_recognition as sr
+        return sr.AudioData(self.pcm, self.sample_rate, self.sample_width)
+
+
+class FrameSource:
+    """Base class for anything that yields fixed-size 16-bit mono PCM frames"""
+
+    def __init__(self, sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.sample_width = Constants.AUDIO_SAMPLE_WIDTH
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * self.sample_width
+
+    def read_frame(self) -> Optional[bytes]:
+        """Return the next frame, or None when the source is exhausted"""
+        raise NotImplementedError
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+
+class MicrophoneFrameSource(FrameSource):
+    """Reads frames from a speech_recognition Microphone stream"""
+
+    def __init__(self, microphone=None, sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS):
+        super().__init__(sample_rate, frame_ms)
+        if microphone is None:
+            import speech_recognition as sr
+            microphone = sr.Microphone(sample_rate=sample_rate, chunk_size=self.frame_samples)
+        self.microphone = microphone
+        self._source = None
+
+    def open(self):
+        self._source = self.microphone.__enter__()
+        # The device may not honour the requested rate
+        self.sample_rate = self._source.SAMPLE_RATE
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * self.sample_width
+
+    def close(self):
+        if self._source is not None:
+            self.microphone.__exit__(None, None, None)
+            self._source = None
+
+    def read_frame(self) -> Optional[bytes]:
+        if self._source is None:
+            self.open()
+        return self._source.stream.read(self.frame_samples)
+
+
+class WavFrameSource(FrameSource):
+    """Reads frames from a WAV file so the pipeline can run without a microphone"""
+
+    def __init__(self, path: str, frame_ms: int = Constants.AUDIO_FRAME_MS, realtime: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self._wav: Optional[wave.Wave_read] = None
+        with wave.open(path, "rb") as wav:
+            sample_rate = wav.getframerate()
+        super().__init__(sample_rate, frame_ms)
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getsampwidth() != Constants.AUDIO_SAMPLE_WIDTH:
+            raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported")
+        self._channels = self._wav.getnchannels()
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def read_frame(self) -> Optional[bytes]:
+        if self._wav is None:
+            self.open()
+        raw = self._wav.readframes(self.frame_samples)
+        if not raw:
+            return None
+        samples = np.frombuffer(raw, dtype=np.int16)
+        if self._channels > 1:
+            samples = samples.reshape(-1, self._channels).mean(axis=1).astype(np.int16)
+        if len(samples) < self.frame_samples:
+            samples = np.pad(samples, (0, self.frame_samples - len(samples)))
+        if self.realtime:
+            time.sleep(self.frame_ms / 1000)
+        return samples.tobytes()
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector.
+
+    A frame counts as speech when its RMS level is VAD_THRESHOLD_DB above a
+    running noise-floor estimate. The floor follows quiet frames quickly and
+    loud frames slowly, so it adapts to the room without learning the voice.
+    Without a `noise_floor_db` to start from, the first frame seeds the floor.
+    """
+
+    def __init__(self, threshold_db: float = Configs.VAD_THRESHOLD_DB,
+                 min_level_db: float = -55.0, noise_floor_db: Optional[float] = None):
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.noise_floor_db = noise_floor_db
+
+    @staticmethod
+    def frame_level_db(frame: bytes) -> float:
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples)) if len(samples) else 0.0
+        return 20.0 * np.log10(max(rms, 1.0) / 32768.0)
+
+    def is_speech(self, frame: bytes) -> bool:
+        level = self.frame_level_db(frame)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level
+
+        speech = level > max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+
+        # Track the floor: fast down, slow up, frozen while speech is present
+        if level < self.noise_floor_db:
+            self.noise_floor_db = 0.7 * self.noise_floor_db + 0.3 * level
+        elif not speech:
+            self.noise_floor_db = 0.98 * self.noise_floor_db + 0.02 * level
+        return speech
+
+    def reset(self):
+        self.noise_floor_db = None
+
+
+class SpeechSegmenter:
+    """
+    Turns a stream of frames into speech segments.
+
+    Frames are buffered in a pre-roll ring until VAD_START_FRAMES consecutive
+    speech frames are seen; the segment then stays open until VAD_HANGOVER_MS
+    of silence, or until max_duration is reached.
+    """
+
+    def __init__(self, frame_ms: int = Constants.AUDIO_FRAME_MS,
+                 vad: Optional[EnergyVAD] = None,
+                 pre_roll_ms: int = Configs.VAD_PRE_ROLL_MS,
+                 hangover_ms: int = Configs.VAD_HANGOVER_MS,
+                 start_frames: int = Configs.VAD_START_FRAMES):
+        self.frame_ms = frame_ms
+        self.vad = vad or EnergyVAD()
+        self.start_frames = max(1, start_frames)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.pre_roll: Deque[bytes] = collections.deque(
+            maxlen=max(self.start_frames, pre_roll_ms // frame_ms)
+        )
+        self.reset()
+
+    def reset(self):
+        self.pre_roll.clear()
+        self.frames: list = []
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.frame_index = 0
+        self.segment_start = 0
+
+    def process(self, frame: bytes) -> Optional[str]:
+        """
+        Feed one frame. Returns "start" when a segment opens, "end" when it
+        closes, otherwise None.
+        """
+        self.frame_index += 1
+        speech = self.vad.is_speech(frame)
+
+        if not self.in_speech:
+            self.pre_roll.append(frame)
+            self.speech_run = self.speech_run + 1 if speech else 0
+            if self.speech_run >= self.start_frames:
+                self.in_speech = True
+                self.silence_run = 0
+                self.frames = list(self.pre_roll)
+                self.segment_start = self.frame_index - len(self.frames)
+                self.pre_roll.clear()
+                return "start"
+            return None
+
+        self.frames.append(frame)
+        self.silence_run = 0 if speech else self.silence_run + 1
+        if self.silence_run >= self.hangover_frames:
+            return "end"
+        return None
+
+    def pop_segment(self, sample_rate: int) -> SpeechSegment:
+        """Return the open segment (trailing silence trimmed) and reset"""
+        keep = len(self.frames) - max(0, self.silence_run - 2)
+        pcm = b"".join(self.frames[:keep])
+        start = self.segment_start * self.frame_ms / 1000
+        segment = SpeechSegment(
+            pcm=pcm,
+            sample_rate=sample_rate,
+            sample_width=Constants.AUDIO_SAMPLE_WIDTH,
+            start_time=start,
+            end_time=start + keep * self.frame_ms / 1000,
+        )
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.frames = []
+        return segment
+
+    @property
+    def elapsed(self) -> float:
+        return self.frame_index * self.frame_ms / 1000
+
+
+def iter_speech_segments(source: FrameSource,
+                         segmenter: Optional[SpeechSegmenter] = None,
+                         max_duration: Optional[float] = Configs.PHRASE_TIME_LIMIT) -> Iterator[SpeechSegment]:
+    """Yield every speech segment found in the source"""
+    segmenter = segmenter or SpeechSegmenter(frame_ms=source.frame_ms)
+    for frame in source:
+        event = segmenter.process(frame)
+        if event == "end" or (
+            segmenter.in_speech and max_duration
+            and len(segmenter.frames) * source.frame_ms / 1000 >= max_duration
+        ):
+            yield segmenter.pop_segment(source.sample_rate)
+
+    if segmenter.in_speech and segmenter.frames:
+        yield segmenter.pop_segment(source.sample_rate)
+
+
+def capture_segment(source: FrameSource,
+                    timeout: Optional[float] = Configs.LISTEN_TIMEOUT,
+                    max_duration: Optional[float] = Configs.PHRASE_TIME_LIMIT,
+                    segmenter: Optional[SpeechSegmenter] = None,
+                    on_speech: Optional[Callable[[List[bytes]], None]] = None) -> Optional[SpeechSegment]:
+    """
+    Capture a single utterance from the source.
+
+    `on_speech` is called with the frames captured so far after every frame
+    while speech is in progress, e.g. to produce partial transcripts.
+    Returns None if no speech starts within `timeout` seconds or the source
+    runs dry before any speech is heard.
+    """
+    segmenter = segmenter or SpeechSegmenter(frame_ms=source.frame_ms)
+    for frame in source:
+        event = segmenter.process(frame)
+        if not segmenter.in_speech:
+            if timeout is not None and segmenter.elapsed >= timeout:
+                return None
+            continue
+
+        if event == "end":
+            break
+        if on_speech is not None:
+            on_speech(segmenter.frames)
+        if max_duration and len(segmenter.frames) * source.frame_ms / 1000 >= max_duration:
+            break
+
+    if not segmenter.in_speech or not segmenter.frames:
+        return None
+    segment = segmenter.pop_segment(source.sample_rate)
+    logger.debug(f"Captured {segment.duration:.2f}s speech segment")
+    return segment
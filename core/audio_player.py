@@ -0,0 +1,59 @@
+# audio_player.py
+"""
+Playback of rendered speech (cached clips, gTTS MP3s) through pygame's mixer.
+
+The mixer is initialised once and stays up. Clips are decoded straight from
+memory, and waiting for the end of a clip blocks on an event (with the clip
+length as timeout) instead of polling get_busy(). pygame is optional;
+callers fall back to live synthesis when it is missing.
+"""
+
+import io
+import logging
+import threading
+from typing import Callable, Optional
+
+try:
+    import pygame
+except ImportError:  # optional dependency
+    pygame = None
+
+logger = logging.getLogger(__name__)
+
+_mixer_lock = threading.Lock()
+
+
+def available() -> bool:
+    return pygame is not None
+
+
+def ensure_mixer():
+    with _mixer_lock:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+
+
+def play_buffer(data: bytes, stop_event: Optional[threading.Event] = None,
+                on_start: Optional[Callable[[], None]] = None) -> bool:
+    """Play encoded audio (MP3/WAV/OGG bytes) and block until it ends; False if stopped early"""
+    ensure_mixer()
+    sound = pygame.mixer.Sound(file=io.BytesIO(data))
+    channel = sound.play()
+    if on_start is not None:
+        on_start()
+    stop_event = stop_event or threading.Event()
+    remaining = sound.get_length()
+    while True:
+        if stop_event.wait(remaining):
+            channel.stop()
+            return False
+        if not channel.get_busy():
+            return True
+        # Mixer latency can leave a few ms of tail after the nominal length
+        remaining = 0.02
+
+
+def play_file(path: str, stop_event: Optional[threading.Event] = None,
+              on_start: Optional[Callable[[], None]] = None) -> bool:
+    with open(path, "rb") as f:
+        return play_buffer(f.read(), stop_event, on_start)
@@ -0,0 +1,282 @@
+# audio_ring_buffer.py
+"""
+Shared audio capture with a single writer and many readers.
+
+One AudioCaptureThread owns the microphone and writes PCM frames into a
+preallocated NumPy ring. Consumers (wake word, ASR, session recorder, level
+meters) each hold a RingSubscriber with their own read cursor and receive
+memoryview slices of the ring, so no audio is copied on the read path.
+
+Frames are always written whole and the ring holds an exact number of
+frames, so a frame never straddles the wrap point and every read is a single
+contiguous view. A view stays valid until the writer laps it, i.e. for
+roughly the ring's capacity in seconds.
+"""
+
+import logging
+import threading
+import wave
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.audio_pipeline import EnergyVAD, FrameSource
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """Preallocated ring of fixed-size 16-bit PCM frames"""
+
+    def __init__(self, capacity_seconds: float = Configs.RING_BUFFER_SECONDS,
+                 sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * Constants.AUDIO_SAMPLE_WIDTH
+        self.capacity_frames = max(2, int(capacity_seconds * 1000 / frame_ms))
+
+        self.buffer = np.zeros(self.capacity_frames * self.frame_samples, dtype=np.int16)
+        self._bytes = memoryview(self.buffer).cast("B")
+        self.frames_written = 0  # monotonic frame counter
+        self.closed = False
+        self._cond = threading.Condition()
+        self._subscribers: Dict[str, "RingSubscriber"] = {}
+
+    def write(self, frame) -> int:
+        """Append one frame (bytes or int16 array); returns its frame index"""
+        samples = np.frombuffer(frame, dtype=np.int16) if not isinstance(frame, np.ndarray) else frame
+        if len(samples) != self.frame_samples:
+            raise ValueError(f"Expected {self.frame_samples} samples per frame, got {len(samples)}")
+        slot = self.frames_written % self.capacity_frames
+        start = slot * self.frame_samples
+        self.buffer[start:start + self.frame_samples] = samples
+        with self._cond:
+            index = self.frames_written
+            self.frames_written += 1
+            self._cond.notify_all()
+        return index
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    @property
+    def oldest_frame(self) -> int:
+        return max(0, self.frames_written - self.capacity_frames)
+
+    def frame_view(self, index: int) -> memoryview:
+        """Zero-copy view of frame `index` (must still be inside the ring)"""
+        start = (index % self.capacity_frames) * self.frame_bytes
+        return self._bytes[start:start + self.frame_bytes]
+
+    def recent(self, ms: float) -> List[memoryview]:
+        """Views of the most recent `ms` of audio: one piece, or two around the wrap"""
+        count = min(int(ms / self.frame_ms), self.frames_written - self.oldest_frame)
+        if count <= 0:
+            return []
+        first = self.frames_written - count
+        start_slot = first % self.capacity_frames
+        end_slot = start_slot + count
+        if end_slot <= self.capacity_frames:
+            return [self._bytes[start_slot * self.frame_bytes:end_slot * self.frame_bytes]]
+        wrapped = end_slot - self.capacity_frames
+        return [
+            self._bytes[start_slot * self.frame_bytes:],
+            self._bytes[:wrapped * self.frame_bytes],
+        ]
+
+    def wait_for(self, index: int, timeout: Optional[float] = None) -> bool:
+        """Block until frame `index` has been written"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.frames_written > index or self.closed, timeout)
+
+    def subscribe(self, name: str, from_start: bool = False) -> "RingSubscriber":
+        """Register a reader; it starts at live audio unless `from_start` is set"""
+        subscriber = RingSubscriber(self, name, self.oldest_frame if from_start else self.frames_written)
+        self._subscribers[name] = subscriber
+        return subscriber
+
+    def unsubscribe(self, name: str):
+        self._subscribers.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"lag_frames": sub.lag, "overruns": sub.overruns, "dropped_frames": sub.dropped_frames}
+            for name, sub in self._subscribers.items()
+        }
+
+
+class RingSubscriber:
+    """One consumer's cursor into an AudioRingBuffer"""
+
+    def __init__(self, ring: AudioRingBuffer, name: str, cursor: int):
+        self.ring = ring
+        self.name = name
+        self.cursor = cursor
+        self.overruns = 0
+        self.dropped_frames = 0
+
+    @property
+    def lag(self) -> int:
+        return self.ring.frames_written - self.cursor
+
+    def _check_overrun(self):
+        oldest = self.ring.oldest_frame
+        if self.cursor < oldest:
+            self.overruns += 1
+            self.dropped_frames += oldest - self.cursor
+            logger.warning(f"Audio subscriber '{self.name}' overran the ring, "
+                           f"skipped {oldest - self.cursor} frames")
+            self.cursor = oldest
+
+    def read(self, timeout: Optional[float] = None) -> Optional[memoryview]:
+        """Next frame as a view, or None on timeout/close"""
+        if not self.ring.wait_for(self.cursor, timeout):
+            return None
+        if self.cursor >= self.ring.frames_written:
+            return None  # ring closed
+        self._check_overrun()
+        view = self.ring.frame_view(self.cursor)
+        self.cursor += 1
+        return view
+
+    def read_available(self) -> List[memoryview]:
+        """All frames written since the last read, without blocking"""
+        self._check_overrun()
+        end = self.ring.frames_written
+        views = [self.ring.frame_view(i) for i in range(self.cursor, end)]
+        self.cursor = end
+        return views
+
+    def rewind(self, ms: float) -> float:
+        """Move the cursor back `ms` (bounded by the ring); returns ms actually rewound"""
+        frames = min(int(ms / self.ring.frame_ms), self.cursor - self.ring.oldest_frame)
+        self.cursor -= max(0, frames)
+        return max(0, frames) * self.ring.frame_ms
+
+    def seek_live(self):
+        self.cursor = self.ring.frames_written
+
+
+class AudioCaptureThread(threading.Thread):
+    """Owns the capture device and feeds every frame into the ring"""
+
+    def __init__(self, source: FrameSource, ring: Optional[AudioRingBuffer] = None):
+        super().__init__(name="audio-capture", daemon=True)
+        self.source = source
+        # Open before sizing the ring: the device may not honour the requested rate
+        self.source.open()
+        self.ring = ring or AudioRingBuffer(sample_rate=source.sample_rate, frame_ms=source.frame_ms)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                frame = self.source.read_frame()
+                if frame is None:
+                    break
+                self.ring.write(frame)
+        except Exception as e:
+            logger.error(f"Audio capture stopped: {e}")
+        finally:
+            self.source.close()
+            self.ring.close()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop_event.set()
+        self.join(timeout)
+
+    def set_low_power(self, enabled: bool):
+        """Ask the source to skip optional processing (e.g. the DSP front-end)"""
+        if hasattr(self.source, "set_low_power"):
+            self.source.set_low_power(enabled)
+
+
+class RingFrameSource(FrameSource):
+    """
+    FrameSource view of a ring subscriber, so the VAD pipeline, wake-word
+    spotter and ASR can read the shared capture unchanged.
+    """
+
+    def __init__(self, ring: AudioRingBuffer, name: str, read_timeout: float = 1.0):
+        super().__init__(ring.sample_rate, ring.frame_ms)
+        self.ring = ring
+        self.subscriber = ring.subscribe(name)
+        self.read_timeout = read_timeout
+
+    def open(self):
+        # Each capture starts at live audio; call rewind() afterwards to
+        # include what was said just before
+        self.subscriber.seek_live()
+
+    def read_frame(self) -> Optional[memoryview]:
+        # A live capture delivers a frame every few ms; a silent gap of
+        # read_timeout means the device stalled, so end the stream
+        return self.subscriber.read(self.read_timeout)
+
+    def rewind(self, ms: float) -> float:
+        return self.subscriber.rewind(ms)
+
+
+class LevelMeter:
+    """Tracks the current and peak input level in dBFS"""
+
+    def __init__(self, ring: AudioRingBuffer, name: str = "level-meter"):
+        self.subscriber = ring.subscribe(name)
+        self.level_db = -96.0
+        self.peak_db = -96.0
+
+    def update(self) -> float:
+        for frame in self.subscriber.read_available():
+            self.level_db = EnergyVAD.frame_level_db(frame)
+            self.peak_db = max(self.level_db, self.peak_db - 0.5)
+        return self.level_db
+
+
+class SessionRecorder(threading.Thread):
+    """Writes everything the microphone hears to a WAV file"""
+
+    def __init__(self, ring: AudioRingBuffer, path: str, name: str = "session-recorder"):
+        super().__init__(name=name, daemon=True)
+        self.ring = ring
+        self.path = path
+        self.subscriber = ring.subscribe(name)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        with wave.open(self.path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(Constants.AUDIO_SAMPLE_WIDTH)
+            wav.setframerate(self.ring.sample_rate)
+            while not self._stop_event.is_set():
+                frame = self.subscriber.read(timeout=0.5)
+                if frame is not None:
+                    wav.writeframesraw(frame)
+                elif self.ring.closed:
+                    break
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+_capture: Optional[AudioCaptureThread] = None
+_capture_lock = threading.Lock()
+
+
+def get_shared_capture(source_factory=None) -> AudioCaptureThread:
+    """Start (once) and return the process-wide capture thread"""
+    global _capture
+    with _capture_lock:
+        if _capture is None or not _capture.is_alive():
+            if source_factory is None:
+                from core.audio_pipeline import MicrophoneFrameSource
+                source_factory = MicrophoneFrameSource
+            _capture = AudioCaptureThread(source_factory())
+            _capture.start()
+        return _capture
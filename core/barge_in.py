@@ -0,0 +1,175 @@
+# barge_in.py
+"""
+Full-duplex barge-in: let the user interrupt the assistant mid-sentence.
+
+While a reply is playing, a BargeInMonitor keeps reading the shared capture
+ring. An EchoGate discounts the assistant's own voice leaking back into the
+microphone; once real user speech persists for BARGE_IN_MIN_SPEECH_MS the
+playback is stopped and the new utterance (from its onset) is captured so it
+can go straight into routing. The gate only starts judging (and learning the
+echo level) once the first audio is actually heard - a streamed reply can
+spend a while waiting on the LLM, and room silence is no echo estimate.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from core.audio_pipeline import EnergyVAD, SpeechSegment, capture_segment
+from core.audio_ring_buffer import AudioRingBuffer, RingFrameSource
+from core.cancellation import CancelToken
+
+logger = logging.getLogger(__name__)
+
+
+class EchoGate:
+    """
+    Decides whether a microphone frame during playback is the user talking.
+
+    The echo level is learned from the first `learn_ms` of playback and then
+    tracked from frames judged not to be speech; the user must be
+    BARGE_IN_MARGIN_DB louder than it. Call start_playback() when audio starts.
+    """
+
+    def __init__(self, margin_db: float = Configs.BARGE_IN_MARGIN_DB,
+                 frame_ms: int = 30, learn_ms: int = 300, min_level_db: float = -50.0):
+        self.margin_db = margin_db
+        self.learn_frames = max(1, learn_ms // frame_ms)
+        self.min_level_db = min_level_db
+        self.start_playback()
+
+    def start_playback(self):
+        self.frames = 0
+        self.echo_level_db: Optional[float] = None
+
+    def is_user_speech(self, frame) -> bool:
+        level = EnergyVAD.frame_level_db(frame)
+        self.frames += 1
+
+        if self.frames <= self.learn_frames or self.echo_level_db is None:
+            self.echo_level_db = level if self.echo_level_db is None else max(self.echo_level_db, level)
+            return False
+        speech = level > max(self.echo_level_db + self.margin_db, self.min_level_db)
+        if not speech:
+            self.echo_level_db = 0.9 * self.echo_level_db + 0.1 * level
+        return speech
+
+
+@dataclass
+class BargeInResult:
+    interrupted: bool
+    segment: Optional[SpeechSegment] = None
+    stop_latency: Optional[float] = None  # speech onset -> playback stopped, seconds
+
+
+class BargeInStats:
+    """Stop latency measurements across the session"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.playbacks = 0
+
+    def record(self, result: BargeInResult):
+        self.playbacks += 1
+        if result.interrupted and result.stop_latency is not None:
+            self.latencies.append(result.stop_latency)
+            logger.info(
+                f"Barge-in: playback stopped {result.stop_latency * 1000:.0f} ms after speech onset "
+                f"(p95 {self.p95 * 1000:.0f} ms over {len(self.latencies)} interruptions)"
+            )
+
+    @property
+    def p95(self) -> float:
+        return float(np.percentile(self.latencies, 95)) if self.latencies else 0.0
+
+    @property
+    def interruption_rate(self) -> float:
+        return len(self.latencies) / self.playbacks if self.playbacks else 0.0
+
+
+stats = BargeInStats()
+
+
+class BargeInMonitor:
+    """Watches the microphone during playback and stops it when the user talks"""
+
+    def __init__(self, ring: AudioRingBuffer, stop_playback: Callable[[], None],
+                 gate: Optional[EchoGate] = None,
+                 min_speech_ms: int = Configs.BARGE_IN_MIN_SPEECH_MS):
+        self.source = RingFrameSource(ring, "barge-in", read_timeout=0.1)
+        self.stop_playback = stop_playback
+        self.gate = gate or EchoGate(frame_ms=ring.frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // ring.frame_ms)
+
+    def watch(self, playback_done: threading.Event,
+              audio_started: Optional[threading.Event] = None) -> BargeInResult:
+        """
+        Listen until `playback_done`. With `audio_started`, frames before the
+        first audio is heard are skipped and the echo is learned from there.
+        """
+        self.source.open()
+        self.gate.start_playback()
+        learning = audio_started is not None
+        speech_run = 0
+        while not playback_done.is_set():
+            frame = self.source.subscriber.read(timeout=0.1)
+            if frame is None:
+                continue
+            if learning:
+                if not audio_started.is_set():
+                    continue
+                self.gate.start_playback()
+                learning = False
+            speech_run = speech_run + 1 if self.gate.is_user_speech(frame) else 0
+            if speech_run < self.min_speech_frames:
+                continue
+
+            # Speech began `speech_run` frames ago
+            onset = time.perf_counter() - speech_run * self.source.frame_ms / 1000
+            self.stop_playback()
+            playback_done.wait(Configs.BARGE_IN_STOP_TIMEOUT)
+            stop_latency = time.perf_counter() - onset
+
+            self.source.rewind(speech_run * self.source.frame_ms + Configs.VAD_PRE_ROLL_MS)
+            segment = capture_segment(self.source, timeout=1.0)
+            return BargeInResult(True, segment, stop_latency)
+        return BargeInResult(False)
+
+
+def speak_with_barge_in(speak: Callable[..., None], text: str, ring: AudioRingBuffer,
+                        stop_event: Optional[threading.Event] = None) -> BargeInResult:
+    """
+    Play `text` with `speak(text, stop_event=..., on_audio=...)` while listening
+    for the user; `speak` calls `on_audio` when the first audio is heard.
+    Pass the turn's CancelToken as `stop_event` to have an interruption cancel
+    the whole turn rather than just the playback.
+
+    Returns the interrupting utterance, if any, once playback has ended.
+    """
+    stop_event = stop_event if stop_event is not None else threading.Event()
+    done = threading.Event()
+    audio_started = threading.Event()
+
+    def play():
+        try:
+            speak(text, stop_event=stop_event, on_audio=audio_started.set)
+        except Exception as e:
+            logger.error(f"Playback failed: {e}")
+        finally:
+            done.set()
+
+    player = threading.Thread(target=play, name="tts-playback", daemon=True)
+    player.start()
+    if isinstance(stop_event, CancelToken):
+        stop = lambda: stop_event.cancel("barge-in")
+    else:
+        stop = stop_event.set
+    result = BargeInMonitor(ring, stop).watch(done, audio_started)
+    player.join()
+    stats.record(result)
+    return result
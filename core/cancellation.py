@@ -0,0 +1,119 @@
+# cancellation.py
+"""
+Cancellation tokens for assistant turns.
+
+Every LLM request, TTS job and tool call of a turn shares one CancelToken.
+Cancelling it (a barge-in, a "stop", or cancel_turn() from anywhere) runs
+the callbacks its holders registered - the model chain closes its HTTP
+streams, the speaker drops its queued segments - and anything polling it
+stops at its next check. The token is a threading.Event, so it can be passed
+wherever a `stop_event` is accepted; setting it cancels the turn.
+
+Cancellation latency - cancel() until the turn's work has actually stopped
+(streams closed, playback ended) - is logged per cancellation.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TurnCancelled(Exception):
+    """The turn this work belonged to was cancelled"""
+
+
+class CancellationStats:
+    """Cancel -> stopped latencies across the session"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+
+    def record(self, latency: float, reason: str):
+        self.latencies.append(latency)
+        ordered = sorted(self.latencies)
+        logger.info(
+            f"Turn cancelled ({reason or 'no reason'}): stopped after {latency * 1000:.0f} ms "
+            f"(p95 {ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000:.0f} ms "
+            f"over {len(ordered)} cancellations)"
+        )
+
+    def report(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "cancellations": len(ordered),
+            "p50_ms": round(1000 * ordered[len(ordered) // 2]) if ordered else None,
+            "max_ms": round(1000 * ordered[-1]) if ordered else None,
+        }
+
+
+stats = CancellationStats()
+
+
+class CancelToken(threading.Event):
+    """Cancels the work of one turn; set() is cancel()"""
+
+    def __init__(self, name: str = "turn"):
+        super().__init__()
+        self.name = name
+        self.reason = ""
+        self.cancelled_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = ""):
+        with self._lock:
+            if self.is_set():
+                return
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        logger.info(f"Cancelling {self.name}{f': {reason}' if reason else ''}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def set(self):
+        self.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.is_set()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call `callback` on cancel (right away if already cancelled); returns it for remove()"""
+        with self._lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return callback
+        callback()
+        return callback
+
+    def remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """Raise TurnCancelled if the turn has been cancelled"""
+        if self.is_set():
+            raise TurnCancelled(self.reason or self.name)
+
+    def stopped(self) -> Optional[float]:
+        """
+        The cancelled turn's work has stopped; records and returns the
+        cancellation latency (once per token, None if it wasn't cancelled)
+        """
+        with self._lock:
+            if self.cancelled_at is None or self.stopped_at is not None:
+                return None
+            self.stopped_at = time.perf_counter()
+        latency = self.stopped_at - self.cancelled_at
+        stats.record(latency, self.reason)
+        return latency
@@ -0,0 +1,273 @@
+# capture_process.py
+"""
+Audio capture in a dedicated worker process.
+
+The worker owns the microphone (and the DSP front-end) and writes frames into
+a ring that lives in multiprocessing.shared_memory. The main process maps the
+same memory as a SharedMemoryRingBuffer, so existing subscribers and
+RingFrameSource read frames as memoryviews - no copies, no pickling - and
+capture keeps its own GIL, unaffected by LLM calls, JSON parsing or TTS.
+
+A supervisor thread restarts the worker if it exits or stops heart-beating.
+Enable with Configs.CAPTURE_PROCESS.
+"""
+
+import logging
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.audio_ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Header slots (int64) at the start of the shared block
+_FRAMES_WRITTEN = 0
+_FRAMES_DROPPED = 1
+_HEARTBEAT_NS = 2
+_STATE = 3
+_LOW_POWER = 4
+_HEADER_SLOTS = 8
+
+_STATE_STARTING = 0
+_STATE_RUNNING = 1
+_STATE_STOPPED = 2
+_STATE_FAILED = 3
+
+
+def _layout(shm: shared_memory.SharedMemory, capacity_frames: int, frame_samples: int):
+    header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+    data = np.ndarray((capacity_frames * frame_samples,), dtype=np.int16,
+                      buffer=shm.buf, offset=_HEADER_SLOTS * 8)
+    return header, data
+
+
+def default_source():
+    """Microphone (+ front-end) opened inside the worker process"""
+    from core.audio_pipeline import MicrophoneFrameSource
+    source = MicrophoneFrameSource()
+    if Configs.AUDIO_FRONTEND:
+        from core.audio_frontend import FrontEndFrameSource
+        source = FrontEndFrameSource(source)
+    return source
+
+
+def _capture_worker(shm_name: str, capacity_frames: int, frame_samples: int, frame_ms: int,
+                    stop_event, source_factory):
+    """Worker process entry point: read frames and publish them to shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header, data = _layout(shm, capacity_frames, frame_samples)
+    frame_seconds = frame_ms / 1000
+    source = None
+    try:
+        source = source_factory()
+        source.open()
+        header[_STATE] = _STATE_RUNNING
+        low_power = False
+        last_frame = time.perf_counter()
+        while not stop_event.is_set():
+            frame = source.read_frame()
+            if frame is None:
+                break
+            now = time.perf_counter()
+            # A gap much longer than one frame means the device dropped audio
+            gap = now - last_frame
+            if gap > 2.5 * frame_seconds:
+                header[_FRAMES_DROPPED] += int(gap / frame_seconds) - 1
+            last_frame = now
+
+            samples = np.frombuffer(frame, dtype=np.int16)
+            if len(samples) != frame_samples:
+                header[_FRAMES_DROPPED] += 1
+                continue
+            index = int(header[_FRAMES_WRITTEN])
+            start = (index % capacity_frames) * frame_samples
+            data[start:start + frame_samples] = samples
+            # Publish only after the samples are in place
+            header[_FRAMES_WRITTEN] = index + 1
+            header[_HEARTBEAT_NS] = time.monotonic_ns()
+
+            wanted = bool(header[_LOW_POWER])
+            if wanted != low_power and hasattr(source, "set_low_power"):
+                source.set_low_power(wanted)
+                low_power = wanted
+        header[_STATE] = _STATE_STOPPED
+    except Exception:
+        header[_STATE] = _STATE_FAILED
+        raise
+    finally:
+        if source is not None:
+            source.close()
+        del header, data
+        shm.close()
+
+
+class SharedMemoryRingBuffer(AudioRingBuffer):
+    """Read side of the worker's ring; same API as AudioRingBuffer for subscribers"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity_frames: int,
+                 sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * Constants.AUDIO_SAMPLE_WIDTH
+        self.capacity_frames = capacity_frames
+        self.header, self.buffer = _layout(shm, capacity_frames, self.frame_samples)
+        self._bytes = memoryview(self.buffer).cast("B")
+        self._closed = False
+        self._subscribers = {}
+
+    @property
+    def frames_written(self) -> int:
+        return int(self.header[_FRAMES_WRITTEN])
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+    def write(self, frame) -> int:
+        raise RuntimeError("Frames are written by the capture process")
+
+    def wait_for(self, index: int, timeout: Optional[float] = None) -> bool:
+        # No cross-process condition variable; poll at a fraction of a frame
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.frames_written <= index and not self._closed:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.frame_ms / 3000)
+        return True
+
+    def release(self):
+        """Drop our views so the shared block can be closed"""
+        self._bytes.release()
+        self.header = self.buffer = None
+
+
+class CaptureProcess:
+    """
+    Supervises the capture worker process.
+
+    Drop-in for AudioCaptureThread: exposes `ring`, `set_low_power()`,
+    `is_alive()` and `stop()`.
+    """
+
+    def __init__(self, source_factory=default_source,
+                 capacity_seconds: float = Configs.RING_BUFFER_SECONDS,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS,
+                 heartbeat_timeout: float = Configs.CAPTURE_HEARTBEAT_TIMEOUT,
+                 max_restarts: int = Configs.CAPTURE_MAX_RESTARTS):
+        self.source_factory = source_factory
+        self.frame_ms = frame_ms
+        self.frame_samples = int(Constants.AUDIO_SAMPLE_RATE * frame_ms / 1000)
+        self.capacity_frames = max(2, int(capacity_seconds * 1000 / frame_ms))
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+
+        size = _HEADER_SLOTS * 8 + self.capacity_frames * self.frame_samples * Constants.AUDIO_SAMPLE_WIDTH
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.ring = SharedMemoryRingBuffer(self.shm, self.capacity_frames, frame_ms=frame_ms)
+        self.ring.header[:] = 0
+
+        self._stop_event = mp.Event()
+        self._process: Optional[mp.Process] = None
+        self._supervisor: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _spawn(self):
+        self.ring.header[_STATE] = _STATE_STARTING
+        self.ring.header[_HEARTBEAT_NS] = time.monotonic_ns()
+        self._process = mp.Process(
+            target=_capture_worker,
+            args=(self.shm.name, self.capacity_frames, self.frame_samples, self.frame_ms,
+                  self._stop_event, self.source_factory),
+            name="audio-capture-worker",
+            daemon=True,
+        )
+        self._process.start()
+        logger.info(f"Started capture worker (pid {self._process.pid})")
+
+    def start(self):
+        self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, name="capture-supervisor", daemon=True)
+        self._supervisor.start()
+        return self
+
+    def _supervise(self):
+        backoff = 0.5
+        while not self._stopping.wait(0.5):
+            heartbeat_age = (time.monotonic_ns() - int(self.ring.header[_HEARTBEAT_NS])) / 1e9
+            crashed = not self._process.is_alive()
+            stalled = heartbeat_age > self.heartbeat_timeout
+            if not (crashed or stalled):
+                backoff = 0.5
+                continue
+
+            reason = f"exited with code {self._process.exitcode}" if crashed else f"silent for {heartbeat_age:.1f}s"
+            if self.restarts >= self.max_restarts:
+                logger.error(f"Capture worker {reason}; giving up after {self.restarts} restarts")
+                self.ring.close()
+                return
+            logger.warning(f"Capture worker {reason}; restarting in {backoff:.1f}s")
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(1.0)
+            if self._stopping.wait(backoff):
+                return
+            # Audio missed while the worker was down counts as dropped
+            downtime = (time.monotonic_ns() - int(self.ring.header[_HEARTBEAT_NS])) / 1e9
+            self.ring.header[_FRAMES_DROPPED] += int(downtime * 1000 / self.frame_ms)
+            self.restarts += 1
+            backoff = min(backoff * 2, 5.0)
+            self._spawn()
+
+    def is_alive(self) -> bool:
+        return not self._stopping.is_set() and not self.ring.closed
+
+    def set_low_power(self, enabled: bool):
+        self.ring.header[_LOW_POWER] = int(enabled)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "frames_written": self.ring.frames_written,
+            "frames_dropped": int(self.ring.header[_FRAMES_DROPPED]),
+            "restarts": self.restarts,
+            "worker_alive": bool(self._process and self._process.is_alive()),
+            "subscribers": self.ring.stats(),
+        }
+
+    def stop(self, timeout: float = 2.0):
+        self._stopping.set()
+        self._stop_event.set()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        logger.info(f"Capture worker stopped: {self.stats()}")
+        self.ring.close()
+        self.ring.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+_capture_process: Optional[CaptureProcess] = None
+
+
+def get_capture_process() -> CaptureProcess:
+    """Start (once) and return the process-wide capture worker"""
+    global _capture_process
+    if _capture_process is None or not _capture_process.is_alive():
+        _capture_process = CaptureProcess().start()
+    return _capture_process
@@ -1,93 +1,235 @@
+import json
 import logging
 import os
 import sys
-from typing import List, Dict, Optional, Any
+from typing import Iterator, List, Dict, Optional, Any, Union
 
 # Add project root to sys.path to allow for package-level imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from openai import OpenAI
 from configs.config import Configs
 from configs.messages import ErrorMessages
+from core.cancellation import CancelToken, TurnCancelled
+from core.conversation_context import MESSAGE_OVERHEAD, ConversationContext, Message, count_tokens
+from core.llm_transport import LLMTransport
+from core.model_chain import ModelChain, ToolCallDelta
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def request_tokens(messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Prompt tokens of a request; tool definitions count as their JSON"""
+    tokens = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+    if tools:
+        tokens += count_tokens(json.dumps(tools, separators=(",", ":")))
+    return tokens
+
+
 class OpenRouterChat:
-    def __init__(self, model: str = Configs.ASSISTANT_MODEL, system_prompt: str = Configs.SYSTEM_PROMPT):
-        if not Configs.OPENROUTER_API_KEY:
+    def __init__(self, model: str = Configs.ASSISTANT_MODEL, system_prompt: str = Configs.SYSTEM_PROMPT,
+                 client: Optional[Any] = None):
+        if client is None and not Configs.OPENROUTER_API_KEY:
             raise ValueError("OPENROUTER_API_KEY is not set in environment variables.")
         
         self.model = model
         self.system_prompt = system_prompt
-        self.conversation_history: List[Dict[str, str]] = [
-            {"role": "system", "content": system_prompt}
-        ]
+        self.context = ConversationContext(system_prompt, summarizer=self._summarize)
+        self.tokens_sent: List[int] = []
+        self.last_request_failed = False  # the last reply is an error message, not the model's
+        self.transport: Optional[LLMTransport] = None
+        # Hedged across the fallback chain; the primary is `model`
+        self.models = ModelChain([model] + Configs.ASSISTANT_FALLBACK_MODELS)
         
         try:
-            self.client = OpenAI(
-                base_url=Configs.OPENROUTER_API_URL,
-                api_key=Configs.OPENROUTER_API_KEY
-            )
-            logger.info(f"Initialized OpenRouter client with model: {model}")
+            if client is None:
+                self.transport = LLMTransport()
+                client = self.transport.client
+            self.client = client
+            logger.info(f"Initialized OpenRouter client with model: {model}"
+                        f"{' (async)' if self.transport and self.transport.async_mode else ''}")
         except Exception as e:
             logger.error(f"Failed to initialize OpenRouter client: {str(e)}")
             raise
 
     def chat(self, message: str, stream: bool = False, 
              temperature: float = 0.7, max_tokens: int = 1000) -> str:
+        if stream:
+            response_text = ""
+            for content in self.stream_chat(message, temperature, max_tokens):
+                response_text += content
+                print(content, end="", flush=True)
+            return response_text
+
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": message})
+        self.context.append("user", message)
+        response_text = self.complete(self.context.messages(), temperature, max_tokens,
+                                      tokens=self.context.tokens)
+        
+        # Add assistant response to history
+        self.context.append("assistant", response_text)
+        return response_text
+
+    def stream_chat(self, message: str, temperature: float = 0.7,
+                    max_tokens: int = 1000, cancel: Optional[CancelToken] = None) -> Iterator[str]:
+        """
+        Yield the reply as it is generated; history is updated once it completes.
+        A reply cut off by `cancel` is not added to the history.
+        """
+        self.context.append("user", message)
+        response_text = ""
+        for content in self.stream_complete(self.context.messages(), temperature, max_tokens,
+                                            tokens=self.context.tokens, cancel=cancel):
+            response_text += content
+            yield content
         
+        if cancel is None or not cancel.is_set():
+            self.context.append("assistant", response_text)
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0.7,
+                 max_tokens: int = 1000, tokens: Optional[int] = None,
+                 cancel: Optional[CancelToken] = None) -> str:
+        """
+        One-off request with exactly `messages`; the history is not touched.
+        Raises TurnCancelled if `cancel` is set before the reply arrives.
+        """
+        self._log_request(messages, tokens)
+        self.last_request_failed = False
+        try:
+            return "".join(item for item in self.models.stream(
+                self._create,
+                cancel=cancel,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ) if isinstance(item, str))
+        except TurnCancelled:
+            raise
+        except Exception as e:
+            self.last_request_failed = True
+            return self._error_message(e)
+
+    def stream_complete(self, messages: List[Dict[str, str]], temperature: float = 0.7,
+                        max_tokens: int = 1000, tokens: Optional[int] = None,
+                        tools: Optional[List[Dict[str, Any]]] = None,
+                        cancel: Optional[CancelToken] = None) -> Iterator[Union[str, ToolCallDelta]]:
+        """
+        Streaming variant of complete(). With `tools` (function definitions)
+        the model may call one; its fragments come through as ToolCallDelta.
+        Setting `cancel` closes the HTTP stream and simply ends the iteration.
+        """
+        extra = {"tools": tools} if tools else {}
+        self._log_request(messages, tokens, tools)
+        self.last_request_failed = False
+        streamed = False
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.conversation_history, # type: ignore
+            for content in self.models.stream(
+                self._create,
+                cancel=cancel,
+                messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stream=stream
-            ) # type: ignore
-            
-            if stream:
-                # Handle streaming response
-                full_response = ""
-                for chunk in completion:
-                    if chunk.choices and chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
-                        print(content, end="", flush=True)
-                response_text = full_response
-            else:
-                # Handle regular response
-                response_text = completion.choices[0].message.content
-            
-            # Add assistant response to history
-            self.conversation_history.append({"role": "assistant", "content": response_text})
-            return response_text
-            
+                stream=True,
+                **extra
+            ):
+                streamed = True
+                yield content
+        except TurnCancelled:
+            logger.info("Request cancelled; stream closed")
         except Exception as e:
-            error_msg = f"Error during API call: {str(e)}"
-            logger.error(error_msg)
-            if "401" in str(e):
-                logger.error("Unauthorized access - invalid API key.")
-                return ErrorMessages.UNAUTHORIZED
-            elif "403" in str(e):
-                logger.error("Forbidden access - insufficient permissions.")    
-                return "Looks like I’m not allowed in this VIP section of the AI club. Mind checking my access pass (API key)?"
-            elif "429" in str(e):
-                logger.error("Rate limit exceeded.")
-                return "Phew! I’ve been talking too much and hit my daily chat limit. Let’s chill for a bit and try again later."
-            elif "500" in str(e) or "502" in str(e) or "503" in str(e):
-                logger.error("Server error.")
-                return ErrorMessages.SERVER_ERROR
-            elif "timeout" in str(e).lower():
-                logger.error("Connection timeout.")
-                return ErrorMessages.TIMEOUT
-            else:
-                logger.error("An unexpected error occurred.")
-                return "Well, that didn’t go as planned 🤦. Let’s pretend this never happened and try again in a moment."
+            self.last_request_failed = True
+            if not streamed:
+                yield self._error_message(e)
+                return
+            logger.error(f"Stream interrupted: {str(e)}")
+
+    def _create(self, **kwargs) -> Any:
+        if self.transport is not None:
+            return self.transport.create(**kwargs)
+        return self.client.chat.completions.create(**kwargs) # type: ignore
+
+    def warm_up(self):
+        """Open the HTTP connection ahead of the first request"""
+        if self.transport is not None:
+            self.transport.warm_up()
+
+    def prepare(self):
+        """A request is coming soon (the user is still talking): make sure the connection is up"""
+        if self.transport is not None:
+            self.transport.prewarm()
+
+    def connection_stats(self) -> Dict[str, float]:
+        return self.transport.stats.report() if self.transport is not None else {}
+
+    def model_stats(self) -> Dict[str, Dict[str, Any]]:
+        """First-token p50/p95, failures and win rate per model"""
+        return self.models.report()
+
+    def record_turn(self, user_input: str, reply: str):
+        """Store a turn handled outside chat() (e.g. by the router) in the history"""
+        self.context.append("user", user_input)
+        if reply:
+            self.context.append("assistant", reply)
+
+    def recent_messages(self, count: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Summary (if any) and the newest `count` messages - by default the whole
+        token-budgeted history - without the system prompt
+        """
+        return self.context.recent(count)
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """The messages the next request would send"""
+        return self.context.messages()
+
+    def _log_request(self, messages: List[Dict[str, str]], tokens: Optional[int] = None,
+                     tools: Optional[List[Dict[str, Any]]] = None):
+        if tokens is None:
+            tokens = request_tokens(messages, tools)
+        self.tokens_sent.append(tokens)
+        logger.info(f"Request: {tokens} tokens in {len(messages)} messages")
+
+    def _summarize(self, previous: str, messages: List[Message]) -> str:
+        """Fold older turns into the rolling summary (runs on the context's worker thread)"""
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        prompt = (
+            "Update the summary of a conversation between a user and a voice assistant. "
+            "Keep names, facts, preferences and open requests; drop small talk. "
+            "Reply with the summary only, in at most a few sentences.\n\n"
+            f"Current summary: {previous or '(none)'}\n\nNew messages:\n{transcript}"
+        )
+        completion = self._create(
+            model=Configs.CONTEXT_SUMMARY_MODEL or self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=Configs.CONTEXT_SUMMARY_MAX_TOKENS
+        )
+        return (completion.choices[0].message.content or "").strip()
 
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        """Log an API error and turn it into something the assistant can say"""
+        error_msg = f"Error during API call: {str(e)}"
+        logger.error(error_msg)
+        if "401" in str(e):
+            logger.error("Unauthorized access - invalid API key.")
+            return ErrorMessages.UNAUTHORIZED
+        elif "403" in str(e):
+            logger.error("Forbidden access - insufficient permissions.")    
+            return "Looks like I’m not allowed in this VIP section of the AI club. Mind checking my access pass (API key)?"
+        elif "429" in str(e):
+            logger.error("Rate limit exceeded.")
+            return "Phew! I’ve been talking too much and hit my daily chat limit. Let’s chill for a bit and try again later."
+        elif "500" in str(e) or "502" in str(e) or "503" in str(e):
+            logger.error("Server error.")
+            return ErrorMessages.SERVER_ERROR
+        elif "timeout" in str(e).lower():
+            logger.error("Connection timeout.")
+            return ErrorMessages.TIMEOUT
+        else:
+            logger.error("An unexpected error occurred.")
+            return "Well, that didn’t go as planned 🤦. Let’s pretend this never happened and try again in a moment."
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+# conversation_context.py
+"""
+Token-budgeted conversation history for the chat client.
+
+Messages are kept in a deque with their token counts and a running total, so
+the request size is known without re-counting and trimming the oldest turn is
+O(1). When the history passes CONTEXT_TOKEN_BUDGET the oldest turns (all but
+the last CONTEXT_KEEP_MESSAGES) are handed to a background thread that folds
+them into a rolling summary; until it is ready they are still sent verbatim,
+so nothing drops out of the conversation and the request path never waits on
+the summarizer.
+
+Tokens are counted with tiktoken when it is installed, else estimated from
+the text length.
+"""
+
+import collections
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from configs.config import Configs
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4  # role and separators per message in the chat format
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4  # ~4 characters per token for English text
+
+
+@dataclass
+class Message:
+    role: str
+    content: str
+    tokens: int
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+# summarize(previous summary, messages to fold in) -> new summary
+Summarizer = Callable[[str, List[Message]], str]
+
+
+class ConversationContext:
+    """System prompt + rolling summary + recent messages, held within a token budget"""
+
+    def __init__(self, system_prompt: str, summarizer: Optional[Summarizer] = None,
+                 budget: int = Configs.CONTEXT_TOKEN_BUDGET,
+                 keep_messages: int = Configs.CONTEXT_KEEP_MESSAGES):
+        self.system = Message("system", system_prompt, count_tokens(system_prompt) + MESSAGE_OVERHEAD)
+        self.summarizer = summarizer
+        self.budget = budget
+        self.keep_messages = keep_messages
+        self.summary: Optional[Message] = None
+        self._recent: Deque[Message] = collections.deque()
+        self._recent_tokens = 0
+        self._folding: Deque[Message] = collections.deque()  # being summarized, still sent
+        self._folding_tokens = 0
+        self._lock = threading.Lock()
+        self._summarizing = False
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-summary")
+        self.summaries = 0
+
+    def append(self, role: str, content: str) -> Message:
+        message = Message(role, content, count_tokens(content) + MESSAGE_OVERHEAD)
+        with self._lock:
+            self._recent.append(message)
+            self._recent_tokens += message.tokens
+            self._enforce_budget()
+        return message
+
+    def _enforce_budget(self):
+        # Messages already being folded will shrink into the summary; only what
+        # stays verbatim decides whether more has to go
+        if self._retained_tokens <= self.budget:
+            return
+        while len(self._recent) > self.keep_messages and self._retained_tokens > self.budget:
+            message = self._recent.popleft()
+            self._recent_tokens -= message.tokens
+            self._folding.append(message)
+            self._folding_tokens += message.tokens
+        if self.summarizer is None:
+            # Nothing to summarize with: the oldest turns are simply dropped
+            self._folding.clear()
+            self._folding_tokens = 0
+        elif self._folding and not self._summarizing:
+            self._summarizing = True
+            self._pool.submit(self._summarize)
+
+    def _summarize(self):
+        while True:
+            with self._lock:
+                batch = list(self._folding)
+                previous = self.summary.content if self.summary else ""
+            if not batch:
+                break
+            try:
+                text = self.summarizer(previous, batch)
+            except Exception as e:
+                logger.error(f"Conversation summary failed, dropping {len(batch)} old messages: {e}")
+                text = previous
+            with self._lock:
+                for _ in batch:
+                    self._folding_tokens -= self._folding.popleft().tokens
+                if text:
+                    content = f"Summary of the conversation so far: {text}"
+                    self.summary = Message("system", content, count_tokens(content) + MESSAGE_OVERHEAD)
+                self.summaries += 1
+                logger.info(f"Folded {len(batch)} messages into the summary; context now {self.tokens} tokens")
+                if not self._folding:
+                    break
+        with self._lock:
+            self._summarizing = False
+            # Turns added while summarizing may have pushed us over again
+            self._enforce_budget()
+
+    @property
+    def tokens(self) -> int:
+        """Tokens a request with the current context would send"""
+        return self._retained_tokens + self._folding_tokens
+
+    @property
+    def _retained_tokens(self) -> int:
+        """Tokens of everything but the messages being folded into the summary"""
+        summary = self.summary.tokens if self.summary else 0
+        return self.system.tokens + summary + self._recent_tokens
+
+    def messages(self) -> List[Dict[str, str]]:
+        with self._lock:
+            parts = [self.system]
+            if self.summary:
+                parts.append(self.summary)
+            parts.extend(self._folding)
+            parts.extend(self._recent)
+            return [message.as_dict() for message in parts]
+
+    def recent(self, count: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        The summary and the newest `count` messages (all of them by default),
+        without the system prompt
+        """
+        with self._lock:
+            history = list(self._folding) + list(self._recent)
+            if count is not None:
+                history = history[-count:] if count else []
+            parts = ([self.summary] if self.summary else []) + history
+            return [message.as_dict() for message in parts]
+
+    def __len__(self) -> int:
+        return len(self._folding) + len(self._recent)
+
+    def wait_for_summary(self, timeout: Optional[float] = None):
+        """Block until pending summarization is done (tests and shutdown)"""
+        self._pool.submit(lambda: None).result(timeout)
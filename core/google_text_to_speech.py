@@ -1,22 +1,56 @@
 from gtts import gTTS
-import pygame
-import os
+import io
+from concurrent.futures import ThreadPoolExecutor
 
-def google_text_to_speech(text, lang="hi"):
-    tts = gTTS(text=text, lang=lang, slow=False)
-    filename = "temp_voice.mp3"
-    tts.save(filename)
+from configs.config import Configs
+from core import audio_player
+from core.streaming_speech import iter_segments
+from core.tts_cache import TTSCache, get_message_catalog, get_tts_cache
 
-    pygame.mixer.init()
-    pygame.mixer.music.load(filename)
-    pygame.mixer.music.play()
+# Synthesis of the next segment overlaps playback of the current one
+_synthesis_pool = ThreadPoolExecutor(max_workers=Configs.GTTS_SYNTHESIS_WORKERS, thread_name_prefix="gtts")
 
-    # Wait until audio finishes
-    while pygame.mixer.music.get_busy():
-        continue
 
-    pygame.mixer.quit()
-    os.remove(filename)
+def render_google_speech(text, lang="hi", cache_it=True):
+    """MP3 bytes for `text`, from the TTS cache when possible, else from gTTS"""
+    cache = get_tts_cache() if cache_it else None
+    key = TTSCache.key(text, "gtts", lang=lang)
+    if cache is not None:
+        path = cache.get(key)
+        if path:
+            with open(path, "rb") as f:
+                return f.read()
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, slow=False).write_to_fp(buffer)
+    data = buffer.getvalue()
+    if cache is not None:
+        cache.put(key, data, ".mp3")
+    return data
+
+
+def google_text_to_speech(text, lang="hi", stop_event=None, on_start=None):
+    # Fixed message fragments come from the cache; the rest is fetched sentence by sentence
+    parts = []
+    for part, fixed in get_message_catalog().split(text):
+        parts.extend([(part, True)] if fixed else [(segment, False) for segment in iter_segments([part])])
+    if not parts:
+        return
+
+    pending = _synthesis_pool.submit(render_google_speech, parts[0][0], lang, parts[0][1])
+    try:
+        for index in range(len(parts)):
+            current = pending
+            if index + 1 < len(parts):
+                part, fixed = parts[index + 1]
+                pending = _synthesis_pool.submit(render_google_speech, part, lang, fixed)
+            data = current.result()
+            if stop_event is not None and stop_event.is_set():
+                break
+            if not audio_player.play_buffer(data, stop_event, on_start if index == 0 else None):
+                break
+    finally:
+        pending.cancel()  # don't fetch a segment nobody will hear
 
 if __name__ == "__main__":
     google_text_to_speech("Mai nitish kumar bol raha hoon, aap kaise hain?,How are you man", lang="hi")
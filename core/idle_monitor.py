@@ -0,0 +1,130 @@
+# idle_monitor.py
+"""
+Low-power idle listening.
+
+While nobody is talking, the assistant only runs a cheap energy gate over the
+capture ring a few times per second, looking at every IDLE_FRAME_STRIDE-th
+frame. When the gate fires, the monitor escalates to full wake-word/VAD
+processing (rewinding so the onset isn't lost) and drops back to idle after
+IDLE_INACTIVITY_TIMEOUT seconds without activity.
+
+Idle CPU percentage and wake-up latency are tracked so the poll interval and
+trigger level can be tuned.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from configs.config import Configs
+from core.audio_pipeline import EnergyVAD
+from core.audio_ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class IdleMonitor:
+    """Duty-cycled energy gate in front of the wake-word detector"""
+
+    def __init__(self, ring: AudioRingBuffer, capture=None,
+                 poll_interval: float = Configs.IDLE_POLL_INTERVAL,
+                 trigger_db: float = Configs.IDLE_TRIGGER_DB,
+                 frame_stride: int = Configs.IDLE_FRAME_STRIDE,
+                 inactivity_timeout: float = Configs.IDLE_INACTIVITY_TIMEOUT):
+        self.ring = ring
+        self.capture = capture
+        self.subscriber = ring.subscribe("idle-gate")
+        self.poll_interval = poll_interval
+        self.trigger_db = trigger_db
+        self.frame_stride = max(1, frame_stride)
+        self.inactivity_timeout = inactivity_timeout
+
+        self.noise_floor_db: Optional[float] = None
+        self.active = False
+        self.last_activity = 0.0
+
+        # Metrics
+        self.idle_wall_time = 0.0
+        self.idle_cpu_time = 0.0
+        self.wake_latencies: List[float] = []
+
+    def mark_activity(self):
+        """Called whenever speech or a wake word is detected in active mode"""
+        self.last_activity = time.monotonic()
+
+    def _set_active(self, active: bool):
+        if active == self.active:
+            return
+        self.active = active
+        if self.capture is not None and hasattr(self.capture, "set_low_power"):
+            self.capture.set_low_power(not active)
+        logger.debug("Listening mode: %s", "active" if active else "idle")
+
+    def _gate(self, frames: List[memoryview]) -> Optional[int]:
+        """Index (within `frames`) of the first frame above the trigger level, if any"""
+        for index in range(0, len(frames), self.frame_stride):
+            level = EnergyVAD.frame_level_db(frames[index])
+            if self.noise_floor_db is None:
+                self.noise_floor_db = level
+            if level > self.noise_floor_db + self.trigger_db:
+                return index
+            # Fast down, slow up
+            rate = 0.3 if level < self.noise_floor_db else 0.02
+            self.noise_floor_db += rate * (level - self.noise_floor_db)
+        return None
+
+    def wait_for_activity(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Block in low-power mode until sound is heard.
+
+        Returns how many ms before now the sound started (rewind the listener by
+        this much), 0 if we are still inside the active period, or None on timeout.
+        """
+        if self.active and time.monotonic() - self.last_activity < self.inactivity_timeout:
+            return 0.0
+        self._set_active(False)
+
+        wall_start = time.monotonic()
+        cpu_start = time.process_time()
+        self.subscriber.seek_live()
+        try:
+            while timeout is None or time.monotonic() - wall_start < timeout:
+                time.sleep(self.poll_interval)
+                frames = self.subscriber.read_available()
+                onset = self._gate(frames)
+                if onset is None:
+                    if self.ring.closed:
+                        return None
+                    continue
+
+                # Frames after the onset that were already captured = wake-up latency
+                latency = (len(frames) - onset) * self.ring.frame_ms / 1000
+                self.wake_latencies.append(latency)
+                self._set_active(True)
+                self.mark_activity()
+                return latency * 1000
+            return None
+        finally:
+            self.idle_wall_time += time.monotonic() - wall_start
+            self.idle_cpu_time += time.process_time() - cpu_start
+
+    def metrics(self) -> Dict[str, float]:
+        # CPU is process-wide (capture thread included), which is what an
+        # always-on box actually pays while idle
+        return {
+            "idle_seconds": self.idle_wall_time,
+            "idle_cpu_percent": 100 * self.idle_cpu_time / self.idle_wall_time if self.idle_wall_time else 0.0,
+            "wakeups": len(self.wake_latencies),
+            "wake_latency_ms_mean": 1000 * float(np.mean(self.wake_latencies)) if self.wake_latencies else 0.0,
+            "wake_latency_ms_max": 1000 * max(self.wake_latencies) if self.wake_latencies else 0.0,
+        }
+
+    def log_metrics(self):
+        m = self.metrics()
+        logger.info(
+            f"Idle: {m['idle_cpu_percent']:.1f}% CPU over {m['idle_seconds']:.0f}s, "
+            f"{m['wakeups']} wake-ups, latency mean {m['wake_latency_ms_mean']:.0f} ms "
+            f"/ max {m['wake_latency_ms_max']:.0f} ms"
+        )
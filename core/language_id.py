@@ -0,0 +1,126 @@
+# language_id.py
+"""
+Fast local language identification for short text (reply segments and ASR
+hypotheses).
+
+Script decides first: Devanagari is Hindi. Latin text is checked against a
+small lexicon of common romanised Hindi words, so Hinglish ("Arre yaar, kya
+scene hai?") is told apart from English. No models, a few microseconds per
+segment.
+
+Once the user has spoken the same language for a couple of turns it is offered
+to the ASR backend as a hint, so the next turn skips language detection.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from configs.config import Configs
+
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_LATIN = re.compile(r"[A-Za-z]")
+_WORD = re.compile(r"[a-z]+")
+
+# Frequent romanised Hindi words that aren't also English words. Homographs
+# ("the", "main", "sun", "par", "mat", "mere", "hum", ...) are left out even
+# though they are common in Hinglish: one of them would flip plain English.
+_HINGLISH = frozenset("""
+    hai hain hoon tha thi kya kyun kyon kaise kaisa kaisi kab kahan kaun
+    nahi nahin haan ji aap tum tu mai mujhe mujhko mera meri
+    tera teri tere aapka aapki apna apni humko hamara yeh woh wo voh iska uska
+    kuch sab bahut bohot bhi aur lekin phir abhi jaldi thoda zyada accha acha achha
+    theek thik bhai yaar arre arey bas chalo chal karo karna kar raha rahi rahe gaya
+    gayi gaye hoga hogi dekho dekh batao bata bolo bol suno samjha pata kaam
+    wala wali wale mein mujhse tumhe unhe isko usko kitna kitne kitni sahi galat
+    namaste dhanyavaad shukriya matlab waise vaise ekdum bilkul sirf
+""".split())
+
+
+@dataclass
+class LanguageGuess:
+    language: str  # "hi" or "en"
+    script: str  # "devanagari", "latin" or "none"
+    confidence: float
+
+    @property
+    def romanized(self) -> bool:
+        """Hindi written in Latin letters (Hinglish)"""
+        return self.language == "hi" and self.script == "latin"
+
+
+def detect_language(text: str, default: Optional[str] = None) -> LanguageGuess:
+    """Guess the language of `text`; `default` (TTS_DEFAULT_LANG) when there is nothing to go on"""
+    default = default or Configs.TTS_DEFAULT_LANG
+    devanagari = len(_DEVANAGARI.findall(text))
+    latin = len(_LATIN.findall(text))
+    if devanagari + latin == 0:
+        return LanguageGuess(default, "none", 0.0)
+    if devanagari >= latin:
+        return LanguageGuess("hi", "devanagari", devanagari / (devanagari + latin))
+
+    words = _WORD.findall(text.lower())
+    hindi = sum(1 for word in words if word in _HINGLISH)
+    share = hindi / len(words) if words else 0.0
+    # A lone match in a longer sentence is more likely a name or a coincidence
+    enough = hindi >= Configs.HINGLISH_MIN_WORDS or (hindi and share >= 0.5)
+    if enough and share >= Configs.HINGLISH_WORD_SHARE:
+        return LanguageGuess("hi", "latin", min(1.0, 0.5 + share))
+    return LanguageGuess("en", "latin", 1.0 - share)
+
+
+def speech_language(text: str) -> str:
+    """Language a reply is spoken in: detected with TTS_LANGUAGE_ID, else TTS_DEFAULT_LANG"""
+    if not Configs.TTS_LANGUAGE_ID:
+        return Configs.TTS_DEFAULT_LANG
+    return detect_language(text).language
+
+
+class LanguageTracker:
+    """Remembers the language the user has been speaking, for the next ASR pass"""
+
+    def __init__(self, min_confidence: float = Configs.ASR_LANGUAGE_HINT_CONFIDENCE,
+                 min_turns: int = Configs.ASR_LANGUAGE_HINT_TURNS):
+        self.min_confidence = min_confidence
+        self.min_turns = min_turns
+        self._lock = threading.Lock()
+        self._language: Optional[str] = None
+        self._streak = 0
+
+    def observe(self, text: str, detected: Optional[str] = None) -> Optional[str]:
+        """
+        Record one transcript. `detected` is the backend's own language (e.g.
+        from Whisper); otherwise the text is classified here.
+        """
+        if not text:
+            return self.hint
+        if detected is not None:
+            language, confident = detected, True
+        else:
+            guess = detect_language(text)
+            language, confident = guess.language, guess.confidence >= self.min_confidence
+        with self._lock:
+            if language == self._language:
+                self._streak += 1
+            elif confident:
+                self._language, self._streak = language, 1
+        return self.hint
+
+    @property
+    def hint(self) -> Optional[str]:
+        """Language to pass to the next ASR call; None until it has held for `min_turns`"""
+        if Configs.ASR_LANGUAGE:
+            return Configs.ASR_LANGUAGE
+        return self._language if self._streak >= self.min_turns else None
+
+    def reset(self):
+        with self._lock:
+            self._language, self._streak = None, 0
+
+
+_tracker = LanguageTracker()
+
+
+def get_language_tracker() -> LanguageTracker:
+    return _tracker
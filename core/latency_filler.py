@@ -0,0 +1,120 @@
+# latency_filler.py
+"""
+Masks a slow response with a short filler phrase ("Ek second...").
+
+A turn starts a FILLER_BUDGET timer when the user has finished speaking. If
+no response audio is ready by then, one of the FillerMessages phrases is
+played - from the TTS cache, where the startup pre-render puts them. The
+moment the response is ready the filler is cancelled (a cached clip stops
+immediately, a live one at the next word) so the reply isn't delayed by it.
+
+How often a filler was needed and the time to first audio the user actually
+heard (filler or reply) are logged per turn; a turn that ended without any
+audio (cancelled, or a silent tool) adds no time-to-first-audio sample.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import List, Optional
+
+from configs.config import Configs
+from configs.constant import Constants
+from configs.messages import FillerMessages
+from core.text_to_speech import SpeechHandle, get_speech_service
+
+logger = logging.getLogger(__name__)
+
+
+def filler_phrases() -> List[str]:
+    return [value for name, value in vars(FillerMessages).items() if name.isupper()]
+
+
+class LatencyFiller:
+    """Plays a filler phrase when a turn's response misses the time-to-first-audio budget"""
+
+    def __init__(self, budget: float = Configs.FILLER_BUDGET, rate: int = Constants.DEFAULT_TTS_RATE,
+                 volume: float = Constants.DEFAULT_TTS_VOLUME):
+        self.budget = budget
+        self.rate = rate
+        self.volume = volume
+        self.phrases = filler_phrases()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._handle: Optional[SpeechHandle] = None
+        self._turn_started: Optional[float] = None
+        self._last_phrase: Optional[str] = None
+        self.turns = 0
+        self.fillers = 0
+        self.ttfa: List[float] = []
+
+    def start(self, turn_started: Optional[float] = None):
+        """Arm the budget for a new turn (`turn_started` defaults to now)"""
+        self.ready()
+        with self._lock:
+            self._turn_started = turn_started or time.perf_counter()
+            delay = max(0.0, self._turn_started + self.budget - time.perf_counter())
+            self._timer = threading.Timer(delay, self._play)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _pick(self) -> Optional[str]:
+        service = get_speech_service()
+        cached = [p for p in self.phrases if service.is_cached(p, self.rate)]
+        # Until the pre-render has caught up a live filler is still better than silence
+        pool = [p for p in (cached or self.phrases) if p != self._last_phrase] or cached or self.phrases
+        return random.choice(pool) if pool else None
+
+    def _play(self):
+        with self._lock:
+            if self._timer is None:
+                return  # the response beat us to it
+            phrase = self._pick()
+            if phrase is None:
+                return
+            self._last_phrase = phrase
+            self._handle = get_speech_service().say(phrase, self.rate, self.volume)
+            self.fillers += 1
+
+    def ready(self, heard: bool = True):
+        """
+        The response audio is ready: cancel a pending or playing filler and
+        record the turn. Pass heard=False when the turn ends with no reply audio.
+        """
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None
+            handle, self._handle = self._handle, None
+            now = time.perf_counter()
+            if handle is not None:
+                handle.cancel()
+            first_audio = handle.first_word_at if handle is not None and handle.first_word_at else None
+            if first_audio is None and heard:
+                first_audio = now
+            ttfa = min(first_audio, now) - self._turn_started if first_audio is not None else None
+            self._record(ttfa, handle is not None)
+
+    def _record(self, ttfa: Optional[float], filled: bool):
+        self.turns += 1
+        if ttfa is None:
+            logger.info(f"No audio this turn; fillers in {self.fillers}/{self.turns} turns")
+            return
+        self.ttfa.append(ttfa)
+        ordered = sorted(self.ttfa)
+        logger.info(
+            f"Heard audio after {ttfa * 1000:.0f} ms{' (filler)' if filled else ''}; "
+            f"fillers in {self.fillers}/{self.turns} turns, "
+            f"median {ordered[len(ordered) // 2] * 1000:.0f} ms"
+        )
+
+    def stats(self) -> dict:
+        ordered = sorted(self.ttfa)
+        return {
+            "turns": self.turns,
+            "fillers": self.fillers,
+            "filler_rate": self.fillers / self.turns if self.turns else 0.0,
+            "median_ttfa": ordered[len(ordered) // 2] if ordered else None,
+        }
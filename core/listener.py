@@ -1,17 +1,106 @@
 # listener.py
 import speech_recognition as sr
+import re
 import socket
 import time
+from typing import Callable, Optional
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.asr import ASRBackend, ASRRequestError, ASRResult, PartialTranscriber, get_backend
+from core.audio_pipeline import (
+    EnergyVAD, FrameSource, MicrophoneFrameSource, SpeechSegment, SpeechSegmenter, capture_segment,
+)
+from core.audio_frontend import FrontEndFrameSource
+from core.audio_ring_buffer import RingFrameSource, get_shared_capture
+from core.capture_process import get_capture_process
+from core.idle_monitor import IdleMonitor
+from core.language_id import get_language_tracker
+from core.wake_word import get_spotter
 
 
 recognizer = sr.Recognizer()
 mic = sr.Microphone()
+_frame_source: Optional[FrameSource] = None
+_idle_monitor: Optional[IdleMonitor] = None
 
 def initialize_microphone():
     with mic as source:
         recognizer.adjust_for_ambient_noise(source, duration=0)
 
 
+def open_microphone() -> FrameSource:
+    """Microphone frames, cleaned up by the audio front-end when enabled"""
+    source = MicrophoneFrameSource()
+    return FrontEndFrameSource(source) if Configs.AUDIO_FRONTEND else source
+
+
+def get_capture():
+    """Shared capture: a worker process or an in-process thread, per config"""
+    if Configs.CAPTURE_PROCESS:
+        return get_capture_process()
+    return get_shared_capture(open_microphone)
+
+
+def get_frame_source() -> FrameSource:
+    """Shared microphone frame source used by the streaming capture mode"""
+    global _frame_source
+    if _frame_source is None:
+        if Configs.SHARED_CAPTURE:
+            # The device stays open; listeners read the capture thread's ring
+            _frame_source = RingFrameSource(get_capture().ring, "listener")
+        else:
+            _frame_source = open_microphone()
+    return _frame_source
+
+
+def get_capture_ring():
+    """Ring buffer of the shared capture (started on first use)"""
+    return get_capture().ring
+
+
+def get_idle_monitor() -> Optional[IdleMonitor]:
+    """Low-power activity gate, available when capture is shared"""
+    global _idle_monitor
+    if _idle_monitor is None and Configs.IDLE_MODE and Configs.SHARED_CAPTURE:
+        capture = get_capture()
+        _idle_monitor = IdleMonitor(capture.ring, capture)
+    return _idle_monitor
+
+
+def capture_speech(source: Optional[FrameSource] = None, timeout=Configs.LISTEN_TIMEOUT,
+                   phrase_time_limit=Configs.PHRASE_TIME_LIMIT,
+                   on_speech=None, rewind_ms: float = 0) -> Optional[SpeechSegment]:
+    """
+    Capture one utterance; returns None if nothing was said before the timeout.
+    `rewind_ms` replays audio from just before the call (shared capture only).
+    """
+    if source is None and not Configs.STREAMING_CAPTURE:
+        with mic as mic_source:
+            try:
+                audio = recognizer.listen(mic_source, timeout=timeout,
+                                          phrase_time_limit=phrase_time_limit)
+            except sr.WaitTimeoutError:
+                return None
+        pcm = audio.get_raw_data(convert_rate=Constants.AUDIO_SAMPLE_RATE,
+                                 convert_width=Constants.AUDIO_SAMPLE_WIDTH)
+        duration = len(pcm) / (Constants.AUDIO_SAMPLE_RATE * Constants.AUDIO_SAMPLE_WIDTH)
+        return SpeechSegment(pcm, Constants.AUDIO_SAMPLE_RATE, Constants.AUDIO_SAMPLE_WIDTH, 0.0, duration)
+
+    with (source or get_frame_source()) as frames:
+        if rewind_ms and isinstance(frames, RingFrameSource):
+            frames.rewind(rewind_ms + Configs.VAD_PRE_ROLL_MS)
+        return capture_segment(frames, timeout=timeout, max_duration=phrase_time_limit,
+                               on_speech=on_speech)
+
+
+def capture_audio(source: Optional[FrameSource] = None, timeout=Configs.LISTEN_TIMEOUT,
+                  phrase_time_limit=Configs.PHRASE_TIME_LIMIT,
+                  rewind_ms: float = 0) -> Optional[sr.AudioData]:
+    """Capture one utterance as speech_recognition AudioData"""
+    segment = capture_speech(source, timeout, phrase_time_limit, rewind_ms=rewind_ms)
+    return segment.to_audio_data() if segment else None
+
 
 def check_internet_connection():
     """Check if the device is connected to the internet."""
@@ -22,36 +111,146 @@ def check_internet_connection():
     except OSError:
         return False
 
-def listen_voice(retry_attempts=2, retry_delay=2):
-    if not check_internet_connection():
+def listen_voice(retry_attempts=2, retry_delay=2, source: Optional[FrameSource] = None,
+                 on_partial: Optional[Callable[[str], None]] = None,
+                 timeout=Configs.LISTEN_TIMEOUT):
+    """
+    Capture and transcribe one utterance with the configured ASR backend.
+
+    `on_partial` receives interim hypotheses while the user is still talking
+    (only for backends that support them, e.g. faster_whisper). Returns ""
+    if nothing was said within `timeout` seconds.
+    """
+    backend = get_backend()
+    if backend.requires_network and not check_internet_connection():
         print("❌ No internet connection detected.")
         return "NETWORK_ERROR"
 
+    partials = None
+    if on_partial is not None and backend.supports_partials:
+        partials = PartialTranscriber(backend, on_partial, language=asr_language(backend))
+
+    print("👂 Eva listening...")
+    segment = capture_speech(source, timeout=timeout, on_speech=partials)
+    if partials is not None:
+        partials.stop()  # the final decode goes ahead of any partial still running
+    if segment is None:
+        print("❓ Sorry, I did not understand that.")
+        return ""
+
     for attempt in range(retry_attempts + 1):
-        with mic as source:
-            print("👂 Eva listening...")
-            try:
-                audio = recognizer.listen(source)  # stops after silence
-                text = recognizer.recognize_google(audio) # type: ignore
-                print(f"🗣️ You said: {text}")
-                return text
-            except sr.UnknownValueError:
-                print("❓ Sorry, I did not understand that.")
-                return ""
-            except sr.RequestError:
-                if attempt < retry_attempts:
-                    print(f"❗ Network error. Retrying in {retry_delay} sec...")
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    return "NETWORK_ERROR"
-
-def listen_for_wake_word(wake_word="eva"):
-    with mic as source:
         try:
-            audio = recognizer.listen(source, timeout=5)
-            text = recognizer.recognize_google(audio).lower()
-            print(f"🗣️ Heard: {text}")
-            return wake_word in text
-        except Exception:
-            return False
\ No newline at end of file
+            result = transcribe_with_hint(backend, segment)
+        except ASRRequestError:
+            if attempt < retry_attempts:
+                print(f"❗ Network error. Retrying in {retry_delay} sec...")
+                time.sleep(retry_delay)
+                continue
+            else:
+                return "NETWORK_ERROR"
+
+        if not result.text:
+            print("❓ Sorry, I did not understand that.")
+            return ""
+        print(f"🗣️ You said: {result.text}")
+        return result.text
+
+def asr_language(backend: ASRBackend) -> Optional[str]:
+    """The configured ASR language, or the one the user has been speaking lately"""
+    if Configs.ASR_LANGUAGE or not (Configs.ASR_LANGUAGE_HINT and backend.accepts_language_hint):
+        return Configs.ASR_LANGUAGE
+    return get_language_tracker().hint
+
+
+def transcribe_with_hint(backend: ASRBackend, segment: SpeechSegment) -> ASRResult:
+    """
+    Transcribe with the language hint. If a hinted pass finds nothing (the user
+    may have switched language) it is decoded once more with detection.
+    """
+    language = asr_language(backend)
+    result = backend.transcribe(segment, language=language)
+    if not result.text and language and language != Configs.ASR_LANGUAGE:
+        language = None
+        result = backend.transcribe(segment, language=None)
+    # A forced language just echoes back, so only trust the backend when it detected it
+    detected = result.language if backend.accepts_language_hint and language is None else None
+    get_language_tracker().observe(result.text, detected)
+    return result
+
+
+def transcribe_segment(segment: SpeechSegment) -> str:
+    """Transcribe already captured speech; "" if it couldn't be understood"""
+    try:
+        text = transcribe_with_hint(get_backend(), segment).text
+    except ASRRequestError:
+        return ""
+    if text:
+        print(f"🗣️ You said: {text}")
+    return text
+
+def extract_command(text: str, wake_words) -> Optional[str]:
+    """
+    Return what was said after the wake word, "" if the wake word was said
+    alone, or None if no wake word appears in the text.
+    """
+    pattern = r"\b(?:%s)\b" % "|".join(re.escape(w.lower()) for w in wake_words if w)
+    match = re.search(pattern, text.lower())
+    if not match:
+        return None
+    return text[match.end():].strip(" ,.!?-:;")
+
+
+def listen_for_wake_word_and_command(wake_word="eva", source: Optional[FrameSource] = None,
+                                     rewind_ms: float = 0) -> Optional[str]:
+    """
+    Wait for the wake word and pick up a command said in the same breath.
+
+    Returns None if the wake word wasn't heard, "" if it was said alone, and
+    otherwise the command that followed it ("Jarvis, open chrome" -> "open chrome").
+    `rewind_ms` replays audio from just before the call (shared capture only),
+    e.g. the onset that woke the idle monitor.
+    """
+    wake_words = set(Configs.WAKE_WORD_ALIASES) | {wake_word}
+    spotter = get_spotter() if Configs.WAKE_WORD_ENGINE == "local" else None
+    if spotter is not None:
+        with (source or get_frame_source()) as frames:
+            if rewind_ms and isinstance(frames, RingFrameSource):
+                frames.rewind(rewind_ms + Configs.VAD_PRE_ROLL_MS)
+            detection = spotter.listen(frames, timeout=Configs.WAKE_WORD_TIMEOUT)
+            if not detection:
+                return None
+            print(f"🗣️ Heard: {detection.alias} (score {detection.score:.2f})")
+            keyword_pcm = spotter.recent_audio()
+            # The command often follows in the same breath: a fresh VAD would take
+            # its first frame (speech) as the noise floor, so start from the room's
+            vad = EnergyVAD(noise_floor_db=spotter.vad.noise_floor_db)
+            follow_up = capture_segment(frames, timeout=Configs.WAKE_COMMAND_WAIT,
+                                        segmenter=SpeechSegmenter(frames.frame_ms, vad))
+        if follow_up is None:
+            return ""
+
+        # Transcribe keyword + command together; the keyword gives the
+        # recognizer context and is stripped from the text afterwards
+        segment = SpeechSegment(keyword_pcm + follow_up.pcm, follow_up.sample_rate,
+                                follow_up.sample_width, 0.0, follow_up.end_time)
+        backend = get_backend()
+        try:
+            text = transcribe_with_hint(backend, segment).text
+        except ASRRequestError:
+            return ""
+        print(f"🗣️ You said: {text}")
+        command = extract_command(text, wake_words)
+        return text if command is None else command
+
+    try:
+        audio = capture_audio(source, timeout=Configs.WAKE_WORD_TIMEOUT, rewind_ms=rewind_ms)
+        if audio is None:
+            return None
+        text = recognizer.recognize_google(audio)
+        print(f"🗣️ Heard: {text}")
+        return extract_command(text, wake_words)
+    except Exception:
+        return None
+
+def listen_for_wake_word(wake_word="eva", source: Optional[FrameSource] = None):
+    return listen_for_wake_word_and_command(wake_word, source) is not None
@@ -0,0 +1,258 @@
+# llm_transport.py
+"""
+HTTP transport for the OpenRouter client.
+
+One explicitly pooled httpx client (keep-alive connections, bounded pool) is
+shared by every request, warmed up at startup and optionally kept warm with a
+cheap authenticated GET while the assistant is idle, so the request after the
+wake word doesn't pay for DNS, TCP and TLS.
+
+Every request is traced through httpcore's trace hook: the time spent opening
+a connection (TCP + TLS) is reported apart from the server time (request sent
+-> response headers), along with how often a pooled connection was reused.
+
+With OPENROUTER_ASYNC the AsyncOpenAI client runs on a private event loop
+thread; create() keeps the blocking interface the rest of the code uses.
+"""
+
+import asyncio
+import collections
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from configs.config import Configs
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestTiming:
+    reused: bool
+    connect: float  # seconds opening TCP + TLS (0 when reused)
+    server: float  # request sent -> response headers
+
+
+class ConnectionStats:
+    """Per-phase latency and connection reuse across requests"""
+
+    def __init__(self, window: int = 200):
+        self.timings: Deque[RequestTiming] = collections.deque(maxlen=window)
+        self.requests = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def tracer(self):
+        """A trace callback for one request (httpcore calls it with each phase event)"""
+        started: Dict[str, float] = {}
+        phases: Dict[str, float] = {}
+
+        def trace(event: str, info: dict):
+            name, _, state = event.rpartition(".")
+            phase = name.rsplit(".", 1)[-1]
+            if state == "started":
+                started[phase] = time.perf_counter()
+            elif state == "complete" and phase in started:
+                phases[phase] = time.perf_counter() - started[phase]
+                if phase == "receive_response_headers":
+                    self._record(phases, started)
+
+        return trace
+
+    def _record(self, phases: Dict[str, float], started: Dict[str, float]):
+        connect = phases.get("connect_tcp", 0.0) + phases.get("start_tls", 0.0)
+        sent = started.get("send_request_headers")
+        server = time.perf_counter() - sent if sent is not None else phases["receive_response_headers"]
+        timing = RequestTiming(reused="connect_tcp" not in started, connect=connect, server=server)
+        with self._lock:
+            self.timings.append(timing)
+            self.requests += 1
+            self.reused += timing.reused
+        logger.info(
+            f"LLM connection {'reused' if timing.reused else f'opened in {connect * 1000:.0f} ms'}, "
+            f"server {server * 1000:.0f} ms"
+        )
+
+    def report(self) -> Dict[str, float]:
+        with self._lock:
+            timings = list(self.timings)
+        connects = sorted(t.connect for t in timings if not t.reused)
+        servers = sorted(t.server for t in timings)
+        return {
+            "requests": self.requests,
+            "reuse_rate": self.reused / self.requests if self.requests else 0.0,
+            "connect_ms_p50": 1000 * connects[len(connects) // 2] if connects else 0.0,
+            "server_ms_p50": 1000 * servers[len(servers) // 2] if servers else 0.0,
+        }
+
+
+class _StreamIterator:
+    """
+    Blocking iterator over an async stream pumped on the loop thread.
+
+    close() may be called from any thread, including while the consumer is
+    blocked waiting for the next chunk: it cancels the pump on the loop (which
+    closes the HTTP stream there) and wakes the consumer, which then stops.
+    """
+
+    _done = object()
+
+    def __init__(self, stream_coroutine, loop: asyncio.AbstractEventLoop):
+        self._chunks: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._future = asyncio.run_coroutine_threadsafe(self._pump(stream_coroutine), loop)
+
+    async def _pump(self, stream_coroutine):
+        try:
+            stream = await stream_coroutine
+            try:
+                async for chunk in stream:
+                    self._chunks.put(chunk)
+            finally:
+                await stream.close()
+        except Exception as e:
+            self._chunks.put(e)
+        finally:
+            self._chunks.put(self._done)
+
+    def __del__(self):
+        if not self._closed:
+            self._future.cancel()  # the consumer dropped the stream early
+
+    def __iter__(self) -> "_StreamIterator":
+        return self
+
+    def __next__(self) -> Any:
+        if self._closed:
+            raise StopIteration
+        item = self._chunks.get()
+        if item is self._done:
+            self._closed = True
+            raise StopIteration
+        if isinstance(item, Exception):
+            self._closed = True
+            raise item
+        return item
+
+    def close(self):
+        self._closed = True
+        self._future.cancel()  # thread-safe: the pump task is cancelled on the loop
+        self._chunks.put(self._done)
+
+
+class LLMTransport:
+    """Pooled (sync or async) OpenAI-compatible client with warm-up and idle keep-alive"""
+
+    def __init__(self, base_url: str = Configs.OPENROUTER_API_URL,
+                 api_key: Optional[str] = Configs.OPENROUTER_API_KEY,
+                 async_mode: bool = Configs.OPENROUTER_ASYNC):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.async_mode = async_mode
+        self.stats = ConnectionStats()
+        self.last_activity = 0.0
+        self._keepalive: Optional[threading.Thread] = None
+        self._prewarming: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        limits = httpx.Limits(
+            max_connections=Configs.OPENROUTER_MAX_CONNECTIONS,
+            max_keepalive_connections=Configs.OPENROUTER_MAX_CONNECTIONS,
+            keepalive_expiry=Configs.OPENROUTER_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(Configs.OPENROUTER_TIMEOUT, connect=Configs.OPENROUTER_CONNECT_TIMEOUT)
+
+        if async_mode:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True).start()
+
+            async def on_request(request: httpx.Request):
+                self._on_request(request, async_trace=True)
+
+            self.http = httpx.AsyncClient(limits=limits, timeout=timeout,
+                                          event_hooks={"request": [on_request]})
+            self.client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=self.http)
+        else:
+            self._loop = None
+            self.http = httpx.Client(limits=limits, timeout=timeout,
+                                     event_hooks={"request": [self._on_request]})
+            self.client = OpenAI(base_url=base_url, api_key=api_key, http_client=self.http)
+
+    def _on_request(self, request: httpx.Request, async_trace: bool = False):
+        self.last_activity = time.monotonic()
+        trace = self.stats.tracer()
+        if async_trace:
+            async def async_trace_hook(event: str, info: dict):
+                trace(event, info)
+            request.extensions["trace"] = async_trace_hook
+        else:
+            request.extensions["trace"] = trace
+
+    def _run(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def create(self, **kwargs) -> Any:
+        """chat.completions.create(); a stream comes back as a plain iterator in both modes"""
+        if not self.async_mode:
+            return self.client.chat.completions.create(**kwargs)
+        if not kwargs.get("stream"):
+            return self._run(self.client.chat.completions.create(**kwargs))
+        return self._iterate(self.client.chat.completions.create(**kwargs))
+
+    def _iterate(self, stream_coroutine) -> "_StreamIterator":
+        """Drain an async stream on the loop thread into a blocking iterator"""
+        return _StreamIterator(stream_coroutine, self._loop)
+
+    def ping(self) -> bool:
+        """Cheap authenticated request that opens (or refreshes) a pooled connection"""
+        url = f"{self.base_url}{Configs.OPENROUTER_PING_PATH}"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        try:
+            if self.async_mode:
+                response = self._run(self.http.get(url, headers=headers), Configs.OPENROUTER_TIMEOUT)
+            else:
+                response = self.http.get(url, headers=headers)
+            return response.status_code < 500
+        except Exception as e:
+            logger.warning(f"LLM connection ping failed: {e}")
+            return False
+
+    def warm_up(self):
+        """Open the connection now, and keep it warm while idle if configured"""
+        started = time.perf_counter()
+        if self.ping():
+            logger.info(f"LLM connection warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if Configs.OPENROUTER_KEEPALIVE_INTERVAL and self._keepalive is None:
+            self._keepalive = threading.Thread(target=self._keep_warm, name="llm-keepalive", daemon=True)
+            self._keepalive.start()
+
+    def prewarm(self):
+        """
+        Ping in the background if the pooled connection may have been dropped
+        while idle, so the next request finds it open; returns immediately
+        """
+        if time.monotonic() - self.last_activity < Configs.OPENROUTER_KEEPALIVE_EXPIRY / 2:
+            return
+        if self._prewarming is not None and self._prewarming.is_alive():
+            return
+        self._prewarming = threading.Thread(target=self.ping, name="llm-prewarm", daemon=True)
+        self._prewarming.start()
+
+    def _keep_warm(self):
+        interval = Configs.OPENROUTER_KEEPALIVE_INTERVAL
+        while not self._closing.wait(interval / 2):
+            if time.monotonic() - self.last_activity >= interval:
+                self.ping()
+
+    def close(self):
+        self._closing.set()
+        if self.async_mode:
+            self._run(self.http.aclose())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        else:
+            self.http.close()
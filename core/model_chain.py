@@ -0,0 +1,266 @@
+# model_chain.py
+"""
+Hedged LLM requests over a chain of models.
+
+A turn starts on the primary model. If it hasn't produced a first token
+within LLM_HEDGE_DELAY (or it fails), the next model in the chain is started
+alongside it; whichever produces a token first wins and the others are
+cancelled. Rate limits (429), server errors (5xx) and connection problems are
+retried on the same model after a jittered exponential backoff, as long as
+the turn's LLM_TURN_BUDGET allows. Only when every model has failed, or the
+budget runs out, does the caller see an error.
+
+First-token latency (p50/p95), failures and win rate are kept per model.
+"""
+
+import collections
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
+
+from configs.config import Configs
+from core.cancellation import CancelToken, TurnCancelled
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        return True  # timeouts and dropped connections
+    return status in _RETRYABLE_STATUS
+
+
+@dataclass
+class ToolCallDelta:
+    """A piece of a native tool call; `arguments` is a fragment of the JSON string"""
+    index: int
+    id: Optional[str] = None
+    name: Optional[str] = None
+    arguments: str = ""
+
+
+class ModelStats:
+    def __init__(self, window: int = 100):
+        self.first_token: Deque[float] = collections.deque(maxlen=window)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.first_token:
+            return None
+        ordered = sorted(self.first_token)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def report(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "requests": self.requests,
+            "wins": self.wins,
+            "win_rate": self.wins / self.requests if self.requests else 0.0,
+            "failures": self.failures,
+            "p50_ms": round(1000 * p50) if p50 is not None else None,
+            "p95_ms": round(1000 * p95) if p95 is not None else None,
+        }
+
+
+class _Attempt(threading.Thread):
+    """One request to one model, reporting tokens into the turn's queue"""
+
+    def __init__(self, model: str, retry: int, create: Callable[..., Any], kwargs: dict,
+                 events: "queue.Queue"):
+        super().__init__(name=f"llm-{model}", daemon=True)
+        self.model = model
+        self.retry = retry
+        self.create = create
+        self.kwargs = kwargs
+        self.events = events
+        self.started_at = time.perf_counter()
+        self.cancelled = threading.Event()
+        self._response = None
+
+    def run(self):
+        try:
+            response = self.create(model=self.model, **self.kwargs)
+            if not self.kwargs.get("stream"):
+                message = response.choices[0].message
+                for index, call in enumerate(getattr(message, "tool_calls", None) or []):
+                    self.events.put(("token", self, ToolCallDelta(
+                        index, call.id, call.function.name, call.function.arguments or "")))
+                self.events.put(("token", self, message.content or ""))
+            else:
+                self._response = response
+                for chunk in response:
+                    if self.cancelled.is_set():
+                        break
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    for call in getattr(delta, "tool_calls", None) or []:
+                        function = call.function
+                        self.events.put(("token", self, ToolCallDelta(
+                            call.index, call.id, function.name if function else None,
+                            (function.arguments if function else None) or "")))
+                    if delta.content:
+                        self.events.put(("token", self, delta.content))
+            self.events.put(("done", self, None))
+        except Exception as e:
+            self.events.put(("error", self, e))
+
+    def cancel(self):
+        self.cancelled.set()
+        close = getattr(self._response, "close", None)
+        if close is not None:
+            try:
+                close()  # abort the HTTP stream
+            except Exception:
+                pass
+
+
+class ModelChain:
+    """The primary model plus fallbacks, with hedging, retries and per-model statistics"""
+
+    def __init__(self, models: List[str], hedge_delay: float = Configs.LLM_HEDGE_DELAY,
+                 turn_budget: float = Configs.LLM_TURN_BUDGET,
+                 max_retries: int = Configs.MAX_RETRY_ATTEMPTS,
+                 backoff: float = Configs.LLM_RETRY_BACKOFF):
+        self.models = list(dict.fromkeys(models))
+        self.hedge_delay = hedge_delay
+        self.turn_budget = turn_budget
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats: Dict[str, ModelStats] = {model: ModelStats() for model in self.models}
+
+    def _backoff(self, retry: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0.5, 1.5) * self.backoff * (2 ** retry)
+
+    def stream(self, create: Callable[..., Any], cancel: Optional[CancelToken] = None,
+               **kwargs) -> Iterator[Union[str, ToolCallDelta]]:
+        """
+        Yield the reply from whichever model answers first: text, and tool-call
+        fragments when `tools` are offered. `create` is chat.completions.create;
+        `kwargs` are its arguments without `model`. Raises TurnCancelled once
+        `cancel` is set.
+        """
+        events: "queue.Queue" = queue.Queue()
+        active: List[_Attempt] = []
+        timers: List[threading.Timer] = []
+        retries_pending = 0
+        remaining = list(self.models)
+        started = time.perf_counter()
+        deadline = started + self.turn_budget
+        last_error: Optional[Exception] = None
+
+        def launch(model: str, retry: int = 0):
+            attempt = _Attempt(model, retry, create, kwargs, events)
+            active.append(attempt)
+            self.stats[model].requests += retry == 0
+            attempt.start()
+
+        def hedge() -> bool:
+            if not remaining:
+                return False
+            model = remaining.pop(0)
+            if active:
+                logger.info(f"No reply from {', '.join(a.model for a in active)} yet; hedging with {model}")
+            launch(model)
+            return True
+
+        def on_cancel():
+            # Close the streams now, even if the consumer isn't reading; then wake the loop
+            for attempt in list(active):
+                attempt.cancel()
+            events.put(("cancel", None, None))
+
+        if cancel is not None:
+            cancel.check()
+            cancel.on_cancel(on_cancel)
+        hedge()
+        hedge_at = started + self.hedge_delay
+        winner: Optional[_Attempt] = None
+        try:
+            while winner is None:
+                now = time.perf_counter()
+                if now >= deadline:
+                    raise TimeoutError(f"No model answered within the {self.turn_budget:.0f}s budget")
+                try:
+                    kind, attempt, payload = events.get(timeout=max(0.0, min(hedge_at, deadline) - now))
+                except queue.Empty:
+                    if cancel is not None and cancel.is_set():
+                        raise TurnCancelled(cancel.reason)
+                    if time.perf_counter() >= hedge_at:
+                        hedge()
+                        hedge_at = time.perf_counter() + self.hedge_delay
+                    continue
+                if cancel is not None and cancel.is_set():
+                    # Also covers the error a stream closed by on_cancel() may report first
+                    raise TurnCancelled(cancel.reason)
+                if kind == "retry":
+                    retries_pending -= 1
+                    launch(attempt.model, attempt.retry + 1)
+                    continue
+                if kind == "error":
+                    active.remove(attempt)
+                    self.stats[attempt.model].failures += 1
+                    last_error = payload
+                    logger.warning(f"{attempt.model} failed: {payload}")
+                    delay = self._backoff(attempt.retry)
+                    if (is_retryable(payload) and attempt.retry < self.max_retries
+                            and time.perf_counter() + delay < deadline):
+                        # The retry is launched from this loop when the timer fires
+                        timer = threading.Timer(delay, events.put, (("retry", attempt, None),))
+                        timer.daemon = True
+                        timers.append(timer)
+                        timer.start()
+                        retries_pending += 1
+                        if not active:
+                            hedge()  # don't sit out the backoff if there is another model
+                    elif not active and not hedge() and not retries_pending:
+                        raise payload
+                    continue
+                # First token (or an empty but successful reply): this model wins
+                winner = attempt
+                stats = self.stats[attempt.model]
+                stats.wins += 1
+                stats.first_token.append(time.perf_counter() - attempt.started_at)
+                for timer in timers:
+                    timer.cancel()
+                for other in active:
+                    if other is not winner:
+                        other.cancel()
+                if kind == "done":
+                    return
+                yield payload
+
+            while True:
+                kind, attempt, payload = events.get(timeout=max(0.1, deadline + Configs.OPENROUTER_TIMEOUT - time.perf_counter()))
+                if cancel is not None and cancel.is_set():
+                    raise TurnCancelled(cancel.reason)
+                if attempt is not winner:
+                    continue
+                if kind == "token":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        except queue.Empty:
+            raise TimeoutError(f"{winner.model if winner else 'LLM'} stopped streaming") from last_error
+        finally:
+            if cancel is not None:
+                cancel.remove(on_cancel)
+            for timer in timers:
+                timer.cancel()
+            for attempt in active:
+                attempt.cancel()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {model: stats.report() for model, stats in self.stats.items()}
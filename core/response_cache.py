@@ -0,0 +1,296 @@
+# response_cache.py
+"""
+Semantic cache of chat replies for near-duplicate questions.
+
+Greetings, "what can you do" and small talk come up again and again; a cached
+reply is spoken without an LLM round-trip. Utterances are normalized
+(case, punctuation, politeness words, the assistant's name), so "Hey Jarvis,
+what can you do?" and "what can you do" share an entry, and embedded locally as
+hashed word + character-trigram vectors. A lookup is an exact match on the
+normalized text, else the nearest entry above RESPONSE_CACHE_THRESHOLD cosine
+similarity - kept high, since a wrong cached answer is worse than a slow one.
+
+Every entry is scoped to the conversation it was answered in: the key carries
+a digest of the previous exchange (empty at the start of a conversation), so
+a reply only comes back after the same lead-up. Follow-ups that only make
+sense in context ("why?", "tell me more", "yes", "what about it") are never
+cached at all.
+
+Entries expire after RESPONSE_CACHE_TTL and the least recently used are
+evicted beyond RESPONSE_CACHE_MAX_ENTRIES. Only chat replies are stored -
+never tool decisions - and nothing that depends on the current time, date,
+weather, news or prices. The cache is opt-in (Configs.RESPONSE_CACHE) and
+persisted as JSON - on every store, while hit counts and LRU order from
+lookups are written by the next store or flush() - inspect or clear it with:
+
+    python -m core.response_cache stats|list|clear
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from configs.config import Configs
+
+logger = logging.getLogger(__name__)
+
+_DIMENSIONS = 512
+_FILLER_WORDS = frozenset("please pls plz hey hi ok okay so um uh just kindly yaar boss bhai".split())
+_TIME_SENSITIVE = re.compile(
+    r"\b(today|tonight|tomorrow|yesterday|now|right now|currently|current|latest|recent|"
+    r"this (week|month|year|morning|evening)|time|date|day is it|weather|forecast|temperature|"
+    r"news|score|price|stock|rate|aaj|abhi|kal)\b"
+)
+
+# Follow-ups whose answer depends on what was said before
+_CONTEXT_DEPENDENT = re.compile(
+    r"^(why|how come|how so|really|and|and then|then what|more|tell me more|go on|continue|"
+    r"again|say that again|yes|yeah|yep|yup|no|nope|sure|haan|nahi|kyun|kyu|phir|aur batao)$|"
+    r"\b(it|its|it's|that|this|these|those|he|him|his|she|her|they|them|their|"
+    r"what about|how about|same|previous|above|last one|iska|uska|woh|wo|ye|yeh)\b"
+)
+
+
+def normalize(text: str) -> str:
+    words = re.findall(r"[\w']+", text.lower())
+    ignored = _FILLER_WORDS | {alias.lower() for alias in Configs.WAKE_WORD_ALIASES}
+    kept = [w for w in words if w not in ignored]
+    return " ".join(kept or words)
+
+
+def is_time_sensitive(text: str) -> bool:
+    return bool(_TIME_SENSITIVE.search(text.lower()))
+
+
+def is_context_dependent(text: str) -> bool:
+    """A follow-up like "why?" or "tell me more about it" that means nothing on its own"""
+    return bool(_CONTEXT_DEPENDENT.search(normalize(text)))
+
+
+def context_digest(messages: Sequence[Dict[str, str]]) -> str:
+    """Short digest of the conversation so far; "" for a fresh conversation"""
+    if not messages:
+        return ""
+    payload = json.dumps([[m["role"], m["content"]] for m in messages], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _bucket(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little") % _DIMENSIONS
+
+
+def embed(normalized: str) -> np.ndarray:
+    """Unit-length hashed bag of words and character trigrams"""
+    vector = np.zeros(_DIMENSIONS, dtype=np.float32)
+    for word in normalized.split():
+        vector[_bucket(f"w:{word}")] += 2.0
+    padded = f" {normalized} "
+    for i in range(len(padded) - 2):
+        vector[_bucket(f"c:{padded[i:i + 3]}")] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CachedReply:
+    utterance: str
+    reply: str
+    created: float
+    expires: float
+    latency: float  # seconds the original LLM round-trip took
+    hits: int = 0
+    context: str = ""  # context_digest() of the conversation it was answered in
+
+
+class ResponseCache:
+    """Normalized-text + embedding lookup, TTL and LRU bounded, persisted as JSON"""
+
+    def __init__(self, path: str = Configs.RESPONSE_CACHE_PATH,
+                 max_entries: int = Configs.RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = Configs.RESPONSE_CACHE_TTL,
+                 threshold: float = Configs.RESPONSE_CACHE_THRESHOLD):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[str, CachedReply]" = collections.OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # rows follow _entries order; None when stale
+        self._dirty = False  # lookups changed hit counts / LRU order since the last save
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable response cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, entry in stored.items():
+            # Entries from before context scoping can't be told apart from mid-conversation ones
+            if entry["expires"] > now and "context" in entry:
+                self._entries[key] = CachedReply(**entry)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({key: asdict(entry) for key, entry in self._entries.items()}, f, ensure_ascii=False)
+        os.replace(temp, self.path)
+        self._dirty = False
+
+    def flush(self):
+        """Write out hit counts and LRU order changed by lookups since the last save"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    @staticmethod
+    def _key(normalized: str, context: str) -> str:
+        return f"{context}:{normalized}"
+
+    def _nearest(self, vector: np.ndarray, context: str) -> Optional[str]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix = np.stack([embed(normalize(entry.utterance)) for entry in self._entries.values()])
+        same_context = np.array([entry.context == context for entry in self._entries.values()])
+        scores = np.where(same_context, self._matrix @ vector, -1.0)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return list(self._entries)[best]
+
+    def _expire(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry.expires <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, utterance: str, context: str = "") -> Optional[CachedReply]:
+        """
+        The cached reply for `utterance` or a close paraphrase of it, answered
+        after the same conversation (`context`, see context_digest())
+        """
+        if is_time_sensitive(utterance) or is_context_dependent(utterance):
+            return None
+        normalized = normalize(utterance)
+        key = self._key(normalized, context)
+        with self._lock:
+            self._expire(time.time())
+            if key not in self._entries:
+                key = self._nearest(embed(normalized), context)
+            if key is None:
+                self.misses += 1
+                return None
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            self._matrix = None
+            entry.hits += 1
+            self.hits += 1
+            self.latency_saved += entry.latency
+            self._dirty = True  # saved with the next store() or flush(), off the reply's path
+            return entry
+
+    def store(self, utterance: str, reply: str, latency: float, context: str = "") -> bool:
+        """Remember a chat reply given after `context`; False if it must not be cached"""
+        if not reply or is_time_sensitive(utterance) or is_time_sensitive(reply):
+            return False
+        if is_context_dependent(utterance):
+            return False
+        key = self._key(normalize(utterance), context)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = CachedReply(utterance, reply, now, now + self.ttl, latency, context=context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._save()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._save()
+
+    def entries(self) -> List[CachedReply]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_s": round(self.latency_saved, 2),
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"Response cache: {s['hit_rate'] * 100:.0f}% hit rate ({s['hits']}/{s['hits'] + s['misses']}), "
+            f"{s['latency_saved_s']:.1f}s of LLM time saved, {s['entries']} entries"
+        )
+
+
+_cache: Optional[ResponseCache] = None
+_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The shared cache, or None when Configs.RESPONSE_CACHE is off"""
+    global _cache
+    if not Configs.RESPONSE_CACHE:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the chat response cache")
+    parser.add_argument("command", choices=["stats", "list", "clear"])
+    parser.add_argument("--path", default=Configs.RESPONSE_CACHE_PATH)
+    args = parser.parse_args()
+
+    cache = ResponseCache(path=args.path)
+    if args.command == "clear":
+        count = len(cache.entries())
+        cache.clear()
+        print(f"Cleared {count} cached replies from {args.path}")
+    elif args.command == "list":
+        now = time.time()
+        for entry in cache.entries():
+            print(f"[{entry.hits:>3} hits, {(entry.expires - now) / 3600:>5.1f}h left] "
+                  f"{entry.utterance!r} -> {entry.reply[:80]!r}")
+    else:
+        entries = cache.entries()
+        print(f"{len(entries)} cached replies in {args.path}")
+        print(f"{sum(e.hits for e in entries)} hits recorded, "
+              f"{sum(e.hits * e.latency for e in entries):.1f}s of LLM time saved")
+
+
+if __name__ == "__main__":
+    main()
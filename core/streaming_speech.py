@@ -0,0 +1,274 @@
+# streaming_speech.py
+"""
+Speak an LLM reply while it is still being generated.
+
+Tokens are cut into sentences (or long clauses) as they arrive - including the
+Hindi danda (। ॥) and the loose punctuation of Hinglish replies - and each
+segment is queued on the speech service immediately, so the first sentence
+plays while later tokens are still streaming in. Each segment's language is
+detected on its own, so a Hinglish reply switches voice (or engine, through the
+TTS router) mid-reply.
+
+Time-to-first-audio (user finished speaking -> first word spoken) is logged
+for every turn.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.language_id import speech_language
+from core.text_to_speech import SpeechHandle, get_speech_service
+
+logger = logging.getLogger(__name__)
+
+# Terminator run, optional closing quotes/brackets, then whitespace. Danda needs no space.
+_SENTENCE_END = re.compile(r'(?:[.!?…]+["\'”’)\]]*(?=\s)|[।॥]+["\'”’)\]]*)')
+_CLAUSE_END = re.compile(r'[,;:—–](?=\s)')
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "no", "approx", "sr", "jr"}
+
+
+class SentenceSegmenter:
+    """
+    Incremental sentence/clause splitter for streamed text.
+
+    A clause break (comma, semicolon, dash) only ends a segment once it is at
+    least `clause_min_chars` long - shorter for the very first segment, so
+    audio can start early - and anything longer than `max_chars` is split at
+    the last space.
+    """
+
+    def __init__(self, clause_min_chars: int = Configs.STREAM_CLAUSE_MIN_CHARS,
+                 first_clause_min_chars: int = Configs.STREAM_FIRST_CLAUSE_MIN_CHARS,
+                 max_chars: int = Configs.STREAM_MAX_SEGMENT_CHARS):
+        self.clause_min_chars = clause_min_chars
+        self.first_clause_min_chars = first_clause_min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._emitted = 0
+
+    def _is_abbreviation(self, end: int) -> bool:
+        if self._buffer[end - 1] != ".":
+            return False
+        words = self._buffer[:end].rstrip(".").split()
+        return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+    def _next_boundary(self) -> Optional[int]:
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if not self._is_abbreviation(match.end()):
+                return match.end()
+
+        min_chars = self.first_clause_min_chars if self._emitted == 0 else self.clause_min_chars
+        for match in _CLAUSE_END.finditer(self._buffer):
+            if match.end() >= min_chars:
+                return match.end()
+
+        if len(self._buffer) > self.max_chars:
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            return space if space > 0 else self.max_chars
+        return None
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns any segments that are now complete"""
+        self._buffer += text
+        segments = []
+        while True:
+            boundary = self._next_boundary()
+            if boundary is None:
+                return segments
+            segment = self._buffer[:boundary].strip()
+            self._buffer = self._buffer[boundary:].lstrip()
+            if segment:
+                segments.append(segment)
+                self._emitted += 1
+
+    def flush(self) -> List[str]:
+        """Whatever is left once the stream has ended"""
+        segment = self._buffer.strip()
+        self._buffer = ""
+        if segment:
+            self._emitted += 1
+            return [segment]
+        return []
+
+
+def iter_segments(chunks: Iterable[str], segmenter: Optional[SentenceSegmenter] = None) -> Iterator[str]:
+    segmenter = segmenter or SentenceSegmenter()
+    for chunk in chunks:
+        yield from segmenter.feed(chunk)
+    yield from segmenter.flush()
+
+
+class StreamingSpeaker:
+    """
+    Queues reply segments on the speech service as they are produced.
+
+    With the TTS router, segments the router would give to pyttsx3 are still
+    queued back to back (so synthesis overlaps playback), but each handle's
+    outcome and first-word latency go into the router's statistics. A handle
+    that fails, or starts but stays silent past TTS_FIRST_AUDIO_TIMEOUT, is
+    re-spoken - with everything queued behind it - through the router on the
+    next engine, and the rest of the reply stays off pyttsx3.
+    """
+
+    def __init__(self, rate: int = Constants.DEFAULT_TTS_RATE, volume: float = Constants.DEFAULT_TTS_VOLUME):
+        self.rate = rate
+        self.volume = volume
+        self.ttfa: List[float] = []
+
+    def speak(self, reply: Union[str, Iterable[str]], stop_event: Optional[threading.Event] = None,
+              turn_started: Optional[float] = None,
+              on_first_segment: Optional[Callable[[], None]] = None,
+              on_audio: Optional[Callable[[], None]] = None) -> str:
+        """
+        Speak a reply given as a string or a stream of text chunks; blocks until
+        playback ends or `stop_event` is set. Returns the text that was queued.
+
+        Pass `turn_started` (when the user finished speaking) on the first reply
+        of a turn to log time-to-first-audio. `on_first_segment` is called just
+        before the first segment is handed to the engine, `on_audio` once when
+        the first audio is heard.
+        """
+        chunks = [reply] if isinstance(reply, str) else reply
+        service = get_speech_service()
+        router = None
+        if Configs.TTS_ROUTER:
+            from core.tts_router import get_tts_router
+            router = get_tts_router()
+        handles: List[SpeechHandle] = []
+        pending: List[Tuple[SpeechHandle, str]] = []  # queued on pyttsx3, outcome not yet recorded
+        routed_audio: List[float] = []
+        spoken = []
+        pyttsx3_failed = False
+        heard = threading.Event()
+
+        def audio():
+            if on_audio is not None and not heard.is_set():
+                heard.set()
+                on_audio()
+
+        def queue(segment: str, lang: str) -> SpeechHandle:
+            handle = service.say(segment, self.rate, self.volume, lang=lang)
+            handle.when_started(audio)
+            handles.append(handle)
+            return handle
+
+        def routed_start():
+            routed_audio.append(time.perf_counter())
+            audio()
+
+        def route(segment: str, lang: str) -> bool:
+            return router.speak(segment, lang, stop_event, routed_start,
+                                exclude=("pyttsx3",) if pyttsx3_failed else ())
+
+        def settle(block: bool) -> bool:
+            """Record finished handles; re-route the rest after a failure. False if stopped."""
+            nonlocal pyttsx3_failed
+            retry = self._settle(pending, router, stop_event, block)
+            if retry is None:
+                return True
+            pyttsx3_failed = True
+            return all(route(segment, lang) for segment, lang in retry)
+
+        try:
+            for segment in iter_segments(chunks):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if not spoken and on_first_segment is not None:
+                    on_first_segment()
+                spoken.append(segment)
+                lang = speech_language(segment)
+                if router is None:
+                    queue(segment, lang)
+                    continue
+                if not settle(block=False):
+                    break
+                if pyttsx3_failed or router.select(lang, len(segment)).name != "pyttsx3":
+                    # Other engines play as they are called: let the queued segments finish first
+                    if not settle(block=True) or not route(segment, lang):
+                        break
+                    continue
+                pending.append((queue(segment, lang), lang))
+            if router is None:
+                self._wait(handles, stop_event)
+            else:
+                settle(block=True)
+        finally:
+            if stop_event is not None and stop_event.is_set():
+                for handle in handles:
+                    handle.cancel()
+        if turn_started is not None:
+            first = handles[0] if handles else None
+            # A handle that was re-routed never played; its start time doesn't count
+            queued_audio = first and (first.first_word_at or (None if pyttsx3_failed else first.started_at))
+            self._record([queued_audio] + routed_audio[:1], len(spoken), turn_started)
+        return " ".join(spoken)
+
+    @staticmethod
+    def _wait(handles: List[SpeechHandle], stop_event: Optional[threading.Event]):
+        for handle in handles:
+            if stop_event is None:
+                handle.future.exception()  # waits; failures are logged by the service
+                continue
+            while not handle.done():
+                if stop_event.wait(0.02):
+                    return
+
+    @staticmethod
+    def _settle(pending: List[Tuple[SpeechHandle, str]], router, stop_event: Optional[threading.Event],
+                block: bool) -> Optional[List[Tuple[str, str]]]:
+        """
+        Report finished pyttsx3 handles (oldest first) to the router; with
+        `block`, wait for all of them. On a failed or stalled handle, cancel it
+        and everything queued behind it and return their (segment, lang) pairs
+        for another engine; None otherwise.
+        """
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            handle, lang = pending[0]
+            if not handle.done():
+                stalled = (handle.started_at is not None and handle.first_word_at is None
+                           and time.perf_counter() - handle.started_at > router.first_audio_timeout)
+                if stalled:
+                    router.record_failure("pyttsx3", "slow")
+                    logger.warning(f"pyttsx3 produced no audio within {router.first_audio_timeout}s, falling back")
+                    break
+                if not block:
+                    return None
+                handle.audio_started.wait(0.02)
+                continue
+            pending.pop(0)
+            error = handle.future.exception()
+            if error is not None:
+                router.record_failure("pyttsx3", str(error))
+                pending.insert(0, (handle, lang))
+                break
+            if handle.first_word_at is not None and handle.started_at is not None:
+                router.record_success("pyttsx3", lang, len(handle.text), handle.first_word_at - handle.started_at)
+        else:
+            return None
+
+        retry = [(handle.text, lang) for handle, lang in pending]
+        for handle, _ in pending:
+            handle.cancel()
+        pending.clear()
+        return retry
+
+    def _record(self, first_audio: List[Optional[float]], segments: int, turn_started: float):
+        """Log TTFA from the earliest of the candidate first-audio times"""
+        heard = [t for t in first_audio if t is not None]
+        if heard:
+            self._log_ttfa(min(heard) - turn_started, segments)
+
+    def _log_ttfa(self, ttfa: float, segments: int):
+        self.ttfa.append(ttfa)
+        ordered = sorted(self.ttfa)
+        logger.info(
+            f"Time to first audio: {ttfa * 1000:.0f} ms ({segments} segments; "
+            f"median {ordered[len(ordered) // 2] * 1000:.0f} ms over {len(ordered)} turns)"
+        )
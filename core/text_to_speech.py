@@ -1,18 +1,372 @@
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional
+
 import pyttsx3
 
-def text_to_speech(text, rate=150, volume=2.0):
-    engine = pyttsx3.init()
-    engine.setProperty('rate', rate)  # Speed of speech
-    engine.setProperty('volume', volume)  # Volume (0.0 to 1.0)
-    
-    voices = engine.getProperty('voices')
-    if voices:
-        engine.setProperty('voice', voices[0].id)  # type: ignore
+from configs.constant import Constants
+from core import audio_player
+from core.language_id import speech_language
+from core.tts_cache import TTSCache, get_message_catalog, get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities: speech always goes ahead of background pre-rendering
+_SPEAK = 0
+_RENDER = 1
+
+
+def _voice_language(voice) -> Optional[str]:
+    """Two-letter language of a pyttsx3 voice, from its languages list or its name"""
+    for language in getattr(voice, "languages", None) or []:
+        if isinstance(language, bytes):
+            # espeak prefixes a priority byte: b"\x05en-us"
+            language = "".join(ch for ch in language.decode("ascii", "ignore") if ch.isprintable())
+        code = str(language).strip().lower().replace("_", "-").split("-")[0]
+        if len(code) == 2 and code.isalpha():
+            return code
+    name = f"{getattr(voice, 'name', '')} {getattr(voice, 'id', '')}".lower()
+    for word, code in (("hindi", "hi"), ("english", "en")):
+        if word in name:
+            return code
+    return None
+
+
+class SpeechHandle:
+    """
+    A queued utterance. Wait on it (blocking or `await handle`) or cancel it;
+    cancelling a playing utterance stops it at the next word.
+    """
+
+    def __init__(self, text: str, rate: int, volume: float, kind: str = "speak",
+                 lang: Optional[str] = None):
+        self.text = text
+        self.rate = rate
+        self.volume = volume
+        self.lang = lang  # picks the voice; None for the default one
+        self.kind = kind  # "speak", "render" (into the cache) or "synthesize" (return the audio)
+        self.future: Future = Future()
+        self.cancelled = threading.Event()
+        self.audio_started = threading.Event()
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.first_word_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._on_start: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def mark_started(self):
+        with self._lock:
+            if self.first_word_at is not None:
+                return
+            self.first_word_at = time.perf_counter()
+            self.audio_started.set()
+            callbacks, self._on_start = self._on_start, []
+        for callback in callbacks:
+            callback()
+
+    def when_started(self, callback: Callable[[], None]):
+        """Call `callback` when the first word is heard (right away if it has been)"""
+        with self._lock:
+            if self.first_word_at is None:
+                self._on_start.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until spoken; False if it was cancelled"""
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        return self.started_at - self.queued_at if self.started_at else None
+
+    @property
+    def synthesis_latency(self) -> Optional[float]:
+        """Engine start to first word spoken"""
+        return self.first_word_at - self.started_at if self.first_word_at and self.started_at else None
+
+
+class SpeechService(threading.Thread):
+    """
+    Owns one pyttsx3 engine on a dedicated thread and speaks queued utterances.
+
+    Fixed phrases (see core/tts_cache.py) are played from the TTS cache when
+    they have been rendered before; otherwise they are spoken live and a
+    render is queued behind any pending speech.
+    """
+
+    def __init__(self, voice_index: int = 0):
+        super().__init__(name="tts-engine", daemon=True)
+        self.voice_index = voice_index
+        self.voice_id: Optional[str] = None
+        self.voices: Dict[str, str] = {}  # language -> voice id
+        # Cached clips are played through pygame; without it everything is live
+        self.cache = get_tts_cache() if audio_player.available() else None
+        self.catalog = get_message_catalog()
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._current: Optional[SpeechHandle] = None
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+        self.latencies: List[float] = []
+        self.spoken = 0
+        self.cancelled = 0
+
+    def _init_engine(self):
+        engine = pyttsx3.init()
+        voices = engine.getProperty('voices')
+        if voices:
+            self.voice_id = voices[min(self.voice_index, len(voices) - 1)].id  # type: ignore
+            engine.setProperty('voice', self.voice_id)
+            for voice in voices:  # type: ignore
+                language = _voice_language(voice)
+                if language and language not in self.voices:
+                    self.voices[language] = voice.id
+            # The configured voice wins for its own language
+            default_language = _voice_language(voices[min(self.voice_index, len(voices) - 1)])  # type: ignore
+            if default_language:
+                self.voices[default_language] = self.voice_id
+
+        # pyttsx3 can only be stopped safely from its own callbacks
+        def on_word(name, location, length):
+            current = self._current
+            if current is None:
+                return
+            current.mark_started()
+            if current.cancelled.is_set():
+                engine.stop()
+        engine.connect('started-word', on_word)
+        return engine
+
+    def run(self):
+        try:
+            engine = self._init_engine()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            logger.error(f"Text-to-speech engine failed to start: {e}")
+            return
+        self._ready.set()
+
+        rate = volume = None
+        voice = self.voice_id
+        while True:
+            priority, _, handle = self._queue.get()
+            if handle is None:
+                break
+            if handle.cancelled.is_set():
+                self.cancelled += 1
+                handle.future.set_result(False)
+                continue
+            try:
+                # Only touch properties that changed; each set is a driver round-trip
+                if handle.rate != rate:
+                    engine.setProperty('rate', handle.rate)
+                    rate = handle.rate
+                if handle.volume != volume:
+                    engine.setProperty('volume', handle.volume)
+                    volume = handle.volume
+                wanted = self.voice_for(handle.lang)
+                if wanted and wanted != voice:
+                    engine.setProperty('voice', wanted)
+                    voice = wanted
+                if handle.kind != "speak":
+                    audio = self._render(engine, handle)
+                    handle.future.set_result(audio if handle.kind == "synthesize" else True)
+                    continue
+                self._current = handle
+                handle.started_at = time.perf_counter()
+                self._speak(engine, handle)
+            except Exception as e:
+                logger.error(f"Text-to-speech failed: {e}")
+                handle.future.set_exception(e)
+                continue
+            finally:
+                self._current = None
+                handle.finished_at = time.perf_counter()
+            self._finish(handle)
+
+    def voice_for(self, lang: Optional[str]) -> Optional[str]:
+        """Voice id for `lang`, falling back to the default voice"""
+        return self.voices.get(lang, self.voice_id) if lang else self.voice_id
+
+    def supports_language(self, lang: str) -> bool:
+        return lang in self.voices
+
+    def _cache_key(self, text: str, rate: int, lang: Optional[str] = None) -> str:
+        return TTSCache.key(text, "pyttsx3", self.voice_for(lang), rate)
+
+    def _speak(self, engine, handle: SpeechHandle):
+        parts = self.catalog.split(handle.text) if self.cache else [(handle.text, False)]
+        for text, fixed in parts:
+            if handle.cancelled.is_set():
+                return
+            path = self.cache.get(self._cache_key(text, handle.rate, handle.lang)) if fixed else None
+            if path:
+                audio_player.play_file(path, handle.cancelled, on_start=handle.mark_started)
+                continue
+            engine.say(text)
+            engine.runAndWait()
+            if fixed:
+                self._put(_RENDER, SpeechHandle(text, handle.rate, handle.volume, "render", handle.lang))
+
+    def _render(self, engine, handle: SpeechHandle) -> Optional[bytes]:
+        """Synthesize to a WAV; renders go into the cache, syntheses are returned"""
+        key = self._cache_key(handle.text, handle.rate, handle.lang)
+        if handle.kind == "render" and self.cache.contains(key):
+            return None
+        fd, temp = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            engine.save_to_file(handle.text, temp)
+            engine.runAndWait()
+            with open(temp, "rb") as f:
+                data = f.read()
+            if data and handle.kind == "render":
+                self.cache.put(key, data, ".wav")
+            return data
+        finally:
+            os.remove(temp)
+
+    def _put(self, priority: int, handle: Optional[SpeechHandle]):
+        self._queue.put((priority, next(self._sequence), handle))
+
+    def _finish(self, handle: SpeechHandle):
+        interrupted = handle.cancelled.is_set()
+        if interrupted:
+            self.cancelled += 1
+        else:
+            self.spoken += 1
+        if handle.synthesis_latency is not None:
+            self.latencies.append(handle.synthesis_latency)
+            logger.debug(
+                f"TTS: queued {handle.queue_wait * 1000:.0f} ms, first word after "
+                f"{handle.synthesis_latency * 1000:.0f} ms, {len(handle.text)} chars"
+            )
+        handle.future.set_result(not interrupted)
+
+    def say(self, text: str, rate: int = Constants.DEFAULT_TTS_RATE,
+            volume: float = Constants.DEFAULT_TTS_VOLUME, kind: str = "speak",
+            lang: Optional[str] = None) -> SpeechHandle:
+        """
+        Queue `text` (in the voice for `lang`, by default the language of the
+        text); returns immediately with a handle
+        """
+        if not self.is_alive() and not self._ready.is_set():
+            self.start()
+        self._ready.wait()
+        handle = SpeechHandle(text, rate, volume, kind, lang or speech_language(text))
+        if self._error is not None:
+            handle.future.set_exception(self._error)
+            return handle
+        self._put(_SPEAK, handle)
+        return handle
+
+    def prerender(self, texts: Iterable[str], rate: int = Constants.DEFAULT_TTS_RATE,
+                  volume: float = Constants.DEFAULT_TTS_VOLUME, lang: Optional[str] = None) -> int:
+        """
+        Queue background renders of `texts` that aren't cached yet; returns how
+        many. Keys and voices are resolved as say() does, so the clips are hits.
+        """
+        if self.cache is None:
+            return 0
+        if not self.is_alive() and not self._ready.is_set():
+            self.start()
+        self._ready.wait()
+        queued = 0
+        for text in texts:
+            text_lang = lang or speech_language(text)
+            if not self.cache.contains(self._cache_key(text, rate, text_lang)):
+                self._put(_RENDER, SpeechHandle(text, rate, volume, "render", text_lang))
+                queued += 1
+        return queued
+
+    def is_cached(self, text: str, rate: int = Constants.DEFAULT_TTS_RATE,
+                  lang: Optional[str] = None) -> bool:
+        """Whether `text` will play from a rendered clip rather than live"""
+        return self.cache is not None and self.cache.contains(
+            self._cache_key(text, rate, lang or speech_language(text)))
+
+    def synthesize(self, text: str, rate: int = Constants.DEFAULT_TTS_RATE,
+                   volume: float = Constants.DEFAULT_TTS_VOLUME,
+                   lang: Optional[str] = None) -> SpeechHandle:
+        """Render `text` to WAV bytes (the handle's result) without playing it"""
+        return self.say(text, rate, volume, kind="synthesize", lang=lang)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, float]:
+        ordered = sorted(self.latencies)
+        return {
+            "queue_depth": self.queue_depth,
+            "spoken": self.spoken,
+            "cancelled": self.cancelled,
+            "latency_ms_p50": 1000 * ordered[len(ordered) // 2] if ordered else 0.0,
+            "latency_ms_max": 1000 * ordered[-1] if ordered else 0.0,
+        }
+
+    def shutdown(self, timeout: Optional[float] = 2.0):
+        self._put(_SPEAK, None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+_service: Optional[SpeechService] = None
+_service_lock = threading.Lock()
+
+
+def get_speech_service() -> SpeechService:
+    """The process-wide speech service (engine starts on first use)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SpeechService()
+            _service.start()
+        return _service
+
 
-    engine.say(text)
-    engine.runAndWait()
+def text_to_speech(text, rate=Constants.DEFAULT_TTS_RATE, volume=Constants.DEFAULT_TTS_VOLUME,
+                   stop_event=None, on_start=None, lang=None):
+    """
+    Speak `text` and block until done (or until `stop_event` is set).
+    `on_start` is called when the first word is heard.
+    """
+    handle = get_speech_service().say(text, rate, volume, lang=lang)
+    if stop_event is None and on_start is None:
+        return handle.wait()
+    notified = on_start is None
+    while not handle.done():
+        if not notified and handle.audio_started.is_set():
+            on_start()
+            notified = True
+        if stop_event is None:
+            if notified:
+                break
+            handle.audio_started.wait(0.02)
+        elif stop_event.wait(0.02):
+            handle.cancel()
+            break
+    return handle.wait()
 
 if __name__ == "__main__":
     # text_to_speech("Hello, this is a text to speech test.")
     text_to_speech("नमस्ते, आप कैसे हैं?")
-    
\ No newline at end of file
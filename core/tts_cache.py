@@ -0,0 +1,248 @@
+# tts_cache.py
+"""
+Content-addressed on-disk cache of rendered speech.
+
+Audio is stored under a SHA-256 of (text, engine, voice, rate, lang), so the
+same phrase spoken with the same settings is synthesized once - for gTTS that
+saves a network round-trip, for pyttsx3 the synthesis time. Entries are
+evicted least-recently-used once the cache exceeds TTS_CACHE_MAX_MB.
+
+Fixed phrases from configs/messages.py are pre-rendered in the background at
+startup. Templated messages ("Volume set to {level}%.") are matched against
+what is being spoken and split into parts: the fixed fragments come from the
+cache and only the variable values are synthesized live.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from configs import messages
+from configs.config import Configs
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """Rendered audio on disk, LRU-evicted by total size"""
+
+    def __init__(self, directory: str = Configs.TTS_CACHE_DIR,
+                 max_bytes: int = int(Configs.TTS_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[str, Tuple[str, int]]" = collections.OrderedDict()
+        self._bytes = 0
+        self._load()
+
+    @staticmethod
+    def key(text: str, engine: str, voice: Optional[str] = None,
+            rate: Optional[float] = None, lang: Optional[str] = None) -> str:
+        payload = json.dumps([text.strip(), engine, voice, rate, lang], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        """Index what is already on disk, oldest access first"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                found.append((stat.st_mtime, os.path.splitext(name)[0], path, stat.st_size))
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self._bytes += size
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{ext}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached audio, or None; counts towards the hit rate"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not os.path.exists(entry[0]):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Persist recency for the next run's LRU order
+        os.utime(entry[0])
+        return entry[0]
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, data: bytes, ext: str) -> str:
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries[key][1]
+            self._entries[key] = (path, len(data))
+            self._entries.move_to_end(key)
+            self._bytes += len(data)
+            self._evict()
+        return path
+
+    def _drop(self, key: str):
+        path, size = self._entries.pop(key)
+        self._bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes_stored": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"TTS cache: {s['hit_rate'] * 100:.0f}% hit rate ({s['hits']}/{s['hits'] + s['misses']}), "
+            f"{s['entries']} clips, {s['bytes_stored'] / 1024:.0f} KB stored"
+        )
+
+
+_FIELD = re.compile(r"\{[^{}]*\}")
+
+
+def _is_fixed(fragment: str) -> bool:
+    """Fragments with words are worth caching; bare punctuation is spoken with the value"""
+    return bool(re.search(r"\w", fragment))
+
+
+class MessageCatalog:
+    """
+    Every speakable constant in configs/messages.py: plain phrases, plus
+    templated ones compiled into patterns that recover the fixed fragments.
+    """
+
+    def __init__(self, module=messages):
+        self.phrases: List[str] = []
+        self.templates: List[Tuple[re.Pattern, List[str]]] = []
+        for group in vars(module).values():
+            if not isinstance(group, type):
+                continue
+            for name, value in vars(group).items():
+                if name.isupper() and isinstance(value, str):
+                    self._add(value)
+
+    def _add(self, text: str):
+        if not _FIELD.search(text):
+            self.phrases.append(text)
+            return
+        fragments = _FIELD.split(text)
+        pattern = "".join(
+            re.escape(fragment) + ("(.+?)" if i < len(fragments) - 1 else "")
+            for i, fragment in enumerate(fragments)
+        )
+        self.templates.append((re.compile(f"^{pattern}$", re.DOTALL), fragments))
+
+    @property
+    def fragments(self) -> List[str]:
+        """Everything worth pre-rendering"""
+        parts = list(self.phrases)
+        for _, fragments in self.templates:
+            parts.extend(f.strip() for f in fragments if _is_fixed(f))
+        return list(dict.fromkeys(parts))
+
+    def split(self, text: str) -> List[Tuple[str, bool]]:
+        """
+        Split `text` into (part, is_fixed) pieces. A templated message yields
+        its fixed fragments and the values in between; anything else is one piece.
+        """
+        text = text.strip()
+        if text in self.phrases:
+            return [(text, True)]
+        for pattern, fragments in self.templates:
+            match = pattern.match(text)
+            if not match:
+                continue
+            parts: List[Tuple[str, bool]] = []
+            pieces = []
+            for i, fragment in enumerate(fragments):
+                pieces.append((fragment, _is_fixed(fragment)))
+                if i < len(match.groups()):
+                    pieces.append((match.group(i + 1), False))
+            for piece, fixed in pieces:
+                if not fixed and parts and not parts[-1][1]:
+                    parts[-1] = (parts[-1][0] + piece, False)  # "40" + "%."
+                else:
+                    parts.append((piece, fixed))
+            return [(part.strip(), fixed) for part, fixed in parts if part.strip()]
+        return [(text, False)]
+
+
+def prerender_in_background(render: Callable[[str], None], catalog: MessageCatalog,
+                            on_done: Optional[Callable[[], None]] = None) -> threading.Thread:
+    """Call `render(text)` for every catalog fragment on a low-priority thread"""
+
+    def run():
+        for text in catalog.fragments:
+            try:
+                render(text)
+            except Exception as e:
+                logger.warning(f"Pre-rendering '{text}' failed: {e}")
+        if on_done is not None:
+            on_done()
+
+    thread = threading.Thread(target=run, name="tts-prerender", daemon=True)
+    thread.start()
+    return thread
+
+
+_cache: Optional[TTSCache] = None
+_catalog: Optional[MessageCatalog] = None
+_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """The shared cache, or None when Configs.TTS_CACHE is off"""
+    global _cache
+    if not Configs.TTS_CACHE:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
+
+
+def get_message_catalog() -> MessageCatalog:
+    global _catalog
+    with _lock:
+        if _catalog is None:
+            _catalog = MessageCatalog()
+        return _catalog
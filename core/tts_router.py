@@ -0,0 +1,315 @@
+# tts_router.py
+"""
+Chooses a text-to-speech engine per utterance.
+
+Each engine keeps rolling first-audio latency per (language, length bucket)
+and a rolling success rate. Requests go to the engine expected to start
+speaking soonest for that language and length; an engine that errors or
+doesn't produce audio within TTS_FIRST_AUDIO_TIMEOUT is abandoned for the
+next one, and after repeated failures it is skipped for TTS_ENGINE_COOLDOWN
+seconds.
+
+With TTS_RACE_MODE the two best engines synthesize the first sentence in
+parallel and the one that finishes first is played (it then speaks the rest).
+"""
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from configs.config import Configs
+from core import audio_player
+from core.language_id import speech_language
+from core.streaming_speech import iter_segments
+
+logger = logging.getLogger(__name__)
+
+_LENGTH_BUCKETS = (40, 120, 300)  # characters
+
+
+def length_bucket(chars: int) -> int:
+    for index, limit in enumerate(_LENGTH_BUCKETS):
+        if chars <= limit:
+            return index
+    return len(_LENGTH_BUCKETS)
+
+
+class EngineStats:
+    """Rolling latency and failure statistics for one engine"""
+
+    def __init__(self, prior_latency: float, window: int = 20):
+        self.prior_latency = prior_latency
+        self.window = window
+        self.latencies: Dict[Tuple[str, int], Deque[float]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=window))
+        self.outcomes: Deque[bool] = collections.deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.disabled_until = 0.0
+        self.requests = 0
+        self.wins = 0
+
+    def expected_latency(self, lang: str, chars: int) -> float:
+        samples = self.latencies.get((lang, length_bucket(chars)))
+        if not samples:
+            # Nothing for this bucket yet: fall back to anything seen in this language
+            samples = [x for (l, _), values in self.latencies.items() if l == lang for x in values]
+        if not samples:
+            return self.prior_latency
+        ordered = sorted(samples)
+        return ordered[len(ordered) // 2]
+
+    def record_success(self, lang: str, chars: int, latency: float):
+        self.requests += 1
+        self.latencies[(lang, length_bucket(chars))].append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_failure(self, reason: str):
+        self.requests += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= Configs.TTS_MAX_CONSECUTIVE_FAILURES:
+            self.disabled_until = time.monotonic() + Configs.TTS_ENGINE_COOLDOWN
+            logger.warning(f"TTS engine disabled for {Configs.TTS_ENGINE_COOLDOWN}s after "
+                           f"{self.consecutive_failures} failures ({reason})")
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.disabled_until
+
+    @property
+    def failure_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class TTSEngine:
+    """A speech engine the router can pick"""
+
+    name = "engine"
+    languages: Optional[Set[str]] = None  # None: any language
+    prior_latency = 1.0  # assumed first-audio latency before anything is measured
+
+    def supports(self, lang: str) -> bool:
+        return self.languages is None or lang in self.languages
+
+    def speak(self, text: str, lang: str, stop_event: threading.Event,
+              on_start: Callable[[], None]) -> bool:
+        """Speak and block; call `on_start` when audio begins. False if stopped."""
+        raise NotImplementedError
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        """Encoded audio for `text` without playing it (used by race mode)"""
+        raise NotImplementedError
+
+
+class Pyttsx3Engine(TTSEngine):
+    name = "pyttsx3"
+    languages = {"en"}  # the default SAPI/espeak/NSSS voice
+    prior_latency = 0.3
+
+    def supports(self, lang):
+        from core.text_to_speech import get_speech_service
+        return lang in self.languages or get_speech_service().supports_language(lang)
+
+    def speak(self, text, lang, stop_event, on_start):
+        from core.text_to_speech import text_to_speech
+        return text_to_speech(text, stop_event=stop_event, on_start=on_start, lang=lang)
+
+    def synthesize(self, text, lang):
+        from core.text_to_speech import get_speech_service
+        return get_speech_service().synthesize(text, lang=lang).wait()
+
+
+class GTTSEngine(TTSEngine):
+    name = "gtts"
+    prior_latency = 1.0  # network round-trip
+
+    def speak(self, text, lang, stop_event, on_start):
+        from core.google_text_to_speech import google_text_to_speech
+        google_text_to_speech(text, lang=lang, stop_event=stop_event, on_start=on_start)
+        return not stop_event.is_set()
+
+    def synthesize(self, text, lang):
+        from core.google_text_to_speech import render_google_speech
+        return render_google_speech(text, lang)
+
+
+class TTSRouter:
+    """Latency-aware engine selection with fallback and optional racing"""
+
+    def __init__(self, engines: Optional[List[TTSEngine]] = None,
+                 first_audio_timeout: float = Configs.TTS_FIRST_AUDIO_TIMEOUT,
+                 race: bool = Configs.TTS_RACE_MODE):
+        self.engines = engines or [Pyttsx3Engine(), GTTSEngine()]
+        self.stats: Dict[str, EngineStats] = {e.name: EngineStats(e.prior_latency) for e in self.engines}
+        self.first_audio_timeout = first_audio_timeout
+        self.race = race and audio_player.available()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts-router")
+
+    def rank(self, lang: str, chars: int) -> List[TTSEngine]:
+        """Engines to try, best first: language support, then health, then expected latency"""
+        def score(engine: TTSEngine):
+            stats = self.stats[engine.name]
+            return (not engine.supports(lang), not stats.available,
+                    stats.expected_latency(lang, chars))
+        return sorted(self.engines, key=score)
+
+    def select(self, lang: str, chars: int) -> TTSEngine:
+        return self.rank(lang, chars)[0]
+
+    @staticmethod
+    def language_of(text: str) -> str:
+        return speech_language(text)
+
+    def speak(self, text: str, lang: Optional[str] = None,
+              stop_event: Optional[threading.Event] = None,
+              on_start: Optional[Callable[[], None]] = None,
+              exclude: Iterable[str] = ()) -> bool:
+        """
+        Speak `text` with the best engine, falling back on errors or slowness.
+        `on_start` is called once, when the first audio is heard. Engines named
+        in `exclude` (e.g. one that just failed on this reply) are skipped.
+        """
+        lang = lang or self.language_of(text)
+        stop_event = stop_event or threading.Event()
+        on_start = on_start or (lambda: None)
+        if self.race and not exclude:
+            result = self._race(text, lang, stop_event, on_start)
+            if result is not None:
+                return result
+        for engine in self.rank(lang, len(text)):
+            if engine.name in exclude:
+                continue
+            if stop_event.is_set():
+                return False
+            result = self._attempt(engine, text, lang, stop_event, on_start)
+            if result is not None:
+                return result
+        logger.error("All text-to-speech engines failed")
+        return False
+
+    def record_success(self, engine: str, lang: str, chars: int, latency: float):
+        """First-audio latency of an utterance spoken outside speak() (e.g. queued on pyttsx3)"""
+        self.stats[engine].record_success(lang, chars, latency)
+
+    def record_failure(self, engine: str, reason: str):
+        self.stats[engine].record_failure(reason)
+
+    def _attempt(self, engine: TTSEngine, text: str, lang: str, stop_event: threading.Event,
+                 on_start: Callable[[], None]) -> Optional[bool]:
+        """Speak with one engine; None means it failed or was too slow to start"""
+        stats = self.stats[engine.name]
+        attempt_stop = threading.Event()
+        started = threading.Event()
+
+        def mark_started():
+            if not attempt_stop.is_set():
+                started.set()
+                on_start()
+
+        requested = time.perf_counter()
+        future = self._pool.submit(engine.speak, text, lang, attempt_stop, mark_started)
+
+        deadline = requested + self.first_audio_timeout
+        while not started.is_set() and not future.done():
+            if stop_event.is_set():
+                attempt_stop.set()
+                return False
+            if time.perf_counter() > deadline:
+                attempt_stop.set()
+                stats.record_failure("slow")
+                logger.warning(f"{engine.name} produced no audio within {self.first_audio_timeout}s, falling back")
+                return None
+            started.wait(0.02)
+
+        if not started.is_set():
+            # Finished without ever producing audio: an error (or nothing to say)
+            error = future.exception()
+            if error is not None:
+                stats.record_failure(str(error))
+                logger.warning(f"{engine.name} failed: {error}")
+                return None
+            return future.result()
+
+        stats.record_success(lang, len(text), time.perf_counter() - requested)
+        while not future.done():
+            if stop_event.wait(0.02):
+                attempt_stop.set()
+                break
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"{engine.name} failed mid-utterance: {error}")
+            return False
+        return future.result() and not stop_event.is_set()
+
+    def _race(self, text: str, lang: str, stop_event: threading.Event,
+              on_start: Callable[[], None]) -> Optional[bool]:
+        """Synthesize the first sentence on the two best engines; play the first one back"""
+        segments = list(iter_segments([text]))
+        if not segments:
+            return True
+        first, rest = segments[0], " ".join(segments[1:])
+        candidates = [e for e in self.rank(lang, len(first)) if e.supports(lang)][:2]
+        if len(candidates) < 2:
+            return None
+
+        requested = time.perf_counter()
+        futures = {self._pool.submit(engine.synthesize, first, lang): engine for engine in candidates}
+        pending = set(futures)
+        winner, audio = None, None
+        while pending and winner is None:
+            done, pending = wait(pending, timeout=self.first_audio_timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                engine = futures[future]
+                if future.exception() is not None:
+                    self.stats[engine.name].record_failure(str(future.exception()))
+                elif winner is None:
+                    winner, audio = engine, future.result()
+        if winner is None:
+            return None
+
+        stats = self.stats[winner.name]
+        stats.record_success(lang, len(first), time.perf_counter() - requested)
+        stats.wins += 1
+        if not audio_player.play_buffer(audio, stop_event, on_start):
+            return False
+        if rest:
+            return self._attempt(winner, rest, lang, stop_event, lambda: None) is not False
+        return True
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "requests": stats.requests,
+                "failure_rate": stats.failure_rate,
+                "expected_latency_en": stats.expected_latency("en", 60),
+                "race_wins": stats.wins,
+                "available": stats.available,
+            }
+            for name, stats in self.stats.items()
+        }
+
+
+_router: Optional[TTSRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_tts_router() -> TTSRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = TTSRouter()
+        return _router
+
+
+def speak(text: str, lang: Optional[str] = None, stop_event: Optional[threading.Event] = None) -> bool:
+    """Speak through the shared router (drop-in for text_to_speech)"""
+    if not Configs.TTS_ROUTER:
+        from core.text_to_speech import text_to_speech
+        return text_to_speech(text, stop_event=stop_event)
+    return get_tts_router().speak(text, lang, stop_event)
@@ -0,0 +1,345 @@
+# wake_word.py
+"""
+On-device wake-word spotting.
+
+Each alias ("jarvis", "eva", ...) is enrolled from a handful of short WAV
+recordings. Incoming audio is turned into MFCC frames with NumPy and compared
+against those templates with a vectorised subsequence DTW, so the assistant
+can wake up without sending idle audio over the network.
+
+Templates live in Configs.WAKE_WORD_TEMPLATE_DIR/<alias>/*.wav. To enroll:
+
+    python -m core.wake_word enroll jarvis recordings/jarvis_1.wav ...
+"""
+
+import collections
+import logging
+import os
+import shutil
+import sys
+import time
+import wave
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from configs.config import Configs
+from configs.constant import Constants
+from core.audio_pipeline import EnergyVAD, FrameSource, WavFrameSource, capture_segment
+
+logger = logging.getLogger(__name__)
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+def read_wav(path: str, sample_rate: int = Constants.AUDIO_SAMPLE_RATE) -> np.ndarray:
+    """Load a 16-bit WAV file as mono float32 samples at `sample_rate`"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != Constants.AUDIO_SAMPLE_WIDTH:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    samples = samples.astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate:
+        positions = np.arange(0, len(samples), rate / sample_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+class FeatureExtractor:
+    """Streaming MFCC front-end (25 ms windows, 10 ms hop)"""
+
+    def __init__(self, sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 n_mels: int = 26, n_ceps: int = 13, n_fft: int = 512):
+        self.sample_rate = sample_rate
+        self.win_length = int(0.025 * sample_rate)
+        self.hop_length = int(0.010 * sample_rate)
+        self.n_fft = n_fft
+        self.window = np.hamming(self.win_length).astype(np.float32)
+
+        # Triangular mel filterbank, shape (n_mels, n_fft // 2 + 1)
+        mel_points = np.linspace(_hz_to_mel(60), _hz_to_mel(sample_rate / 2 - 200), n_mels + 2)
+        bins = np.floor((n_fft + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+        self.filterbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+        for m in range(1, n_mels + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                self.filterbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                self.filterbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+
+        # DCT-II basis, dropping c0 (overall loudness)
+        k = np.arange(1, n_ceps)[:, None]
+        n = np.arange(n_mels)[None, :]
+        self.dct = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)).astype(np.float32)
+
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._last_sample = 0.0
+
+    def reset(self):
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._last_sample = 0.0
+
+    def compute(self, samples: np.ndarray) -> np.ndarray:
+        """MFCCs for a whole signal, shape (n_frames, n_ceps - 1)"""
+        samples = np.asarray(samples, dtype=np.float32)
+        emphasized = np.append(samples[:1], samples[1:] - 0.97 * samples[:-1])
+        return self._frames_to_mfcc(emphasized)
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """Feed streaming samples; returns MFCCs for every complete window"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(samples) == 0:
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        emphasized = samples - 0.97 * np.concatenate(([self._last_sample], samples[:-1]))
+        self._last_sample = float(samples[-1])
+
+        buffer = np.concatenate((self._tail, emphasized))
+        features = self._frames_to_mfcc(buffer)
+        consumed = len(features) * self.hop_length
+        self._tail = buffer[consumed:]
+        return features
+
+    def _frames_to_mfcc(self, signal: np.ndarray) -> np.ndarray:
+        if len(signal) < self.win_length:
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        n_frames = 1 + (len(signal) - self.win_length) // self.hop_length
+        frames = np.lib.stride_tricks.as_strided(
+            signal,
+            shape=(n_frames, self.win_length),
+            strides=(signal.strides[0] * self.hop_length, signal.strides[0]),
+        ) * self.window
+        power = np.abs(np.fft.rfft(frames, n=self.n_fft)) ** 2
+        log_mel = np.log(power @ self.filterbank.T + 1e-6)
+        return (log_mel @ self.dct.T).astype(np.float32)
+
+
+def _normalize(features: np.ndarray) -> np.ndarray:
+    """Mean-normalise and scale rows to unit length for cosine distance"""
+    features = features - features.mean(axis=0, keepdims=True)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-6)
+
+
+def subsequence_dtw(template: np.ndarray, window: np.ndarray) -> np.ndarray:
+    """
+    Normalised DTW cost of `template` ending at every frame of `window`.
+
+    The start point in the window is free. Steps advance one template frame
+    at a time with a window slope of 0-2, so each row only depends on the
+    previous one and the recursion is vectorised over the window axis.
+    """
+    cost = 1.0 - template @ window.T  # cosine distance, shape (L, T)
+    acc = cost[0].copy()
+    for i in range(1, len(template)):
+        best = acc.copy()
+        best[1:] = np.minimum(best[1:], acc[:-1])
+        best[2:] = np.minimum(best[2:], acc[:-2])
+        acc = cost[i] + best
+    return acc / len(template)
+
+
+@dataclass
+class Detection:
+    alias: str
+    score: float  # normalised DTW distance, lower is better
+    timestamp: float  # seconds of audio processed when the keyword fired
+
+
+class KeywordSpotter:
+    """
+    Streaming keyword spotter.
+
+    Frames are fed through process_frame(). Matching only runs while the
+    energy VAD has seen speech recently and only every `check_every` frames,
+    which keeps idle CPU close to the cost of computing frame energy.
+    """
+
+    MIN_THRESHOLD = 0.18  # distance accepted at sensitivity 0.0
+    MAX_THRESHOLD = 0.42  # distance accepted at sensitivity 1.0
+
+    def __init__(self, templates: Dict[str, List[np.ndarray]],
+                 sample_rate: int = Constants.AUDIO_SAMPLE_RATE,
+                 frame_ms: int = Constants.AUDIO_FRAME_MS,
+                 sensitivity: float = Configs.WAKE_WORD_SENSITIVITY,
+                 check_every: int = 3, refractory: float = 1.0):
+        if not templates:
+            raise ValueError("KeywordSpotter needs at least one enrolled template")
+        self.extractor = FeatureExtractor(sample_rate)
+        self.templates = {
+            alias: [_normalize(self.extractor.compute(t)) for t in samples]
+            for alias, samples in templates.items()
+        }
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.sensitivity = sensitivity
+        self.check_every = check_every
+        self.refractory = refractory
+
+        longest = max(len(t) for ts in self.templates.values() for t in ts)
+        self.window_frames = int(longest * 1.5) + 2
+        self.features: Deque[np.ndarray] = collections.deque(maxlen=self.window_frames)
+        # Raw audio covering the same span, so the keyword can be re-transcribed
+        self.history: Deque[bytes] = collections.deque(maxlen=max(1, self.window_frames * 10 // frame_ms))
+        self.vad = EnergyVAD()
+        self.reset()
+
+    @property
+    def sensitivity(self) -> float:
+        return self._sensitivity
+
+    @sensitivity.setter
+    def sensitivity(self, value: float):
+        self._sensitivity = min(1.0, max(0.0, value))
+        self.threshold = self.MIN_THRESHOLD + self._sensitivity * (self.MAX_THRESHOLD - self.MIN_THRESHOLD)
+
+    @classmethod
+    def from_directory(cls, directory: str = Configs.WAKE_WORD_TEMPLATE_DIR,
+                       aliases: Optional[List[str]] = None, **kwargs) -> "KeywordSpotter":
+        aliases = aliases or Configs.WAKE_WORD_ALIASES
+        sample_rate = kwargs.get("sample_rate", Constants.AUDIO_SAMPLE_RATE)
+        templates: Dict[str, List[np.ndarray]] = {}
+        for alias in aliases:
+            alias_dir = os.path.join(directory, alias.lower())
+            if not os.path.isdir(alias_dir):
+                logger.warning(f"No wake-word templates for '{alias}' in {alias_dir}")
+                continue
+            files = sorted(f for f in os.listdir(alias_dir) if f.lower().endswith(".wav"))
+            templates[alias.lower()] = [read_wav(os.path.join(alias_dir, f), sample_rate) for f in files]
+            if not templates[alias.lower()]:
+                del templates[alias.lower()]
+        return cls(templates, **kwargs)
+
+    def reset(self):
+        self.extractor.reset()
+        self.features.clear()
+        self.history.clear()
+        self.vad.reset()
+        self.frames_seen = 0
+        self.last_speech_frame = -10 ** 9
+        self.last_detection_time = -10 ** 9
+        self.compute_time = 0.0
+
+    @property
+    def audio_time(self) -> float:
+        return self.frames_seen * self.frame_ms / 1000
+
+    def process_frame(self, frame: bytes) -> Optional[Detection]:
+        started = time.perf_counter()
+        try:
+            return self._process(frame)
+        finally:
+            self.compute_time += time.perf_counter() - started
+
+    def _process(self, frame: bytes) -> Optional[Detection]:
+        self.frames_seen += 1
+        self.history.append(frame)
+        if self.vad.is_speech(frame):
+            self.last_speech_frame = self.frames_seen
+
+        # Keep a short feature history even in silence so the onset of the
+        # keyword is present when speech starts
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        for row in self.extractor.push(samples):
+            self.features.append(row)
+
+        recently_active = (self.frames_seen - self.last_speech_frame) * self.frame_ms < 400
+        if not recently_active or self.frames_seen % self.check_every:
+            return None
+        if self.audio_time - self.last_detection_time < self.refractory:
+            return None
+        if len(self.features) < self.window_frames // 3:
+            return None
+
+        detection = self.best_match()
+        if detection and detection.score <= self.threshold:
+            self.last_detection_time = self.audio_time
+            return detection
+        return None
+
+    def recent_audio(self) -> bytes:
+        """PCM for the matching window, i.e. the keyword that just fired"""
+        return b"".join(self.history)
+
+    def best_match(self) -> Optional[Detection]:
+        """Best alias match ending within the last `check_every` frames"""
+        window = _normalize(np.stack(self.features))
+        tail = max(1, self.check_every * self.frame_ms // 10)
+        best: Optional[Detection] = None
+        for alias, templates in self.templates.items():
+            for template in templates:
+                if len(template) > len(window) * 2:
+                    continue
+                score = float(subsequence_dtw(template, window)[-tail:].min())
+                if best is None or score < best.score:
+                    best = Detection(alias=alias, score=score, timestamp=self.audio_time)
+        return best
+
+    def listen(self, source: FrameSource, timeout: Optional[float] = None) -> Optional[Detection]:
+        """Consume frames from the source until a keyword fires or timeout elapses"""
+        start = self.audio_time
+        for frame in source:
+            detection = self.process_frame(frame)
+            if detection:
+                return detection
+            if timeout is not None and self.audio_time - start >= timeout:
+                return None
+        return None
+
+
+_spotter: Optional[KeywordSpotter] = None
+_spotter_loaded = False
+
+
+def get_spotter() -> Optional[KeywordSpotter]:
+    """Process-wide spotter built from the enrolled templates, or None if none exist"""
+    global _spotter, _spotter_loaded
+    if not _spotter_loaded:
+        _spotter_loaded = True
+        try:
+            _spotter = KeywordSpotter.from_directory()
+        except ValueError:
+            logger.warning("No wake-word templates enrolled; falling back to Google recognition")
+    return _spotter
+
+
+def enroll(alias: str, wav_paths: List[str], directory: str = Configs.WAKE_WORD_TEMPLATE_DIR) -> List[str]:
+    """Trim silence from recordings and store them as templates for `alias`"""
+    alias_dir = os.path.join(directory, alias.lower())
+    os.makedirs(alias_dir, exist_ok=True)
+    saved = []
+    for path in wav_paths:
+        with WavFrameSource(path) as source:
+            segment = capture_segment(source, max_duration=2.0)
+        target = os.path.join(alias_dir, os.path.basename(path))
+        if segment is None:
+            logger.warning(f"No speech found in {path}, copying it untrimmed")
+            shutil.copyfile(path, target)
+        else:
+            with wave.open(target, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(segment.sample_width)
+                wav.setframerate(segment.sample_rate)
+                wav.writeframes(segment.pcm)
+        saved.append(target)
+    return saved
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "enroll":
+        for saved_path in enroll(sys.argv[2], sys.argv[3:]):
+            print(f"Saved template {saved_path}")
+    else:
+        print("Usage: python -m core.wake_word enroll <alias> <recording.wav> [...]")
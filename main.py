@@ -10,9 +10,20 @@ import os
 from typing import Optional, Dict, Any
 
 # Core imports
-from core.listener import listen_voice, check_internet_connection, listen_for_wake_word
-from core.text_to_speech import text_to_speech
+from core.listener import (
+    listen_voice, check_internet_connection, listen_for_wake_word_and_command,
+    get_capture_ring, transcribe_segment, get_idle_monitor
+)
+from core.barge_in import speak_with_barge_in
+from core.cancellation import CancelToken, TurnCancelled, stats as cancellation_stats
+from core.asr import get_backend
+from core.text_to_speech import get_speech_service
+from core.streaming_speech import StreamingSpeaker
+from core.latency_filler import LatencyFiller
+from core.tts_router import get_tts_router, speak as text_to_speech
+from core.tts_cache import get_message_catalog, get_tts_cache, prerender_in_background
 from core.chat_openrouter import OpenRouterChat
+from core.response_cache import context_digest, get_response_cache
 
 # Configuration imports
 from configs.config import Configs
@@ -20,7 +31,9 @@ from configs.constant import Constants
 from configs.messages import ErrorMessages, InfoMessages, DefaultResponses
 
 # Router and tools
-from router import decide_action
+from router import (
+    API_KEY_ISSUE_DECISION, PARSE_FAILURE_RESPONSE, SpeculativeDecision, decide_action, stream_decision
+)
 from tools.system_tools import SystemToolManager
 
 # Configure logging
@@ -38,6 +51,17 @@ class VoiceAssistant:
         self.configs = Configs()
         self.chat: Optional[OpenRouterChat] = None
         self.tool_manager = SystemToolManager()
+        # Native tool calling sends these schemas instead of the tool list in ROUTER_PROMPT
+        self.tools = self.tool_manager.tool_schemas() if self.configs.ROUTER_NATIVE_TOOLS else None
+        self.pending_input: Optional[str] = None
+        self.turn: Optional[CancelToken] = None  # shared by the current turn's LLM, TTS and tool work
+        self.speaker = StreamingSpeaker()
+        self.filler = LatencyFiller()
+        self.turn_started: Optional[float] = None
+        self.reply_ready_at: Optional[float] = None
+        self.response_cache = get_response_cache()
+        self.speculation: Optional[SpeculativeDecision] = None  # routing a partial transcript
+        self.last_partial: Optional[str] = None
         
     def check_api_key(self) -> bool:
         """Check if OpenRouter API key is valid"""
@@ -54,6 +78,8 @@ class VoiceAssistant:
         """Initialize the chat system"""
         try:
             self.chat = OpenRouterChat()
+            # Connect now so the first request after the wake word doesn't pay for TCP/TLS
+            self.chat.warm_up()
             return True
         except ValueError:
             text_to_speech(ErrorMessages.API_KEY_ISSUE)
@@ -63,18 +89,44 @@ class VoiceAssistant:
             text_to_speech(ErrorMessages.STARTUP_ERROR)
             return False
     
+    def initialize_speech_recognition(self):
+        """Load the ASR backend so the first utterance doesn't pay for it"""
+        try:
+            get_backend().warm_up()
+        except Exception as e:
+            logger.error(f"ASR warm-up failed: {e}")
+    
+    def initialize_speech_cache(self):
+        """Pre-render the fixed message phrases in the background"""
+        cache = get_tts_cache()
+        if cache is None:
+            return
+        catalog = get_message_catalog()
+        if "pyttsx3" in self.configs.TTS_PRERENDER_ENGINES:
+            queued = get_speech_service().prerender(catalog.fragments)
+            logger.info(f"Pre-rendering {queued} phrases; {cache.stats()['entries']} already cached")
+        if "gtts" in self.configs.TTS_PRERENDER_ENGINES:
+            from core.google_text_to_speech import render_google_speech
+            prerender_in_background(
+                lambda text: render_google_speech(text, self.configs.TTS_PRERENDER_LANG),
+                catalog,
+                on_done=cache.log_stats
+            )
+    
     def announce_startup(self):
         """Announce that the assistant is ready"""
-        text_to_speech(
+        # Both lines go through the same engine, back to back
+        speech = get_speech_service()
+        speech.say(
             InfoMessages.ASSISTANT_STARTING.format(
                 assistant_name=self.configs.ASSISTANT_NAME
             )
         )
-        text_to_speech(
+        speech.say(
             InfoMessages.ASSISTANT_READY.format(
                 assistant_name=self.configs.ASSISTANT_NAME
             )
-        )
+        ).wait()
     
     def handle_network_error(self):
         """Handle network connectivity issues"""
@@ -83,7 +135,8 @@ class VoiceAssistant:
     
     def handle_voice_input(self) -> Optional[str]:
         """Get and validate voice input"""
-        text = listen_voice()
+        self.discard_speculation()
+        text = listen_voice(on_partial=self.on_partial)
         
         if text == Constants.NETWORK_ERROR:
             text_to_speech(ErrorMessages.NETWORK_CONNECTION_ERROR)
@@ -96,59 +149,238 @@ class VoiceAssistant:
             
         return text
     
+    def on_partial(self, text: str):
+        """
+        Interim transcript while the user is still talking: get the LLM
+        connection ready, and once the hypothesis stops changing start routing it
+        """
+        logger.debug(f"Partial: {text!r}")
+        if self.chat is None:
+            return
+        self.chat.prepare()
+        words = SpeculativeDecision.words(text)
+        stable = self.last_partial is not None and words == SpeculativeDecision.words(self.last_partial)
+        self.last_partial = text
+        if not stable or not words or not self.configs.SPECULATIVE_ROUTING:
+            return
+        if self.speculation is not None and self.speculation.matches(text):
+            return
+        if self.speculation is not None:
+            self.speculation.discard()
+        logger.info(f"Routing the partial transcript ahead of the final one: {text!r}")
+        self.speculation = SpeculativeDecision(self.chat, text, self.tools)
+    
+    def discard_speculation(self):
+        """Forget partials (and any routing started on them) before a new utterance"""
+        if self.speculation is not None:
+            self.speculation.discard()
+        self.speculation = None
+        self.last_partial = None
+    
     def process_user_input(self, user_input: str):
         """Process user input and decide on action"""
         if not self.chat:
             text_to_speech(ErrorMessages.STARTUP_ERROR)
             return
-            
-        decision = decide_action(self.chat, user_input)
+        
+        self.turn = turn = CancelToken()
+        self.turn_started = time.perf_counter()
+        if self.configs.FILLER_AUDIO:
+            self.filler.start(self.turn_started)
+            turn.on_cancel(lambda: self.filler.ready(heard=False))
+        try:
+            reply = self.route_user_input(user_input)
+        except TurnCancelled:
+            reply = ""
+        finally:
+            self.filler.ready(heard=False)  # no reply at all (e.g. a silent tool): drop the filler
+        
+        if turn.cancelled:
+            # Preempted: the request stays in the history, the partial reply doesn't
+            self.chat.record_turn(user_input, "")
+            turn.stopped()
+            return
+        # Only the utterance and what was said back go into the chat history
+        self.chat.record_turn(user_input, reply)
+    
+    def route_user_input(self, user_input: str) -> str:
+        """Decide on an action and carry it out; returns the reply"""
+        speculation, self.speculation, self.last_partial = self.speculation, None, None
+        cached = (self.response_cache.lookup(user_input, self.conversation_digest())
+                  if self.response_cache else None)
+        if cached is not None:
+            if speculation is not None:
+                speculation.discard()
+            logger.info(f"Cached reply (saved ~{cached.latency * 1000:.0f} ms): {cached.utterance!r}")
+            return self.handle_chat_response({"response": cached.reply})
+        
+        started = time.perf_counter()
+        self.reply_ready_at = None
+        decision = speculation.take(user_input, self.turn) if speculation is not None else None
+        if decision is not None:
+            logger.info(f"Routed from the partial transcript in {(time.perf_counter() - started) * 1000:.0f} ms")
+        elif self.configs.STREAM_REPLIES:
+            # A chat reply is spoken while it streams; tool calls run once the JSON is complete
+            stream = stream_decision(self.chat, user_input, self.tools, cancel=self.turn)
+            self.speak_response(stream)
+            decision = stream.decision()
+            if self.turn.cancelled:
+                return ""
+            if decision["action"] == Constants.ACTION_TOOL:
+                return self.handle_tool_action(decision)
+            reply = stream.spoken or self.handle_chat_response(decision)
+            self.remember_reply(user_input, reply, started)
+            return reply
+        else:
+            decision = decide_action(self.chat, user_input, self.tools, cancel=self.turn)
+        self.reply_ready_at = time.perf_counter()
         
         if decision["action"] == Constants.ACTION_TOOL:
-            self.handle_tool_action(decision)
+            return self.handle_tool_action(decision)
         elif decision["action"] == Constants.ACTION_CHAT:
-            self.handle_chat_response(decision)
+            reply = self.handle_chat_response(decision)
+            self.remember_reply(user_input, reply, started)
+            return reply
+        return ""
     
-    def handle_tool_action(self, decision: Dict[str, Any]):
+    def remember_reply(self, user_input: str, reply: str, started: float):
+        """Offer a model-written chat reply to the response cache (never tool results or errors)"""
+        if self.response_cache is None or self.chat.last_request_failed:
+            return
+        if self.pending_input or reply in (PARSE_FAILURE_RESPONSE, API_KEY_ISSUE_DECISION["response"]):
+            return  # cut short by barge-in, or one of the router's own fallbacks
+        latency = (self.reply_ready_at or time.perf_counter()) - started
+        self.response_cache.store(user_input, reply, latency, self.conversation_digest())
+    
+    def conversation_digest(self) -> str:
+        """Scope for cached replies: the summary and the previous exchange"""
+        return context_digest(self.chat.recent_messages(2))
+    
+    def on_reply_ready(self):
+        """First reply segment is ready to play"""
+        self.filler.ready()
+        if self.reply_ready_at is None:
+            self.reply_ready_at = time.perf_counter()
+    
+    def handle_tool_action(self, decision: Dict[str, Any]) -> str:
         """Handle tool-based actions"""
         tool_name = decision.get("tool")
         arguments = decision.get("arguments", {})
+        # Never act on a call from a turn the user has already cancelled
+        self.turn.check()
         
         try:
             result = self.tool_manager.execute_tool(tool_name, arguments)
             if result:
-                text_to_speech(result)
+                self.speak_response(result)
+            return result or ""
         except Exception as e:
             logger.error(f"Tool execution error: {e}")
-            text_to_speech(
-                ErrorMessages.TOOL_EXECUTION_ERROR.format(
-                    tool_name=tool_name, 
-                    error=str(e)
-                )
+            message = ErrorMessages.TOOL_EXECUTION_ERROR.format(
+                tool_name=tool_name, 
+                error=str(e)
             )
+            text_to_speech(message)
+            return message
     
-    def handle_chat_response(self, decision: Dict[str, Any]):
+    def handle_chat_response(self, decision: Dict[str, Any]) -> str:
         """Handle chat-based responses"""
         response = decision.get("response", DefaultResponses.FALLBACK_RESPONSE)
-        text_to_speech(response)
+        self.speak_response(response)
+        return response
+    
+    def speak_response(self, text):
+        """
+        Speak a reply (a string or a stream of text); with barge-in the user can
+        cut it off with a new request, which cancels the rest of the turn
+        """
+        turn = self.turn
+        
+        def speak(reply, stop_event=None, on_audio=None):
+            self.speaker.speak(reply, stop_event, turn_started, self.on_reply_ready, on_audio)
+            if turn is not None:
+                turn.stopped()  # LLM stream closed and playback over: cancellation latency
+        
+        turn_started, self.turn_started = self.turn_started, None  # only the first reply of a turn counts for TTFA
+        if not (self.configs.BARGE_IN and self.configs.SHARED_CAPTURE):
+            speak(text, turn)
+            return
+        
+        result = speak_with_barge_in(speak, text, get_capture_ring(), turn)
+        if result.interrupted and result.segment is not None:
+            self.pending_input = transcribe_segment(result.segment) or None
+    
+    def process_turns(self, user_input: str):
+        """Process input, then any request that interrupted the reply"""
+        self.pending_input = user_input
+        while self.pending_input:
+            user_input, self.pending_input = self.pending_input, None
+            if self.is_stop_phrase(user_input):
+                logger.info(f"Stopped by {user_input!r}")
+                continue  # the interruption already cancelled the turn; nothing to answer
+            self.process_user_input(user_input)
+    
+    def is_stop_phrase(self, text: str) -> bool:
+        """A bare "stop" / "cancel" (but not "cancel shutdown", which is a request)"""
+        normalized = text.lower().strip(" .!?,")
+        return normalized in self.configs.STOP_PHRASES
+    
+    def is_exit_phrase(self, text: str) -> bool:
+        """Whether the user is ending the conversation ("that's all", ...)"""
+        normalized = text.lower().strip(" .!?,")
+        return any(phrase in normalized for phrase in self.configs.FOLLOW_UP_EXIT_PHRASES)
+    
+    def run_follow_up_window(self):
+        """Keep listening for follow-ups without the wake word until silence or an exit phrase"""
+        while self.configs.CONVERSATION_MODE:
+            self.discard_speculation()
+            user_input = listen_voice(on_partial=self.on_partial,
+                                      timeout=self.configs.FOLLOW_UP_WINDOW)
+            if not user_input or user_input == Constants.NETWORK_ERROR:
+                return
+            if self.is_exit_phrase(user_input):
+                text_to_speech(InfoMessages.FOLLOW_UP_CLOSED)
+                return
+            self.process_turns(user_input)
     
     def run_main_loop(self):
         """Main application loop"""
         try:
+            idle_monitor = get_idle_monitor()
             while True:
-                # Listen for wake word
-                if listen_for_wake_word(wake_word=self.configs.ASSISTANT_NAME.lower()):
-                    text_to_speech(InfoMessages.LISTENING)
+                # Idle cheaply until there is sound worth running the detector on
+                rewind_ms = 0.0
+                if idle_monitor is not None:
+                    rewind_ms = idle_monitor.wait_for_activity()
+                    if rewind_ms is None:
+                        time.sleep(Constants.DEFAULT_SLEEP_DELAY)
+                        continue
+                
+                # Listen for wake word, possibly followed by a command
+                command = listen_for_wake_word_and_command(
+                    wake_word=self.configs.ASSISTANT_NAME.lower(),
+                    rewind_ms=rewind_ms
+                )
+                if command is not None:
+                    if idle_monitor is not None:
+                        idle_monitor.mark_activity()
+                        idle_monitor.log_metrics()
                     
                     # Check internet connection
                     if not check_internet_connection():
                         self.handle_network_error()
                         continue
                     
-                    # Get and process voice input
-                    user_input = self.handle_voice_input()
-                    if user_input:
-                        self.process_user_input(user_input)
+                    if not command:
+                        text_to_speech(InfoMessages.LISTENING)
+                        
+                        # Get and process voice input
+                        command = self.handle_voice_input()
+                    
+                    # "Jarvis, open chrome" skips the prompt above
+                    if command:
+                        self.process_turns(command)
+                        self.run_follow_up_window()
                     
                     time.sleep(Constants.POST_ACTION_DELAY)
                 
@@ -156,6 +388,19 @@ class VoiceAssistant:
                 
         except KeyboardInterrupt:
             text_to_speech(InfoMessages.GOODBYE_MESSAGE)
+            logger.info(f"Speech service: {get_speech_service().stats()}")
+            logger.info(f"Filler audio: {self.filler.stats()}")
+            logger.info(f"Turn cancellation: {cancellation_stats.report()}")
+            if self.chat is not None:
+                logger.info(f"LLM connection: {self.chat.connection_stats()}")
+                logger.info(f"LLM models: {self.chat.model_stats()}")
+            if self.response_cache is not None:
+                self.response_cache.log_stats()
+                self.response_cache.flush()
+            if self.configs.TTS_ROUTER:
+                logger.info(f"TTS engines: {get_tts_router().report()}")
+            if get_tts_cache() is not None:
+                get_tts_cache().log_stats()
             logger.info("Application terminated by user")
     
     def start(self):
@@ -171,6 +416,12 @@ class VoiceAssistant:
         if not self.initialize_chat():
             return
         
+        # Load speech recognition
+        self.initialize_speech_recognition()
+        
+        # Render fixed phrases while the assistant is idle
+        self.initialize_speech_cache()
+        
         # Announce startup
         self.announce_startup()
         
@@ -1,5 +1,12 @@
 import json
 import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from configs.messages import DefaultResponses
+from core.cancellation import CancelToken, TurnCancelled
+from core.model_chain import ToolCallDelta
 
 logger = logging.getLogger(__name__)
 
@@ -38,25 +45,431 @@ Rules:
 - Parse user intent carefully to select the right tool and arguments.
 """
 
-def decide_action(chat, user_input: str):
-    """ Ask LLM to decide whether to chat or call a tool """
+# With native tool calling the tools travel as schemas; the prompt only says when to use them
+TOOL_CALLING_PROMPT = """
+You can operate the user's computer through the provided tools. Call a tool
+when the user asks for a system action, with the arguments they gave;
+otherwise reply normally in plain text.
+"""
+
+PARSE_FAILURE_RESPONSE = "I'm processing your request as a normal conversation since I couldn't parse my own thinking."
+
+API_KEY_ISSUE_DECISION = {
+    "action": "chat",
+    "response": "There seems to be an issue with my API key. Please check the OPENROUTER_API_KEY in your .env file and make sure it's valid."
+}
+
+
+def _api_key_issue(chat) -> bool:
+    return "I can't access my secret powers" in chat.conversation_history[-1].get("content", "")
+
+
+def router_messages(chat, user_input: str, native_tools: bool = False) -> List[Dict[str, str]]:
+    """
+    A routing request: the fixed persona + router prefix, the token-budgeted
+    conversation (summary and verbatim recent turns; the same request writes
+    the spoken chat reply, so it needs everything the user said) and the bare
+    user input. The routing prompt itself is never stored in the history.
+    """
+    prompt = TOOL_CALLING_PROMPT if native_tools else ROUTER_PROMPT
+    return [
+        {"role": "system", "content": f"{chat.system_prompt.strip()}\n{prompt}"},
+        *chat.recent_messages(),
+        {"role": "user", "content": user_input},
+    ]
+
+
+def decide_action(chat, user_input: str, tools: Optional[List[Dict[str, Any]]] = None,
+                  cancel: Optional[CancelToken] = None):
+    """
+    Ask LLM to decide whether to chat or call a tool. With `tools` (function
+    schemas) the provider's native tool calling is used instead of JSON replies.
+    Raises TurnCancelled if `cancel` is set while the LLM is deciding.
+    """
     try:
         # For API key related errors, we need to handle them directly
-        if "I can't access my secret powers" in chat.conversation_history[-1].get("content", ""):
+        if _api_key_issue(chat):
             logger.warning("API key issue detected, informing user")
-            return {
-                "action": "chat",
-                "response": "There seems to be an issue with my API key. Please check the OPENROUTER_API_KEY in your .env file and make sure it's valid."
-            }
+            return dict(API_KEY_ISSUE_DECISION)
         
-        response = chat.chat(f"{ROUTER_PROMPT}\nUser Input: {user_input}", stream=False)
+        if tools:
+            stream = ToolCallStream(chat.stream_complete(router_messages(chat, user_input, True),
+                                                         tools=tools, cancel=cancel))
+            for _ in stream:
+                pass
+            if cancel is not None:
+                cancel.check()
+            return stream.decision()
         
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+        response = chat.complete(router_messages(chat, user_input), cancel=cancel)
+        
+        decision = parse_decision(response)
+        if decision is None:
             logger.warning(f"Failed to parse JSON response: {response}")
-            return {"action": "chat", "response": "I'm processing your request as a normal conversation since I couldn't parse my own thinking."}
+            return {"action": "chat", "response": PARSE_FAILURE_RESPONSE}
+        return decision
             
+    except TurnCancelled:
+        raise
     except Exception as e:
         logger.error(f"Error in router: {str(e)}")
-        return {"action": "chat", "response": "I'm having trouble connecting to my brain right now. There might be an issue with my API key or connection."}
\ No newline at end of file
+        return {"action": "chat", "response": "I'm having trouble connecting to my brain right now. There might be an issue with my API key or connection."}
+
+
+class SpeculativeDecision:
+    """
+    decide_action() for a partial transcript, started while the user is still
+    finishing the utterance. take() hands the decision over if the final
+    transcript says the same words; otherwise the request is cancelled and the
+    turn is routed as usual. Nothing is executed or spoken here.
+    """
+
+    def __init__(self, chat, user_input: str, tools: Optional[List[Dict[str, Any]]] = None):
+        self.user_input = user_input
+        self.cancel = CancelToken("speculative route")
+        self._decision: Optional[dict] = None
+        self._thread = threading.Thread(target=self._run, args=(chat, tools),
+                                        name="speculative-route", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def words(text: str) -> str:
+        return " ".join(re.findall(r"[\w']+", text.lower()))
+
+    def matches(self, text: str) -> bool:
+        return self.words(text) == self.words(self.user_input)
+
+    def _run(self, chat, tools):
+        try:
+            self._decision = decide_action(chat, self.user_input, tools, cancel=self.cancel)
+        except TurnCancelled:
+            pass
+
+    def take(self, user_input: str, turn: Optional[CancelToken] = None) -> Optional[dict]:
+        """The decision for `user_input` (waiting for it if needed), or None if it differs"""
+        if not self.matches(user_input):
+            self.discard()
+            return None
+        if turn is not None:
+            callback = turn.on_cancel(self.discard)
+        try:
+            self._thread.join()
+        finally:
+            if turn is not None:
+                turn.remove(callback)
+        if turn is not None:
+            turn.check()
+        return None if self.cancel.cancelled else self._decision
+
+    def discard(self):
+        self.cancel.cancel("transcript changed")
+
+
+class DecisionParser:
+    """
+    Incremental parser for the router's JSON object.
+
+    Text is fed as it streams in; each top-level field appears in `fields` as
+    soon as its value is complete (a number only once the following , or } has
+    arrived), so a decision can be acted on before the object is closed.
+    Anything before the opening brace (a ```json fence, stray prose) is skipped.
+    """
+
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self.failed = False
+        self._position: Optional[int] = None
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        self.buffer += text
+        self._advance()
+        return self.fields
+
+    def _skip(self, i: int) -> int:
+        while i < len(self.buffer) and self.buffer[i] in self._WHITESPACE:
+            i += 1
+        return i
+
+    def _advance(self):
+        if self._position is None:
+            start = self.buffer.find("{")
+            if start < 0:
+                return
+            self._position = start + 1
+        buffer = self.buffer
+        while not (self.closed or self.failed):
+            i = self._skip(self._position)
+            if i >= len(buffer):
+                return
+            if buffer[i] == "}":
+                self.closed = True
+                return
+            if buffer[i] == ",":
+                i = self._skip(i + 1)
+            try:
+                key, end = self._decoder.raw_decode(buffer, i)
+            except ValueError:
+                return  # key still streaming in
+            colon = self._skip(end)
+            if colon >= len(buffer):
+                return
+            if not isinstance(key, str) or buffer[colon] != ":":
+                self.failed = True
+                return
+            start = self._skip(colon + 1)
+            if start >= len(buffer):
+                return
+            try:
+                value, end = self._decoder.raw_decode(buffer, start)
+            except ValueError:
+                return  # value still streaming in
+            delimiter = self._skip(end)
+            if delimiter >= len(buffer):
+                return  # "4" may yet become "40"
+            if buffer[delimiter] not in ",}":
+                self.failed = True
+                return
+            self.fields[key] = value
+            self._position = delimiter if buffer[delimiter] == "}" else delimiter + 1
+
+    @property
+    def tool_ready(self) -> bool:
+        """A tool call whose name and arguments are complete"""
+        return (self.fields.get("action") == "tool" and "tool" in self.fields
+                and ("arguments" in self.fields or self.closed))
+
+    def decision(self) -> Optional[dict]:
+        if "action" not in self.fields:
+            return None
+        decision = dict(self.fields)
+        if decision["action"] == "tool":
+            decision.setdefault("arguments", {})
+        return decision
+
+
+def parse_decision(text: str) -> Optional[dict]:
+    """The router decision in a complete reply, or None if there isn't one"""
+    parser = DecisionParser()
+    parser.feed(text)
+    return parser.decision()
+
+
+class DecisionStream:
+    """
+    A router decision being streamed from the LLM.
+
+    Iterating yields the text of the "response" field as it arrives, so a chat
+    reply can be spoken before the JSON is complete; a reply that isn't JSON at
+    all is passed through as-is. A tool call ends the iteration as soon as its
+    name and arguments have been parsed, so it can be dispatched without
+    waiting for the rest of the stream. decision() returns the parsed result.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    _HEX = frozenset("0123456789abcdefABCDEF")
+
+    def __init__(self, tokens: Iterable[str]):
+        self.tokens = iter(tokens)
+        self.raw = ""
+        self.spoken = ""
+        self.parser = DecisionParser()
+        self._consumed = False
+
+    def _response_text(self, start: int):
+        """Decode the JSON string starting at raw[start]; returns (text, end, closed)"""
+        text = ""
+        i = start
+        while i < len(self.raw):
+            char = self.raw[i]
+            if char == '"':
+                return text, i + 1, True
+            if char != '\\':
+                text += char
+                i += 1
+                continue
+            if i + 1 >= len(self.raw):
+                break  # escape split across chunks
+            code = self.raw[i + 1]
+            if code == 'u':
+                decoded = self._unicode_escape(i)
+                if decoded is None:
+                    break
+                char, i = decoded
+                text += char
+            else:
+                text += self._ESCAPES.get(code, code)
+                i += 2
+        return text, i, False
+
+    def _hex4(self, i: int) -> Optional[int]:
+        digits = self.raw[i:i + 4]
+        return int(digits, 16) if len(digits) == 4 and set(digits) <= self._HEX else None
+
+    def _unicode_escape(self, i: int):
+        """
+        Decode the \\u escape at raw[i]; returns (text, next index), or None if
+        it may still be incomplete. A surrogate pair becomes one character, a
+        lone surrogate U+FFFD, and a malformed escape is kept literally.
+        """
+        if i + 6 > len(self.raw):
+            # Wait for the digits, unless what has arrived can't be hex anyway
+            return None if set(self.raw[i + 2:]) <= self._HEX else ("\\u", i + 2)
+        code = self._hex4(i + 2)
+        if code is None:
+            return "\\u", i + 2
+        if 0xD800 <= code < 0xDC00:
+            tail = self.raw[i + 6:i + 12]
+            if len(tail) < 6 and "\\u".startswith(tail[:2]) and set(tail[2:]) <= self._HEX:
+                return None  # the low half may still be on its way
+            low = self._hex4(i + 8) if tail.startswith("\\u") else None
+            if low is not None and 0xDC00 <= low < 0xE000:
+                return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), i + 12
+            return "\ufffd", i + 6
+        if 0xDC00 <= code < 0xE000:
+            return "\ufffd", i + 6
+        return chr(code), i + 6
+
+    def _read(self, token: str):
+        self.raw += token
+        self.parser.feed(token)
+        if self.parser.tool_ready:
+            self._finish()
+
+    def _finish(self):
+        """Stop reading; the remainder of a tool call is only the closing brace"""
+        self._consumed = True
+        close = getattr(self.tokens, "close", None)
+        if close is not None:
+            close()  # releases the HTTP stream
+
+    def __iter__(self) -> Iterator[str]:
+        position = None
+        done = False
+        for token in self.tokens:
+            self._read(token)
+            if self._consumed:
+                return
+            if done:
+                continue
+            stripped = self.raw.lstrip()
+            if stripped and not stripped.startswith(("{", "`")):
+                # Plain text reply: speak it directly
+                new = self.raw[len(self.spoken):]
+                self.spoken += new
+                yield new
+                continue
+            if position is None:
+                key = self.raw.find('"response"')
+                colon = self.raw.find(':', key) if key >= 0 else -1
+                quote = self.raw.find('"', colon) if colon >= 0 else -1
+                if quote < 0:
+                    continue
+                position = quote + 1
+            text, position, done = self._response_text(position)
+            if text:
+                self.spoken += text
+                yield text
+        self._consumed = True
+
+    def decision(self) -> dict:
+        if not self._consumed:
+            # Speaking stopped early; still read the rest so the reply is complete
+            for token in self.tokens:
+                self._read(token)
+                if self._consumed:
+                    break
+            self._consumed = True
+        decision = self.parser.decision()
+        if decision is not None:
+            if decision["action"] == "chat" and "response" not in decision and self.spoken:
+                decision["response"] = self.spoken
+            return decision
+        if self.spoken:
+            return {"action": "chat", "response": self.spoken}
+        logger.warning(f"Failed to parse JSON response: {self.raw}")
+        return {"action": "chat", "response": PARSE_FAILURE_RESPONSE}
+
+
+class ToolCallStream:
+    """
+    A routing reply using native tool calls.
+
+    Text content is a chat reply and is yielded as it arrives. Tool-call
+    fragments are collected; iteration ends as soon as the first call's
+    arguments form a complete JSON object, so the tool can be dispatched
+    right away. Same interface as DecisionStream.
+    """
+
+    def __init__(self, items: Iterable[Union[str, ToolCallDelta]]):
+        self.items = iter(items)
+        self.spoken = ""
+        self.calls: Dict[int, Dict[str, str]] = {}
+        self._consumed = False
+
+    def _read(self, item: Union[str, ToolCallDelta]) -> Optional[str]:
+        if isinstance(item, str):
+            self.spoken += item
+            return item
+        call = self.calls.setdefault(item.index, {"name": "", "arguments": ""})
+        call["name"] = item.name or call["name"]
+        call["arguments"] += item.arguments
+        if self._tool_ready():
+            self._consumed = True
+            close = getattr(self.items, "close", None)
+            if close is not None:
+                close()  # releases the HTTP stream
+        return None
+
+    def _tool_ready(self) -> bool:
+        call = self.calls.get(min(self.calls)) if self.calls else None
+        if not call or not call["name"] or not call["arguments"].rstrip().endswith("}"):
+            return False
+        try:
+            json.loads(call["arguments"])
+            return True
+        except json.JSONDecodeError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        for item in self.items:
+            text = self._read(item)
+            if self._consumed:
+                return
+            if text:
+                yield text
+        self._consumed = True
+
+    def decision(self) -> dict:
+        if not self._consumed:
+            for item in self.items:
+                self._read(item)
+                if self._consumed:
+                    break
+            self._consumed = True
+        if self.calls:
+            call = self.calls[min(self.calls)]
+            try:
+                arguments = json.loads(call["arguments"]) if call["arguments"].strip() else {}
+                return {"action": "tool", "tool": call["name"], "arguments": arguments}
+            except json.JSONDecodeError:
+                logger.warning(f"Malformed tool call arguments: {call}")
+                if not self.spoken:
+                    return {"action": "chat", "response": PARSE_FAILURE_RESPONSE}
+        return {"action": "chat", "response": self.spoken or DefaultResponses.FALLBACK_RESPONSE}
+
+
+def stream_decision(chat, user_input: str, tools: Optional[List[Dict[str, Any]]] = None,
+                    cancel: Optional[CancelToken] = None):
+    """ Streaming variant of decide_action(); a cancelled stream just ends early """
+    if _api_key_issue(chat):
+        logger.warning("API key issue detected, informing user")
+        return DecisionStream([json.dumps(API_KEY_ISSUE_DECISION)])
+    if tools:
+        return ToolCallStream(chat.stream_complete(router_messages(chat, user_input, True),
+                                                   tools=tools, cancel=cancel))
+    return DecisionStream(chat.stream_complete(router_messages(chat, user_input), cancel=cancel))
@@ -0,0 +1,111 @@
+import wave
+
+import numpy as np
+
+from configs.constant import Constants
+from core.audio_pipeline import EnergyVAD, SpeechSegmenter, WavFrameSource, capture_segment, iter_speech_segments
+from core.audio_ring_buffer import AudioRingBuffer, RingFrameSource
+
+RATE = Constants.AUDIO_SAMPLE_RATE
+FRAME_MS = Constants.AUDIO_FRAME_MS
+FRAME_SAMPLES = RATE * FRAME_MS // 1000
+
+
+def tone(seconds, amplitude=8000, freq=220.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def noise(seconds, amplitude=30, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * RATE)) * amplitude).astype(np.int16)
+
+
+def frames(samples):
+    usable = len(samples) // FRAME_SAMPLES * FRAME_SAMPLES
+    return [samples[i:i + FRAME_SAMPLES].tobytes() for i in range(0, usable, FRAME_SAMPLES)]
+
+
+def write_wav(path, samples):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(Constants.AUDIO_SAMPLE_WIDTH)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_vad_tells_speech_from_room_noise():
+    vad = EnergyVAD()
+    assert not any(vad.is_speech(f) for f in frames(noise(0.5)))
+    assert all(vad.is_speech(f) for f in frames(tone(0.3)))
+
+
+def test_vad_seeded_floor_catches_speech_in_the_first_frame():
+    floor = EnergyVAD.frame_level_db(frames(noise(0.03))[0])
+    assert not EnergyVAD().is_speech(frames(tone(0.03))[0])
+    assert EnergyVAD(noise_floor_db=floor).is_speech(frames(tone(0.03))[0])
+
+
+def test_segmenter_cuts_one_utterance_with_pre_roll(tmp_path):
+    audio = np.concatenate([noise(1.0), tone(0.9), noise(1.2, seed=1)])
+    with WavFrameSource(write_wav(tmp_path / "one.wav", audio)) as source:
+        segment = capture_segment(source, timeout=2.0)
+    assert segment is not None
+    assert 0.6 <= segment.start_time <= 1.0  # pre-roll reaches back before the onset
+    assert 0.9 <= segment.duration <= 1.0 + 0.4 + 0.1
+    assert segment.sample_rate == RATE
+
+
+def test_segmenter_times_out_on_silence(tmp_path):
+    with WavFrameSource(write_wav(tmp_path / "quiet.wav", noise(2.0))) as source:
+        assert capture_segment(source, timeout=1.0) is None
+
+
+def test_iter_speech_segments_finds_each_utterance(tmp_path):
+    audio = np.concatenate([noise(0.5), tone(0.5), noise(1.0, seed=1), tone(0.6, freq=330.0), noise(1.0, seed=2)])
+    with WavFrameSource(write_wav(tmp_path / "two.wav", audio)) as source:
+        segments = list(iter_speech_segments(source, SpeechSegmenter(FRAME_MS)))
+    assert len(segments) == 2
+    assert segments[0].end_time < segments[1].start_time
+
+
+def test_segment_is_cut_at_max_duration():
+    class Source:
+        frame_ms = FRAME_MS
+        sample_rate = RATE
+
+        def __iter__(self):
+            return iter(frames(noise(0.3)) + frames(tone(3.0)))
+
+    segment = capture_segment(Source(), timeout=1.0, max_duration=1.0)
+    assert segment is not None and segment.duration <= 1.0 + 0.4
+
+
+def test_ring_buffer_wraps_and_subscribers_read_in_order():
+    ring = AudioRingBuffer(capacity_seconds=0.3, sample_rate=RATE, frame_ms=FRAME_MS)
+    reader = ring.subscribe("reader")
+    written = [np.full(FRAME_SAMPLES, i, dtype=np.int16) for i in range(25)]
+    for frame in written[:5]:
+        ring.write(frame)
+    assert [np.frombuffer(reader.read(0), dtype=np.int16)[0] for _ in range(5)] == list(range(5))
+    assert reader.read(0) is None
+
+    for frame in written[5:]:
+        ring.write(frame)
+    # The ring holds 10 frames: a reader that fell behind skips to the oldest one
+    views = reader.read_available()
+    assert reader.overruns == 1
+    assert [np.frombuffer(v, dtype=np.int16)[0] for v in views] == list(range(15, 25))
+    assert b"".join(bytes(v) for v in ring.recent(3 * FRAME_MS)) == b"".join(f.tobytes() for f in written[22:])
+
+
+def test_ring_frame_source_rewind_replays_recent_audio():
+    ring = AudioRingBuffer(capacity_seconds=2.0, sample_rate=RATE, frame_ms=FRAME_MS)
+    source = RingFrameSource(ring, "asr", read_timeout=0.01)
+    source.open()
+    for i in range(10):
+        ring.write(np.full(FRAME_SAMPLES, i, dtype=np.int16))
+    source.subscriber.read_available()
+    assert source.rewind(3 * FRAME_MS) == 3 * FRAME_MS
+    ring.close()
+    assert [np.frombuffer(f, dtype=np.int16)[0] for f in source] == [7, 8, 9]
@@ -0,0 +1,63 @@
+import threading
+
+from core.conversation_context import ConversationContext, count_tokens
+
+
+def fill(context, count, words=20):
+    for i in range(count):
+        context.append("user" if i % 2 == 0 else "assistant", f"message {i} " + "word " * words)
+
+
+def test_context_within_budget_is_sent_verbatim():
+    context = ConversationContext("You are helpful.", summarizer=lambda previous, batch: "unused", budget=10_000)
+    fill(context, 6)
+    assert len(context) == 6
+    assert context.summary is None
+    assert [m["role"] for m in context.messages()] == ["system"] + ["user", "assistant"] * 3
+
+
+def test_old_messages_fold_into_the_summary():
+    folded = []
+
+    def summarize(previous, batch):
+        folded.extend(m.content for m in batch)
+        return f"{previous} +{len(batch)}".strip()
+
+    context = ConversationContext("You are helpful.", summarizer=summarize, budget=150, keep_messages=2)
+    fill(context, 10)
+    context.wait_for_summary(5)
+    assert context.summaries >= 1
+    assert context.tokens <= context.budget
+    assert folded[0].startswith("message 0 ")
+    messages = context.messages()
+    assert messages[1]["content"].startswith("Summary of the conversation so far:")
+    assert messages[-1]["content"].startswith("message 9 ")
+
+
+def test_without_a_summarizer_old_messages_are_dropped():
+    context = ConversationContext("You are helpful.", budget=120, keep_messages=2)
+    fill(context, 10)
+    assert context.tokens <= context.budget
+    assert context.messages()[-1]["content"].startswith("message 9 ")
+    assert len(context) < 10
+
+
+def test_budget_ignores_messages_already_being_summarized():
+    release = threading.Event()
+
+    def summarize(previous, batch):
+        release.wait(5)
+        return "summary"
+
+    context = ConversationContext("You are helpful.", summarizer=summarize, budget=200, keep_messages=2)
+    fill(context, 12, words=15)
+    # Folding is in flight: new turns only push out what no longer fits, not
+    # everything down to keep_messages
+    assert len(context._recent) > context.keep_messages
+    release.set()
+    context.wait_for_summary(5)
+    assert context.tokens <= context.budget
+
+
+def test_count_tokens_grows_with_text():
+    assert 0 < count_tokens("hello") < count_tokens("hello " * 50)
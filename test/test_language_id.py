@@ -0,0 +1,54 @@
+import pytest
+
+from core.language_id import LanguageTracker, detect_language
+
+
+@pytest.mark.parametrize("text", [
+    "The weather is nice today.",
+    "Open the main door",
+    "The sun is out today",
+    "I met Raj at the mall",
+    "Set volume to 40 percent",
+])
+def test_english(text):
+    guess = detect_language(text)
+    assert (guess.language, guess.script) == ("en", "latin")
+
+
+@pytest.mark.parametrize("text", [
+    "namaste",
+    "kya haal hai bhai",
+    "Main theek hoon, aap kaise ho?",
+    "Volume kam kar do yaar",
+    "Arre yaar, kya scene hai?",
+])
+def test_hinglish(text):
+    guess = detect_language(text)
+    assert guess.romanized
+    assert guess.confidence > 0.5
+
+
+def test_devanagari():
+    guess = detect_language("नमस्ते, आप कैसे हैं?")
+    assert (guess.language, guess.script) == ("hi", "devanagari")
+
+
+def test_mixed_script_goes_by_the_majority():
+    assert detect_language("Chrome खोलो please").language == "en"
+    assert detect_language("क्रोम खोलो ok").language == "hi"
+
+
+def test_no_letters_uses_the_default():
+    assert detect_language("42 !!", default="hi") == detect_language("", default="hi")
+    assert detect_language("42 !!", default="hi").language == "hi"
+    assert detect_language("42 !!", default="hi").confidence == 0.0
+
+
+def test_tracker_hints_after_consistent_turns():
+    tracker = LanguageTracker(min_confidence=0.7, min_turns=2)
+    assert tracker.observe("kya haal hai bhai") is None
+    assert tracker.observe("theek hai, chalo") == "hi"
+    assert tracker.observe("Open the browser", detected="en") is None  # a switch restarts the streak
+    assert tracker.observe("and close it") == "en"
+    tracker.reset()
+    assert tracker.hint is None
@@ -0,0 +1,61 @@
+import json
+import time
+
+from core.response_cache import ResponseCache, context_digest, is_context_dependent, is_time_sensitive, normalize
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(path=str(tmp_path / "responses.json"), **kwargs)
+
+
+def test_normalize_drops_fillers_and_the_assistant_name():
+    assert normalize("Hey, what can you do?") == normalize("what can you do")
+
+
+def test_exact_and_paraphrase_hits(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.store("What can you do?", "I can open apps and chat.", 1.2)
+    assert cache.lookup("what can you do").reply == "I can open apps and chat."
+    assert cache.lookup("so what can you do").reply == "I can open apps and chat."
+    assert cache.lookup("what is the capital of France") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_replies_are_scoped_to_the_conversation(tmp_path):
+    cache = make_cache(tmp_path)
+    earlier = context_digest([{"role": "user", "content": "tell me a joke"}])
+    cache.store("another one", "Why did the chicken...", 1.0, earlier)
+    assert cache.lookup("another one", earlier) is not None
+    assert cache.lookup("another one", "") is None
+
+
+def test_time_sensitive_and_follow_up_questions_are_not_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    assert is_time_sensitive("what's the weather today")
+    assert is_context_dependent("tell me more about it")
+    assert not cache.store("what's the weather today", "Sunny.", 1.0)
+    assert not cache.store("why?", "Because.", 1.0)
+    assert cache.entries() == []
+
+
+def test_entries_expire_and_lru_is_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2, ttl=0.05)
+    cache.store("hello there", "Hi!", 1.0)
+    cache.store("who are you", "Your assistant.", 1.0)
+    cache.lookup("hello there")
+    cache.store("what can you do", "Lots.", 1.0)
+    assert [e.utterance for e in cache.entries()] == ["hello there", "what can you do"]
+    time.sleep(0.06)
+    assert cache.lookup("hello there") is None
+
+
+def test_hits_are_persisted_on_flush_not_on_every_lookup(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("who made you", "A small team.", 1.0)
+    cache.lookup("who made you")
+    stored = json.loads((tmp_path / "responses.json").read_text())
+    assert [e["hits"] for e in stored.values()] == [0]
+    cache.flush()
+    stored = json.loads((tmp_path / "responses.json").read_text())
+    assert [e["hits"] for e in stored.values()] == [1]
+    assert make_cache(tmp_path).lookup("who made you").hits == 2
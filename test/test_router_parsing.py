@@ -0,0 +1,132 @@
+import pytest
+
+from core.model_chain import ToolCallDelta
+from router import PARSE_FAILURE_RESPONSE, DecisionParser, DecisionStream, ToolCallStream, parse_decision
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class Tokens:
+    """A token stream that records how much of it was read and whether it was closed"""
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed or self.read >= len(self.tokens):
+            raise StopIteration
+        self.read += 1
+        return self.tokens[self.read - 1]
+
+    def close(self):
+        self.closed = True
+
+
+def test_parse_decision_skips_fences_and_prose():
+    text = 'Sure!\n```json\n{"action": "tool", "tool": "set_volume", "arguments": {"level": 40}}\n```'
+    assert parse_decision(text) == {"action": "tool", "tool": "set_volume", "arguments": {"level": 40}}
+    assert parse_decision("no json here") is None
+
+
+@pytest.mark.parametrize("size", [1, 3, 7])
+def test_parser_fields_appear_as_they_complete(size):
+    parser = DecisionParser()
+    seen = []
+    for piece in chunked('{"action": "chat", "count": 12, "response": "hi there"}', size):
+        fields = parser.feed(piece)
+        seen.append(set(fields))
+    assert {"action"} in seen
+    assert parser.closed
+    assert parser.fields == {"action": "chat", "count": 12, "response": "hi there"}
+
+
+def test_parser_holds_a_number_until_it_is_terminated():
+    parser = DecisionParser()
+    parser.feed('{"action": "tool", "tool": "set_volume", "level": 4')
+    assert "level" not in parser.fields
+    parser.feed('5}')
+    assert parser.fields["level"] == 45
+
+
+def test_tool_is_ready_once_name_and_arguments_are_parsed():
+    parser = DecisionParser()
+    parser.feed('{"action": "tool", "tool": "open_app"')
+    assert not parser.tool_ready
+    parser.feed(', "arguments": {"app_name": "chrome"}')
+    assert not parser.tool_ready  # a value counts once its delimiter has arrived
+    parser.feed('}')
+    assert parser.tool_ready
+    assert parser.decision() == {"action": "tool", "tool": "open_app", "arguments": {"app_name": "chrome"}}
+
+
+@pytest.mark.parametrize("size", [1, 4, 100])
+def test_stream_yields_the_response_text_as_it_arrives(size):
+    reply = '{"action": "chat", "response": "Line one.\\nSaid \\"hi\\" \\u00e9"}'
+    stream = DecisionStream(chunked(reply, size))
+    assert "".join(stream) == 'Line one.\nSaid "hi" é'
+    assert stream.decision() == {"action": "chat", "response": 'Line one.\nSaid "hi" é'}
+
+
+def test_stream_passes_plain_text_through():
+    stream = DecisionStream(["Hello ", "there."])
+    assert list(stream) == ["Hello ", "there."]
+    assert stream.decision() == {"action": "chat", "response": "Hello there."}
+
+
+def test_stream_stops_reading_once_a_tool_call_is_complete():
+    tokens = Tokens(chunked('{"action": "tool", "tool": "lock_computer", "arguments": {}}', 5) + ["ignored"])
+    stream = DecisionStream(tokens)
+    assert list(stream) == []
+    assert tokens.closed and tokens.read < len(tokens.tokens)
+    assert stream.decision() == {"action": "tool", "tool": "lock_computer", "arguments": {}}
+
+
+def test_stream_joins_surrogate_pairs_split_across_chunks():
+    stream = DecisionStream(['{"action": "chat", "response": "ok \\ud83d', '\\u', 'de00!"}'])
+    assert "".join(stream) == "ok \U0001F600!"
+
+
+@pytest.mark.parametrize("escape, expected", [
+    ("\\uZZ12", "\\uZZ12"),  # not hex: kept literally
+    ("\\ud83d x", "� x"),  # lone high surrogate
+    ("\\ude00", "�"),  # lone low surrogate
+])
+def test_stream_survives_malformed_unicode_escapes(escape, expected):
+    stream = DecisionStream([f'{{"action": "chat", "response": "a {escape}"}}'])
+    assert "".join(stream) == f"a {expected}"
+
+
+def test_stream_truncated_escape_is_not_spoken():
+    stream = DecisionStream(['{"action": "chat", "response": "cut \\u12'])
+    assert "".join(stream) == "cut "
+
+
+def test_unparseable_reply_falls_back():
+    stream = DecisionStream(['{"action": '])
+    assert list(stream) == []
+    assert stream.decision() == {"action": "chat", "response": PARSE_FAILURE_RESPONSE}
+
+
+def test_tool_call_stream_dispatches_on_complete_arguments():
+    items = Tokens([
+        ToolCallDelta(0, "call_1", "set_volume", '{"lev'),
+        ToolCallDelta(0, None, None, 'el": 30}'),
+        "never read",
+    ])
+    stream = ToolCallStream(items)
+    assert list(stream) == []
+    assert items.closed
+    assert stream.decision() == {"action": "tool", "tool": "set_volume", "arguments": {"level": 30}}
+
+
+def test_tool_call_stream_text_is_a_chat_reply():
+    stream = ToolCallStream(["Hi, ", "how can I help?"])
+    assert "".join(stream) == "Hi, how can I help?"
+    assert stream.decision() == {"action": "chat", "response": "Hi, how can I help?"}
@@ -4,9 +4,10 @@ import ctypes
 from ctypes import cast, POINTER
 from comtypes import CLSCTX_ALL
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+import inspect
 import math
 import time
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List
 
 # Import configuration
 import sys
@@ -15,6 +16,22 @@ from configs.constant import Constants
 from configs.messages import SuccessMessages, ErrorMessages
 
 
+# Extra JSON Schema for parameters, beyond what the signatures say
+PARAMETER_SCHEMAS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    Constants.TOOL_OPEN_APP: {
+        "app_name": {"enum": sorted(Constants.APP_PATHS)},
+    },
+    Constants.TOOL_SET_VOLUME: {
+        "level": {"minimum": 0, "maximum": 100},
+    },
+    Constants.TOOL_CREATE_FOLDER: {
+        "path": {"description": "Parent directory; the desktop when omitted"},
+    },
+}
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
 class SystemToolManager:
     """Centralized manager for all system tools"""
     
@@ -31,6 +48,31 @@ class SystemToolManager:
             Constants.TOOL_RESTART_COMPUTER: self.restart_computer,
         }
     
+    def tool_schemas(self) -> List[Dict[str, Any]]:
+        """Function-calling definitions (OpenAI `tools` format) generated from the tool methods"""
+        schemas = []
+        for name, method in self.tools.items():
+            properties: Dict[str, Any] = {}
+            required = []
+            for parameter in inspect.signature(method).parameters.values():
+                annotation = parameter.annotation
+                if getattr(annotation, "__origin__", None) is not None:  # Optional[str] -> str
+                    annotation = next(a for a in annotation.__args__ if a is not type(None))
+                schema = {"type": _JSON_TYPES.get(annotation, "string")}
+                schema.update(PARAMETER_SCHEMAS.get(name, {}).get(parameter.name, {}))
+                if parameter.default is inspect.Parameter.empty:
+                    required.append(parameter.name)
+                properties[parameter.name] = schema
+            schemas.append({
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": (inspect.getdoc(method) or name).splitlines()[0],
+                    "parameters": {"type": "object", "properties": properties, "required": required},
+                },
+            })
+        return schemas
+    
     def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Execute a system tool with given arguments"""
         if tool_name not in self.tools: